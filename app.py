@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 import base64
-import asyncio
 from datetime import datetime
 from io import BytesIO
 import smtplib
@@ -9,27 +8,30 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import uuid
 import time
+import math
+import numpy as np
 import logging
 
+# Candidates per page in the results tabs
+PAGE_SIZES = [10, 25, 50]
+
 # Configure logging for performance tracking
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Import your existing modules
-from constants import AZURE_CONFIG
-from utils import (
-    parse_resume,
-    get_text_chunks,
-    get_embedding_cached,
-    get_cosine_similarity,
-    upload_to_blob,
-    extract_contact_info,
-    save_summary_to_blob,
-    save_csv_to_blob
-)
-from backend import get_resume_analysis_async, extract_role_from_jd
-from pdf_utils import generate_summary_pdf
-from email_generator import send_email, check_missing_info, send_missing_info_email
+from constants import AZURE_CONFIG, RESUME_BLOB_CONFIG, WEIGHTS
+from utils import save_summary_to_blob
+from backend import preprocess_jd
+from pipeline import screen_resumes, load_resumes_from_blob, build_results_frame, update_candidate, window_start
+from scoring import apply_verdicts, apply_weights, compute_scores, ensure_score_columns, normalize_weights, VERDICTS
+from pdf_utils import generate_summary_pdf, generate_summary_bundle, summary_file_name, summary_pdf_fields, SUMMARY_BUNDLE_FORMATS
+from results_io import save_results_to_blob, results_to_bytes, RESULT_FORMATS
+from run_journal import RESUMABLE_STATUSES, RunJournal
+from warehouse import get_warehouse, DRIFT_PERIODS
+from email_generator import send_email, queue_emails, start_email_dispatcher, validate_email, check_missing_info, send_missing_info_email
+from email_templates import get_email_template
+from email_outbox import get_email_outbox
 
 # Import Gmail service
 from gmail_to_blob import auto_sync_gmail_on_startup, get_gmail_service
@@ -258,14 +260,14 @@ def initialize_session_state():
         st.session_state["analysis_done"] = False
     if "processing_metrics" not in st.session_state:
         st.session_state["processing_metrics"] = {}
-    # Initialize candidate notes and verdicts tracking
-    if "candidate_updates" not in st.session_state:
-        st.session_state["candidate_updates"] = {}
     # Gmail sync initialization
     if "gmail_service_initialized" not in st.session_state:
         st.session_state["gmail_service_initialized"] = False
     if "gmail_sync_status" not in st.session_state:
         st.session_state["gmail_sync_status"] = {}
+    # Run journal ID of the current/last analysis run
+    if "current_run_id" not in st.session_state:
+        st.session_state["current_run_id"] = None
 
 initialize_session_state()
 
@@ -277,6 +279,20 @@ def get_blob_service_client():
     return BlobServiceClient.from_connection_string(AZURE_CONFIG["connection_string"])
 
 blob_service_client = get_blob_service_client()
+
+# Durable run journal so interrupted analyses can be resumed
+@st.cache_resource
+def get_run_journal():
+    return RunJournal()
+
+run_journal = get_run_journal()
+
+# Historical results warehouse; the Analytics tab queries it
+warehouse = get_warehouse()
+
+# Outbox of candidate emails; the dispatcher also sends anything scheduled or left over from earlier sessions
+email_outbox = get_email_outbox()
+start_email_dispatcher()
 resumes_container_client = blob_service_client.get_container_client(AZURE_CONFIG["resumes_container"])
 
 # Initialize Gmail service on app startup
@@ -296,29 +312,36 @@ gmail_service = initialize_gmail_service()
 if gmail_service and not st.session_state["gmail_service_initialized"]:
     st.session_state["gmail_service_initialized"] = True
 
-def download_all_supported_resume_blobs():
-    """Download all supported resume files (PDF, DOCX, DOC) from Azure Blob Storage"""
+def download_all_supported_resume_blobs(days: int = 0):
+    """Download supported resume files (PDF, DOCX, DOC) received in the last `days` days (0 = all)"""
     try:
-        blobs = resumes_container_client.list_blobs()
-        resume_files = []
-        supported_extensions = ['.pdf', '.docx', '.doc']
-        
-        for blob in blobs:
-            if any(blob.name.lower().endswith(ext) for ext in supported_extensions):
-                try:
-                    downloader = resumes_container_client.download_blob(blob.name)
-                    file_bytes = downloader.readall()
-                    resume_files.append((blob.name, file_bytes))
-                except Exception as e:
-                    logger.error(f"Error downloading {blob.name}: {str(e)}")
-                    continue
-        
-        logger.info(f"Downloaded {len(resume_files)} supported resume files")
-        return resume_files
+        return load_resumes_from_blob(resumes_container_client, since=window_start(days))
     except Exception as e:
         st.error(f"Error downloading from blob storage: {str(e)}")
         return []
 
+def mark_warehouse_synced(run_id, df):
+    st.session_state["warehouse_synced"] = (run_id, df["verdict"].cat.codes.to_numpy(), df["score"].to_numpy().copy())
+
+def sync_warehouse(df):
+    """Push verdict and score changes of the current run (overrides, weights, thresholds) to the warehouse"""
+    run_id = st.session_state.get("current_run_id")
+    if not run_id:
+        return
+    codes, scores = df["verdict"].cat.codes.to_numpy(), df["score"].to_numpy()
+    synced = st.session_state.get("warehouse_synced")
+    if synced and synced[0] == run_id and len(synced[1]) == len(df):
+        changed = (codes != synced[1]) | (scores != synced[2])
+    else:
+        changed = np.ones(len(df), dtype=bool)
+    if not changed.any():
+        return
+    try:
+        warehouse.update_candidates(run_id, df.index[changed], df["verdict"].to_numpy()[changed], scores[changed])
+        mark_warehouse_synced(run_id, df)
+    except Exception as e:
+        logger.warning(f"Could not sync run {run_id} to the warehouse: {str(e)}")
+
 def render_gmail_sync_status():
     """Render Gmail sync status in the main area"""
     if gmail_service:
@@ -354,7 +377,7 @@ def render_gmail_sync_status():
                 </div>
                 <div>
                     <strong>Status:</strong><br>
-                    {'🔄 Processing...' if status.get('is_active') else '✅ Ready'}
+                    {'🔄 Processing...' if status.get('is_active') else '📡 Listening for new mail' if status.get('listening') else '✅ Ready'}
                 </div>
             </div>
         </div>
@@ -411,8 +434,10 @@ with st.sidebar:
     
     role = "N/A"
     if jd:
-        with st.spinner("Extracting role from JD..."):
-            role = extract_role_from_jd(jd)
+        # Full JD preprocessing (role, embedding, skills) in one concurrent stage; the
+        # analysis run reuses the cached profile instead of repeating these calls
+        with st.spinner("Preprocessing job description..."):
+            role = preprocess_jd(jd)["role"]
             if role != "N/A":
                 st.success(f"🎯 **Detected Role:** {role}")
             else:
@@ -437,6 +462,16 @@ with st.sidebar:
     reject_thresh = st.slider("🔴 Reject Threshold", 0, 100, 40, help="Score below which candidates are rejected")
     top_n = st.number_input("🏆 Top-N Candidates", 0, 50, 0, help="Limit shortlisted candidates (0 = no limit)")
 
+    # Verdicts are re-derived from stored scores, so threshold changes apply instantly after a run
+    thresholds = {
+        "jd_similarity_min": jd_thresh,
+        "skills_match_min": skill_thresh,
+        "domain_match_min": domain_thresh,
+        "experience_match_min": exp_thresh,
+        "shortlist_threshold": shortlist_thresh,
+        "reject_threshold": reject_thresh
+    }
+
     st.markdown('<div class="sidebar-section"><h3>📂 Resume Source</h3></div>', unsafe_allow_html=True)
     
     load_from_blob = st.checkbox("☁️ Load from Azure Blob Storage", value=True, help="Automatically loads resumes from Gmail sync")
@@ -451,6 +486,11 @@ with st.sidebar:
     else:
         uploaded_files = None
         st.info("📧 Resumes will be loaded from Azure Blob Storage (including Gmail sync)")
+        # Only the date partitions inside the window are listed
+        blob_window_days = st.number_input(
+            "📅 Received in the last N days", min_value=0, value=RESUME_BLOB_CONFIG["window_days"], step=1,
+            help="0 loads every resume in the container, including ones stored before date partitioning"
+        )
 
     # Gmail sync controls in sidebar
     st.markdown('<div class="sidebar-section"><h3>📧 Gmail Integration</h3></div>', unsafe_allow_html=True)
@@ -469,6 +509,21 @@ with st.sidebar:
     else:
         st.error("❌ Gmail service unavailable")
 
+    # Resume an interrupted run from the journal
+    st.markdown('<div class="sidebar-section"><h3>♻️ Resume Run</h3></div>', unsafe_allow_html=True)
+    interrupted_runs = run_journal.list_runs(status=RESUMABLE_STATUSES, limit=10)
+    run_options = {"Start a new run": None}
+    for interrupted in interrupted_runs:
+        started = datetime.fromtimestamp(interrupted["created_at"]).strftime('%Y-%m-%d %H:%M')
+        label = f"{interrupted['run_id']} • {started} • {interrupted['completed']}/{interrupted['total_resumes']} done"
+        run_options[label] = interrupted["run_id"]
+    resume_run_label = st.selectbox(
+        "Interrupted Runs", list(run_options.keys()),
+        help="Interrupted runs and runs with failed analyses. Finished resumes are reused without calling GPT again; "
+             "failed ones are analyzed again (same JD required)"
+    )
+    resume_run_id = run_options[resume_run_label]
+
     st.markdown("---")
     analyze = st.button("🚀 Start Analysis", type="primary", use_container_width=True)
 
@@ -486,179 +541,93 @@ if jd and analyze and not st.session_state["analysis_done"]:
     # Load resumes
     if load_from_blob:
         status_text.info("📥 Loading resumes from Azure Blob Storage...")
-        blob_files = download_all_supported_resume_blobs()  # Now supports PDF, DOCX, DOC
-        total = len(blob_files)
+        resume_files = download_all_supported_resume_blobs(blob_window_days)  # Now supports PDF, DOCX, DOC
+        total = len(resume_files)
         if total == 0:
             st.error("❌ No resume files found in Azure Blob storage container.")
+            if blob_window_days:
+                st.info(f"📅 Only resumes received in the last {blob_window_days} days were listed - set the window to 0 to load all")
             st.info("💡 **Tip:** Send resumes (PDF, DOCX, DOC) to **EAZYai111@gmail.com** and they will be automatically uploaded!")
             st.stop()
         else:
             file_types = {}
-            for file_name, _ in blob_files:
+            for file_name, _ in resume_files:
                 ext = file_name.lower().split('.')[-1]
                 file_types[ext] = file_types.get(ext, 0) + 1
             
             types_text = ", ".join([f"{count} {ext.upper()}" for ext, count in file_types.items()])
             st.info(f"📊 Found {total} resumes in blob storage ({types_text})")
+        upload_container = None
     else:
-        blob_files = None
-        total = len(uploaded_files) if uploaded_files else 0
+        resume_files = [(file.name, file.read()) for file in uploaded_files] if uploaded_files else []
+        total = len(resume_files)
         if total == 0:
             st.error("❌ Please upload at least one resume or enable blob storage option.")
             st.stop()
+        upload_container = AZURE_CONFIG["resumes_container"]
 
-    # Performance tracking
-    processing_start = time.time()
-    results = []
-    
-    # Pre-compute JD embedding once
-    jd_embedding_start = time.time()
-    jd_embedding = get_embedding_cached(jd)
-    jd_embedding_time = time.time() - jd_embedding_start
-    logger.info(f"JD embedding computed in {jd_embedding_time:.2f} seconds")
-
-    async def process_all_resumes():
-        tasks = []
-        resume_processing_start = time.time()
-
-        if load_from_blob:
-            for idx, (file_name, file_bytes) in enumerate(blob_files):
-                # Update progress
-                progress = (idx + 1) / total
-                progress_bar.progress(progress, text=f"Processing {file_name} ({idx+1}/{total})")
-                
-                try:
-                    # Upload to blob (if not already there)
-                    upload_to_blob(file_bytes, file_name, AZURE_CONFIG["resumes_container"])
-                    
-                    # Parse resume
-                    resume_text = parse_resume(file_bytes)
-                    contact = extract_contact_info(resume_text)
-
-                    # Compute similarity
-                    chunks = get_text_chunks(resume_text)
-                    resume_embedding = get_embedding_cached(" ".join(chunks[:3]))  # Limit chunks for speed
-                    jd_sim = round(get_cosine_similarity(resume_embedding, jd_embedding) * 100, 2)
-
-                    # Create async task
-                    task = get_resume_analysis_async(
-                        jd=jd, resume_text=resume_text, contact=contact, role=role,
-                        domain=domain, skills=skills, experience_range=exp_range,
-                        jd_similarity=jd_sim, resume_file=file_name
-                    )
-                    tasks.append(task)
-                except Exception as e:
-                    logger.error(f"Error processing {file_name}: {str(e)}")
-                    continue
-        else:
-            for idx, file in enumerate(uploaded_files):
-                # Update progress
-                progress = (idx + 1) / total
-                progress_bar.progress(progress, text=f"Processing {file.name} ({idx+1}/{total})")
-                
-                try:
-                    file_bytes = file.read()
-                    file_name = file.name.replace(".pdf", "")
-                    
-                    # Upload to blob
-                    upload_to_blob(file_bytes, file_name + ".pdf", AZURE_CONFIG["resumes_container"])
-
-                    # Parse resume
-                    resume_text = parse_resume(file_bytes)
-                    contact = extract_contact_info(resume_text)
-
-                    # Compute similarity
-                    chunks = get_text_chunks(resume_text)
-                    resume_embedding = get_embedding_cached(" ".join(chunks[:3]))  # Limit chunks for speed
-                    jd_sim = round(get_cosine_similarity(resume_embedding, jd_embedding) * 100, 2)
-
-                    # Create async task
-                    task = get_resume_analysis_async(
-                        jd=jd, resume_text=resume_text, contact=contact, role=role,
-                        domain=domain, skills=skills, experience_range=exp_range,
-                        jd_similarity=jd_sim, resume_file=file_name
-                    )
-                    tasks.append(task)
-                except Exception as e:
-                    logger.error(f"Error processing {file.name}: {str(e)}")
-                    continue
-
-        # Execute all tasks concurrently
-        if tasks:
-            status_text.info("🧠 Running AI analysis on all resumes...")
-            return await asyncio.gather(*tasks, return_exceptions=True)
-        return []
+    def update_progress(done, total_files, message):
+        progress = min(done / total_files, 1.0) if total_files else 0.0
+        progress_bar.progress(progress, text=f"{message} ({done}/{total_files})")
 
-    # Run async processing
+    # Run the shared screening pipeline (also used by the headless CLI)
+    status_text.info("🧠 Running AI analysis on all resumes...")
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        results = loop.run_until_complete(process_all_resumes())
-        loop.close()
+        run = screen_resumes(
+            jd, resume_files,
+            role=role, domain=domain, skills=skills, experience_range=exp_range,
+            thresholds=thresholds,
+            journal=run_journal,
+            run_id=resume_run_id,
+            upload_container=upload_container,
+            progress_callback=update_progress,
+            run_params={"source": "blob" if load_from_blob else "upload"}
+        )
     except Exception as e:
         st.error(f"Error during processing: {str(e)}")
         logger.error(f"Processing error: {str(e)}")
+        st.info("♻️ Completed resumes are saved - select the run under 'Resume Run' to continue")
         st.stop()
 
-    # Filter out exceptions and process results
-    valid_results = []
-    for r in results:
-        if isinstance(r, Exception):
-            logger.error(f"Task failed: {str(r)}")
-            continue
-        if isinstance(r, dict):
-            # Add recruiter notes field
-            r["recruiter_notes"] = ""
-            valid_results.append(r)
-
-    if not valid_results:
+    run_id = run["run_id"]
+    st.session_state["current_run_id"] = run_id
+    st.session_state["current_jd_hash"] = run["jd_hash"]
+    if resume_run_id and run_id != resume_run_id:
+        st.warning("⚠️ The job description differs from the interrupted run - started a new run instead")
+    elif run["metrics"]["resumes_resumed"]:
+        st.info(f"♻️ Resumed run {run_id}: {run['metrics']['resumes_resumed']} resumes reused from the journal")
+    if run["metrics"]["duplicates_skipped"]:
+        st.info(f"🧬 {run['metrics']['duplicates_skipped']} duplicate resumes were skipped (same file or same text)")
+    if run["metrics"].get("near_duplicates_linked"):
+        st.info(f"🧬 {run['metrics']['near_duplicates_linked']} near-duplicate resumes were linked to an "
+                f"evaluated version instead of being evaluated again (see 'linked_resumes')")
+
+    results = run["results"]
+    if not results:
         st.error("❌ No resumes were successfully processed.")
         st.stop()
 
-    results = valid_results
-    processing_time = time.time() - processing_start
     total_time = time.time() - start_time
 
-    # Enhanced verdict logic with three categories
-    def determine_verdict(row):
-        score = row["score"]
-        if (
-            row["jd_similarity"] < jd_thresh or
-            row["skills_match"] < skill_thresh or
-            row["domain_match"] < domain_thresh or
-            row["experience_match"] < exp_thresh or
-            score < reject_thresh
-        ):
-            return "reject"
-        elif score >= shortlist_thresh:
-            return "shortlist"
-        else:
-            return "review"
-
-    # Create DataFrame and apply verdict logic
-    df = pd.DataFrame(results).fillna("N/A")
-    df.replace("n/a", "N/A", regex=True, inplace=True)
-    df["verdict"] = df.apply(determine_verdict, axis=1)
-
-    # Apply Top-N logic
-    if top_n > 0:
-        sorted_df = df.sort_values("score", ascending=False)
-        top_candidates = sorted_df.head(top_n).copy()
-        top_candidates["verdict"] = "shortlist"
-        
-        # Remaining candidates keep their original verdicts
-        remaining = sorted_df.iloc[top_n:].copy()
-        df = pd.concat([top_candidates, remaining], ignore_index=True)
+    # Create DataFrame and apply verdict and Top-N logic
+    # The session frame leaves out resume texts; no view or export shows them
+    df = build_results_frame(results, thresholds, top_n, include_text=False)
+
+    # Persist the run for historical analytics
+    try:
+        warehouse.record_run(run_id, df, role=run["role"], jd_hash=run["jd_hash"], metrics=run["metrics"],
+                             source="blob" if load_from_blob else "upload")
+        mark_warehouse_synced(run_id, df)
+    except Exception as e:
+        logger.error(f"Could not record run {run_id} in the warehouse: {str(e)}")
 
     # Store results and metrics
     st.session_state["candidate_df"] = df
     st.session_state["analysis_done"] = True
     st.session_state["processing_metrics"] = {
+        **run["metrics"],
         "total_time": total_time,
-        "processing_time": processing_time,
-        "jd_embedding_time": jd_embedding_time,
-        "resumes_processed": len(df),
-        "avg_time_per_resume": processing_time / len(df) if len(df) > 0 else 0
+        "resumes_processed": len(df)
     }
 
     # Display performance metrics
@@ -672,7 +641,9 @@ if jd and analyze and not st.session_state["analysis_done"]:
             <li><strong>Total Processing Time:</strong> {metrics['total_time']:.2f} seconds</li>
             <li><strong>Resumes Processed:</strong> {metrics['resumes_processed']}</li>
             <li><strong>Average Time per Resume:</strong> {metrics['avg_time_per_resume']:.2f} seconds</li>
-            <li><strong>JD Embedding Time:</strong> {metrics['jd_embedding_time']:.2f} seconds</li>
+            <li><strong>JD Preprocessing Time:</strong> {metrics['jd_preprocessing_time']:.2f} seconds ({metrics['jd_token_count']} tokens)</li>
+            <li><strong>Deep Model Escalation Rate:</strong> {metrics['model_routing']['escalation_rate']:.1f}%</li>
+            <li><strong>Hedged Requests:</strong> {metrics['request_scheduler']['hedges']} ({metrics['request_scheduler']['hedge_wins']} won), {metrics['request_scheduler']['deadline_exceeded']} hit the run deadline</li>
         </ul>
     </div>
     """, unsafe_allow_html=True)
@@ -681,8 +652,45 @@ if jd and analyze and not st.session_state["analysis_done"]:
     logger.info(f"Analysis completed: {len(results)} resumes in {total_time:.2f} seconds")
 
 # Display Results
+def reset_what_if_weights():
+    for component, weight in WEIGHTS.items():
+        st.session_state[f"weight_{component}"] = int(round(weight * 100))
+
 if st.session_state["candidate_df"] is not None:
-    df = st.session_state["candidate_df"]
+    # What-if scoring: re-rank under different weights from the stored component scores
+    with st.expander("⚖️ What-if Scoring Weights", expanded=False):
+        st.caption("Scores are recomputed from the stored component scores - no GPT calls. Weights are normalized to sum to 100%.")
+        weight_cols = st.columns(len(WEIGHTS) + 1)
+        what_if_weights = {}
+        for col, (component, weight) in zip(weight_cols, WEIGHTS.items()):
+            with col:
+                what_if_weights[component] = st.slider(
+                    component.replace("_", " ").title(), 0, 100, int(round(weight * 100)),
+                    key=f"weight_{component}"
+                )
+        with weight_cols[-1]:
+            st.button("↩️ Reset Weights", key="reset_weights", on_click=reset_what_if_weights)
+        ranking_placeholder = st.empty()
+
+    # Vectorized recompute of scores and verdicts; manual overrides are kept
+    df = ensure_score_columns(st.session_state["candidate_df"])
+    apply_weights(df, what_if_weights)
+    apply_verdicts(df, thresholds, top_n)
+    sync_warehouse(df)
+
+    if normalize_weights(what_if_weights) != normalize_weights(WEIGHTS):
+        default_rank = pd.Series(compute_scores(df, WEIGHTS), index=df.index).rank(ascending=False, method="min")
+        what_if_rank = df["score"].rank(ascending=False, method="min")
+        top = df.assign(
+            rank=what_if_rank.astype(int),
+            rank_change=(default_rank - what_if_rank).astype(int)
+        ).nsmallest(10, "rank")
+        ranking_placeholder.dataframe(
+            top[["rank", "rank_change", "name", "score", "verdict"]].rename(columns={
+                "rank": "Rank", "rank_change": "Δ Rank", "name": "Candidate", "score": "What-if Score", "verdict": "Verdict"
+            }),
+            hide_index=True, use_container_width=True
+        )
     
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -712,6 +720,17 @@ if st.session_state["candidate_df"] is not None:
         </div>
         """, unsafe_allow_html=True)
 
+    # Manual overrides survive threshold changes until cleared
+    override_count = int((df["verdict_override"] != "").sum())
+    if override_count:
+        col_info, col_reset = st.columns([3, 1])
+        with col_info:
+            st.caption(f"✋ {override_count} candidate(s) have a manual status that threshold changes do not affect")
+        with col_reset:
+            if st.button("↩️ Clear Manual Overrides", key="clear_verdict_overrides"):
+                df["verdict_override"] = ""
+                st.rerun()
+
     st.markdown("---")
     
     # Enhanced tabs
@@ -722,8 +741,50 @@ if st.session_state["candidate_df"] is not None:
         "📊 Analytics Dashboard"
     ])
 
+    def set_verdict_override(candidate_id, widget_key):
+        # Only an explicit recruiter change becomes an override; threshold changes never touch it
+        update_candidate(st.session_state["candidate_df"], candidate_id, verdict_override=st.session_state[widget_key])
+
+    def set_recruiter_notes(candidate_id, widget_key):
+        update_candidate(st.session_state["candidate_df"], candidate_id, recruiter_notes=st.session_state[widget_key])
+
+    def paginate(frame, verdict):
+        """Page controls for one tab; returns the rows on the current page and their offset"""
+        col_size, col_page, col_info = st.columns([1, 1, 2])
+        with col_size:
+            page_size = st.selectbox("Per page", PAGE_SIZES, index=1, key=f"page_size_{verdict}")
+        total_pages = max(1, math.ceil(len(frame) / page_size))
+        page_key = f"page_{verdict}"
+        # Clamp before the widget is created; verdict changes can shrink a tab
+        if st.session_state.get(page_key, 1) > total_pages:
+            st.session_state[page_key] = total_pages
+        with col_page:
+            page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key=page_key)
+        start = (page - 1) * page_size
+        with col_info:
+            st.caption(f"Showing {start + 1}–{min(start + page_size, len(frame))} of {len(frame)} candidates "
+                       f"(page {page} of {total_pages})")
+        return frame.iloc[start:start + page_size], start
+
+    def render_compact_row(row, verdict):
+        """One-line candidate summary; returns True when the full card should be shown"""
+        col_info, col_scores, col_toggle = st.columns([4, 3, 1])
+        with col_info:
+            st.markdown(f"""
+            <div class="candidate-name"><strong>👤 {row.get('name', 'Unknown')}</strong>
+                <span class="status-{verdict}">{verdict.upper()}</span></div>
+            <div class="candidate-contact">📧 {row.get('email', 'N/A')}</div>
+            """, unsafe_allow_html=True)
+        with col_scores:
+            st.markdown(
+                f"**{row.get('score', 0):.0f}%** overall · Skills {row.get('skills_match', 0):.0f}% · "
+                f"JD {row.get('jd_similarity', 0):.0f}%"
+            )
+        with col_toggle:
+            return st.toggle("Details", key=f"details_{row.name}")
+
     # Function to render candidate cards with improved session state handling
-    def render_candidate_card(row, verdict, idx):
+    def render_candidate_card(row, verdict):
         with st.container():
             st.markdown('<div class="candidate-card">', unsafe_allow_html=True)
             
@@ -753,6 +814,10 @@ if st.session_state["candidate_df"] is not None:
                 if len(str(fitment)) > 200:
                     fitment = str(fitment)[:200] + "..."
                 st.markdown(f'<div class="candidate-fitment">💡 <strong>Fitment:</strong> {fitment}</div>', unsafe_allow_html=True)
+                # Other versions of this CV that were linked rather than evaluated again
+                linked_resumes = row.get('linked_resumes', '')
+                if isinstance(linked_resumes, str) and linked_resumes:
+                    st.caption(f"🧬 Also received as: {linked_resumes}")
                 
                 # Score metrics with visual indicators - with proper fallbacks
                 col_jd, col_skills, col_domain, col_exp, col_final = st.columns(5)
@@ -779,8 +844,8 @@ if st.session_state["candidate_df"] is not None:
                 # Action buttons with proper unique keys
                 st.markdown("### 🎬 Actions")
                 
-                # Create a unique candidate identifier
-                candidate_id = f"{candidate_name}_{idx}_{hash(str(row))}"[:50].replace(" ", "_")
+                # Stable candidate identifier (the DataFrame index) keeps widget keys unique across reruns
+                candidate_id = row.name
                 
                 # Email button
                 email_key = f"email_{candidate_id}"
@@ -853,31 +918,11 @@ EAZYAI Recruitment Team"""
                 if st.button(f"📄 Generate Summary", key=summary_key):
                     try:
                         with st.spinner("Generating PDF summary..."):
-                            # Ensure all required fields are present for PDF generation
-                            pdf_data = {
-                                "name": candidate_name,
-                                "email": email,
-                                "phone": phone,
-                                "jd_role": row.get('jd_role', role),
-                                "score": safe_get_score('score'),
-                                "verdict": verdict,
-                                "jd_similarity": safe_get_score('jd_similarity'),
-                                "skills_match": safe_get_score('skills_match'),
-                                "domain_match": safe_get_score('domain_match'),
-                                "experience_match": safe_get_score('experience_match'),
-                                "fitment": fitment,
-                                "summary_5_lines": row.get('summary_5_lines', 'Summary not available'),
-                                "highlights": row.get('highlights', []),
-                                "red_flags": row.get('red_flags', []),
-                                "missing_gaps": row.get('missing_gaps', []),
-                                "reasons_if_rejected": row.get('reasons_if_rejected', []),
-                                "recommendation": row.get('recommendation', ''),
-                                "recruiter_notes": row.get('recruiter_notes', ''),
-                                "fraud_detected": row.get('fraud_detected', False)
-                            }
+                            # Same fields and fallbacks as the bulk summary export
+                            pdf_data = summary_pdf_fields(row, role)
                             
                             pdf_bytes = generate_summary_pdf(pdf_data)
-                            summary_name = f"{candidate_name.replace(' ', '_')}_Summary.pdf"
+                            summary_name = summary_file_name(candidate_name)
                             
                             # Save to Azure Blob
                             save_summary_to_blob(pdf_bytes, summary_name, AZURE_CONFIG["summaries_container"])
@@ -903,47 +948,31 @@ EAZYAI Recruitment Team"""
             note_key = f"note_{candidate_id}"
             verdict_key = f"verdict_{candidate_id}"
             
-            # Use candidate updates from session state to avoid direct DataFrame modification
-            if candidate_id not in st.session_state["candidate_updates"]:
-                st.session_state["candidate_updates"][candidate_id] = {
-                    "notes": row.get("recruiter_notes", ""),
-                    "verdict": row.get("verdict", verdict)
-                }
-
             col_note, col_verdict = st.columns(2)
             
             with col_note:
-                new_note = st.text_area(
+                # Notes are written straight to the candidate's row by id when they change
+                st.text_area(
                     "Recruiter Notes", 
-                    value=st.session_state["candidate_updates"][candidate_id]["notes"], 
+                    value=row.get("recruiter_notes", ""), 
                     key=note_key,
-                    height=100
+                    height=100,
+                    on_change=set_recruiter_notes,
+                    args=(candidate_id, note_key)
                 )
             
             with col_verdict:
-                new_verdict = st.selectbox(
+                st.selectbox(
                     "Update Status", 
-                    ["shortlist", "review", "reject"],
-                    index=["shortlist", "review", "reject"].index(
-                        st.session_state["candidate_updates"][candidate_id]["verdict"]
-                    ),
-                    key=verdict_key
+                    VERDICTS,
+                    index=VERDICTS.index(verdict),
+                    key=verdict_key,
+                    on_change=set_verdict_override,
+                    args=(candidate_id, verdict_key),
+                    help="A manual status stays in place when thresholds change"
                 )
-
-            # Update session state
-            st.session_state["candidate_updates"][candidate_id]["notes"] = new_note
-            st.session_state["candidate_updates"][candidate_id]["verdict"] = new_verdict
-            
-            # Apply updates to the main dataframe
-            try:
-                # Find the row index in the dataframe
-                mask = (df['name'] == candidate_name) & (df['email'] == email)
-                if mask.any():
-                    idx_in_df = df[mask].index[0]
-                    df.at[idx_in_df, "recruiter_notes"] = new_note
-                    df.at[idx_in_df, "verdict"] = new_verdict
-            except Exception as e:
-                logger.warning(f"Could not update dataframe for {candidate_name}: {str(e)}")
+                if row.get("verdict_override"):
+                    st.caption(f"✋ Manual override (auto: {row.get('auto_verdict', 'N/A')})")
 
             st.markdown('</div>', unsafe_allow_html=True)
             st.markdown("---")
@@ -951,7 +980,7 @@ EAZYAI Recruitment Team"""
     # Process each verdict tab
     for verdict, tab in zip(["shortlist", "review", "reject"], tabs[:3]):
         with tab:
-            filtered = df[df["verdict"] == verdict].copy()
+            filtered = df[df["verdict"] == verdict]
             
             if len(filtered) == 0:
                 st.info(f"No candidates in {verdict} category")
@@ -961,87 +990,143 @@ EAZYAI Recruitment Team"""
             if verdict == "reject" and len(filtered) > 0:
                 st.markdown("### 📧 Bulk Actions")
                 bulk_email_key = f"bulk_email_{verdict}"
+                send_delay = st.number_input("Send after (hours)", min_value=0, max_value=168, value=0,
+                                             key=f"bulk_email_delay_{verdict}",
+                                             help="Emails wait in the outbox until then")
                 if st.button(f"📬 Send Bulk Rejection Emails ({len(filtered)} candidates)", 
                            key=bulk_email_key, type="secondary"):
-                    sent_count = 0
-                    failed_count = 0
-                    
-                    progress = st.progress(0)
-                    status = st.empty()
-                    
                     current_role = role if role != "N/A" else "this position"
                     
-                    for idx, (_, row) in enumerate(filtered.iterrows()):
-                        progress.progress((idx + 1) / len(filtered))
-                        candidate_name = row.get('name', 'Candidate')
-                        status.text(f"Sending email to {candidate_name}...")
-                        
-                        email_addr = row.get('email', '').strip()
-                        if email_addr and email_addr not in ['N/A', '', 'nan', 'None']:
-                            subject = f"Application Status Update - {current_role}"
-                            body = f"""Dear {candidate_name},
-
-Thank you for your interest in our {current_role} position. After careful consideration, we have decided not to proceed with your application at this time.
-
-We appreciate the time you invested in the application process and wish you success in your future endeavors.
-
-Best regards,
-EAZYAI Recruitment Team"""
-                            
-                            try:
-                                if send_email(email_addr, subject, body):
-                                    sent_count += 1
-                                else:
-                                    failed_count += 1
-                            except Exception as e:
-                                logger.error(f"Bulk email error for {candidate_name}: {str(e)}")
-                                failed_count += 1
-                        else:
-                            failed_count += 1
-                            logger.warning(f"No valid email for {candidate_name}")
+                    email_addrs = filtered["email"].astype(str).str.strip()
+                    valid_mask = email_addrs.map(
+                        lambda addr: addr not in ['N/A', '', 'nan', 'None'] and validate_email(addr))
+                    invalid_count = int((~valid_mask).sum())
+                    for candidate_name in filtered.loc[~valid_mask, "name"]:
+                        logger.warning(f"No valid email for {candidate_name}")
                     
-                    progress.empty()
-                    status.empty()
+                    # Subject, text and HTML for every valid candidate in one pass of the compiled template
+                    valid_rows = filtered[valid_mask]
+                    rendered = get_email_template("rejection_notice").render_batch(valid_rows, role=current_role)
+                    emails = [{"candidate_id": candidate_id, "to": email_addr, **email_content}
+                              for candidate_id, email_addr, email_content
+                              in zip(valid_rows.index, email_addrs[valid_mask], rendered)]
                     
-                    if sent_count > 0:
-                        st.success(f"✅ Successfully sent {sent_count} rejection emails")
-                    if failed_count > 0:
-                        st.warning(f"⚠️ Failed to send {failed_count} emails (check email addresses and configuration)")
+                    # Queued in the durable outbox and sent by the background dispatcher; candidates
+                    # already sent a rejection for this JD are skipped, so pressing this twice is safe
+                    try:
+                        batch = queue_emails(emails, template="reject", delay_hours=send_delay,
+                                             jd_hash=st.session_state.get("current_jd_hash"))
+                        st.session_state["email_batch_reject"] = batch["batch_id"]
+                        st.success(f"✅ Queued {batch['queued']} rejection emails"
+                                   + (f" to send in {send_delay}h" if send_delay else ""))
+                        if batch["duplicates"]:
+                            st.info(f"ℹ️ {batch['duplicates']} candidates were already emailed or queued")
+                    except Exception as e:
+                        st.error(f"❌ Could not queue emails: {str(e)}")
+                        logger.error(f"Outbox error: {str(e)}")
+                    if invalid_count > 0:
+                        st.warning(f"⚠️ {invalid_count} candidates have no valid email address")
+                
+                if "email_batch_reject" in st.session_state:
+                    batch_counts = email_outbox.counts(st.session_state["email_batch_reject"])
+                    st.caption(f"📮 Last batch: {batch_counts['sent']} sent · "
+                               f"{batch_counts['pending'] + batch_counts['sending']} waiting · "
+                               f"{batch_counts['failed']} failed")
                 
                 st.markdown("---")
 
-            # Display candidates
-            for idx, (i, row) in enumerate(filtered.iterrows()):
-                render_candidate_card(row, verdict, idx)
+            # Display candidates: one page of compact rows; full cards only when expanded
+            page_df, _ = paginate(filtered.sort_values("score", ascending=False), verdict)
+            for _, row in page_df.iterrows():
+                if render_compact_row(row, verdict):
+                    render_candidate_card(row, verdict)
 
             # Export functionality
             if len(filtered) > 0:
                 st.markdown("### 📤 Export Data")
-                export_df = filtered.drop(columns=["resume_text", "embedding"], errors="ignore")
-                csv_name = f"{verdict}_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                export_base = f"{verdict}_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 
+                # The export is only built on request so reruns do not serialize every candidate
                 col1, col2 = st.columns(2)
                 with col1:
-                    csv_download_key = f"csv_download_{verdict}"
-                    csv_data = export_df.to_csv(index=False)
-                    st.download_button(
-                        "📊 Download CSV", 
-                        csv_data,
-                        file_name=csv_name,
-                        mime="text/csv",
-                        key=csv_download_key
-                    )
+                    export_format = st.radio("Format", list(RESULT_FORMATS), horizontal=True,
+                                             key=f"export_format_{verdict}",
+                                             format_func=lambda fmt: fmt.upper(),
+                                             help="Parquet keeps score types and list fields for later analysis")
+                    export_state_key = f"export_{verdict}"
+                    if st.button("📊 Prepare Export", key=f"export_prepare_{verdict}"):
+                        st.session_state[export_state_key] = (
+                            f"{export_base}.{export_format}", export_format, results_to_bytes(filtered, export_format)
+                        )
+                    if export_state_key in st.session_state:
+                        prepared_name, prepared_format, export_data = st.session_state[export_state_key]
+                        st.download_button(
+                            f"📥 Download {prepared_format.upper()}", 
+                            export_data,
+                            file_name=prepared_name,
+                            mime=RESULT_FORMATS[prepared_format],
+                            key=f"export_download_{verdict}"
+                        )
                 with col2:
                     blob_save_key = f"blob_save_{verdict}"
-                    if st.button(f"☁️ Save to Blob", key=blob_save_key):
+                    if st.button(f"☁️ Save to Blob", key=blob_save_key,
+                                 help="Saves Parquet and CSV copies to the results container"):
                         try:
                             with st.spinner("Saving to Azure Blob..."):
-                                save_csv_to_blob(export_df, csv_name, AZURE_CONFIG["csv_container"])
-                                st.success("✅ Saved to Azure Blob!")
+                                saved = save_results_to_blob(filtered, export_base, AZURE_CONFIG["csv_container"])
+                            if all(saved.values()):
+                                st.success(f"✅ Saved {', '.join(saved)} to Azure Blob!")
+                            else:
+                                failed = [name for name, ok in saved.items() if not ok]
+                                st.error(f"❌ Failed to save {', '.join(failed)} to blob")
                         except Exception as e:
                             st.error(f"❌ Failed to save to blob: {str(e)}")
                             logger.error(f"Blob save error: {str(e)}")
 
+                # Summary PDFs for the whole tab, rendered in parallel into one download
+                st.markdown("### 📄 Bulk Summaries")
+                col1, col2 = st.columns(2)
+                with col1:
+                    bundle_format = st.radio("Bundle", list(SUMMARY_BUNDLE_FORMATS), horizontal=True,
+                                             key=f"summary_format_{verdict}",
+                                             format_func=lambda fmt: "ZIP of PDFs" if fmt == "zip" else "Merged PDF")
+                with col2:
+                    upload_summaries = st.checkbox("☁️ Also save each PDF to Azure Blob",
+                                                   key=f"summary_upload_{verdict}")
+                summaries_state_key = f"summaries_{verdict}"
+                if st.button(f"📄 Generate {len(filtered)} Summaries", key=f"summary_bulk_{verdict}"):
+                    progress = st.progress(0)
+                    try:
+                        candidates = [summary_pdf_fields(row, role) for _, row in
+                                      filtered.sort_values("score", ascending=False).iterrows()]
+                        bundle = BytesIO()
+                        stats = generate_summary_bundle(
+                            candidates, bundle, bundle_format, upload=upload_summaries,
+                            progress_callback=lambda done, total: progress.progress(done / total)
+                        )
+                        st.session_state[summaries_state_key] = (
+                            f"{verdict}_summaries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{bundle_format}",
+                            bundle_format, bundle.getvalue()
+                        )
+                        st.success(f"✅ Generated {stats['count']} summaries in {stats['processing_time']:.1f}s "
+                                   f"({stats['pdfs_per_second']:.1f} PDFs/s)")
+                        if upload_summaries and stats["upload_failures"]:
+                            st.warning(f"⚠️ {stats['upload_failures']} summaries could not be saved to blob")
+                    except Exception as e:
+                        st.error(f"❌ Bulk summary generation failed: {str(e)}")
+                        logger.error(f"Bulk PDF generation error: {str(e)}")
+                    finally:
+                        progress.empty()
+                if summaries_state_key in st.session_state:
+                    bundle_name, prepared_bundle_format, bundle_data = st.session_state[summaries_state_key]
+                    st.download_button(
+                        "📥 Download Summaries",
+                        bundle_data,
+                        file_name=bundle_name,
+                        mime=SUMMARY_BUNDLE_FORMATS[prepared_bundle_format],
+                        key=f"summary_download_{verdict}"
+                    )
+
     # Analytics Dashboard Tab
     with tabs[3]:
         st.markdown("### 📊 Comprehensive Analytics")
@@ -1061,6 +1146,46 @@ EAZYAI Recruitment Team"""
                 throughput = metrics['resumes_processed'] / metrics['total_time'] * 3600 if metrics['total_time'] > 0 else 0
                 st.metric("🚀 Throughput", f"{throughput:.0f}/hour")
             
+            # Model routing breakdown
+            routing = metrics.get("model_routing")
+            if routing:
+                st.markdown("#### 🧭 Model Routing")
+                routing_rows = []
+                for tier, tier_stats in routing["tiers"].items():
+                    routing_rows.append({
+                        "Tier": tier.title(),
+                        "Model": tier_stats["model"],
+                        "Calls": tier_stats["calls"],
+                        "Failed Calls": tier_stats["failed_calls"],
+                        "Candidates Resolved": tier_stats["resolved"],
+                        "Avg Latency (s)": round(tier_stats["avg_latency"], 2),
+                        "Total Tokens": tier_stats["total_tokens"]
+                    })
+                st.dataframe(pd.DataFrame(routing_rows), hide_index=True, use_container_width=True)
+                escalations = routing["escalations"]
+                st.caption(
+                    f"Escalated to deep model: {escalations['borderline']} borderline, "
+                    f"{escalations['validation']} invalid output, {escalations['error']} fast-tier errors "
+                    f"({routing['escalation_rate']:.1f}% of candidates)"
+                )
+            
+            # Dependency health at the end of the run
+            health = metrics.get("dependency_health")
+            if health:
+                st.markdown("#### 🛡️ Dependency Health")
+                health_rows = [
+                    {
+                        "Dependency": name.replace('_', ' ').title(),
+                        "Circuit": dep["state"].replace('_', '-'),
+                        "Successes": dep["successes"],
+                        "Failures": dep["failures"],
+                        "Rejected (fail-fast)": dep["rejected"],
+                        "Times Opened": dep["times_opened"]
+                    }
+                    for name, dep in health.items()
+                ]
+                st.dataframe(pd.DataFrame(health_rows), hide_index=True, use_container_width=True)
+            
             st.markdown("---")
         
         # Gmail sync analytics
@@ -1076,165 +1201,152 @@ EAZYAI Recruitment Team"""
             with col3:
                 st.metric("❌ Sync Errors", len(sync_status.get('errors', [])))
             with col4:
-                last_sync = sync_status.get('last_sync', 'Never')
+                last_sync = sync_status.get('last_sync') or 'Never'
                 st.metric("🕐 Last Sync", last_sync.split()[1] if last_sync != 'Never' and len(last_sync.split()) > 1 else last_sync)
             
             st.markdown("---")
         
-        # Summary statistics
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("#### 📈 Verdict Distribution")
-            verdict_counts = df["verdict"].value_counts()
-            
-            # Create a proper chart
-            chart_data = pd.DataFrame({
-                'Verdict': verdict_counts.index,
-                'Count': verdict_counts.values
-            })
-            st.bar_chart(chart_data.set_index('Verdict'))
-            
-            # Score statistics
-            st.markdown("#### 🎯 Score Statistics")
-            score_stats = df['score'].describe()
-            st.write(f"**Average Score:** {score_stats['mean']:.1f}%")
-            st.write(f"**Median Score:** {score_stats['50%']:.1f}%")
-            st.write(f"**Highest Score:** {score_stats['max']:.1f}%")
-            st.write(f"**Lowest Score:** {score_stats['min']:.1f}%")
-            st.write(f"**Standard Deviation:** {score_stats['std']:.1f}%")
-        
-        with col2:
-            st.markdown("#### 📊 Score Distribution by Category")
-            score_cols = ["jd_similarity", "skills_match", "domain_match", "experience_match"]
-            available_cols = [col for col in score_cols if col in df.columns]
+        # Current run analytics are aggregated by the results warehouse, not the session DataFrame
+        analytics_run_id = st.session_state.get("current_run_id")
+        overview = warehouse.run_overview(analytics_run_id, shortlist_thresh, reject_thresh) if analytics_run_id else {"total": 0}
+        if not overview["total"]:
+            st.info("Run analytics appear here once the analysis run is recorded in the results warehouse")
+        else:
+            col1, col2 = st.columns(2)
             
-            if available_cols:
-                score_data = df[available_cols + ['score']].copy()
-                score_data.columns = [col.replace('_', ' ').title() for col in available_cols] + ['Final Score']
+            with col1:
+                st.markdown("#### 📈 Verdict Distribution")
+                chart_data = pd.DataFrame({
+                    'Verdict': list(overview["verdicts"]),
+                    'Count': list(overview["verdicts"].values())
+                })
+                st.bar_chart(chart_data.set_index('Verdict'))
                 
-                # Show average scores
-                avg_scores = score_data.mean()
-                st.dataframe(avg_scores.to_frame('Average Score'), use_container_width=True)
+                # Score statistics
+                st.markdown("#### 🎯 Score Statistics")
+                score_stats = overview["score"]
+                st.write(f"**Average Score:** {score_stats['mean']:.1f}%")
+                st.write(f"**Median Score:** {score_stats['median']:.1f}%")
+                st.write(f"**Highest Score:** {score_stats['max']:.1f}%")
+                st.write(f"**Lowest Score:** {score_stats['min']:.1f}%")
+                st.write(f"**Standard Deviation:** {score_stats['std']:.1f}%")
             
-            # Top performers
-            st.markdown("#### 🏆 Top 5 Candidates")
-            display_cols = ['name', 'score', 'verdict']
-            if 'jd_similarity' in df.columns:
-                display_cols.append('jd_similarity')
-            if 'skills_match' in df.columns:
-                display_cols.append('skills_match')
-            
-            available_display_cols = [col for col in display_cols if col in df.columns]
-            if available_display_cols:
-                top_candidates = df.nlargest(5, 'score')[available_display_cols]
-                # Rename columns for display
-                column_names = []
-                for col in available_display_cols:
-                    if col == 'jd_similarity':
-                        column_names.append('JD Match')
-                    elif col == 'skills_match':
-                        column_names.append('Skills Match')
-                    else:
-                        column_names.append(col.replace('_', ' ').title())
+            with col2:
+                st.markdown("#### 📊 Score Distribution by Category")
+                avg_scores = pd.Series(
+                    [*overview["component_averages"].values(), score_stats["mean"]],
+                    index=[col.replace('_', ' ').title() for col in overview["component_averages"]] + ['Final Score']
+                )
+                st.dataframe(avg_scores.to_frame('Average Score'), use_container_width=True)
                 
-                top_candidates.columns = column_names
+                # Top performers
+                st.markdown("#### 🏆 Top 5 Candidates")
+                top_candidates = warehouse.run_candidates(analytics_run_id, limit=5)
+                top_candidates = top_candidates[['name', 'score', 'verdict', 'jd_similarity', 'skills_match']]
+                top_candidates.columns = ['Name', 'Score', 'Verdict', 'JD Match', 'Skills Match']
                 st.dataframe(top_candidates, hide_index=True, use_container_width=True)
 
-        # Threshold analysis
-        st.markdown("#### 🎯 Threshold Analysis")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            above_shortlist = len(df[df['score'] >= shortlist_thresh])
-            st.metric("Above Shortlist Threshold", above_shortlist, f"{(above_shortlist/total_count)*100:.1f}%")
-        
-        with col2:
-            in_review_range = len(df[(df['score'] >= reject_thresh) & (df['score'] < shortlist_thresh)])
-            st.metric("In Review Range", in_review_range, f"{(in_review_range/total_count)*100:.1f}%")
-        
-        with col3:
-            below_reject = len(df[df['score'] < reject_thresh])
-            st.metric("Below Reject Threshold", below_reject, f"{(below_reject/total_count)*100:.1f}%")
-
-        # Score distribution histogram
-        st.markdown("#### 📈 Score Distribution Histogram")
-        try:
-            score_ranges = pd.cut(df['score'], bins=[0, 20, 40, 60, 80, 100], labels=['0-20', '21-40', '41-60', '61-80', '81-100'])
-            score_dist = score_ranges.value_counts().sort_index()
-            st.bar_chart(score_dist)
-        except Exception as e:
-            st.warning(f"Could not generate score histogram: {str(e)}")
-
-        # Detailed data table with enhanced filtering
-        st.markdown("#### 🗂️ Complete Dataset")
-        
-        # Filters
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            verdict_filter = st.multiselect("Filter by Verdict", options=['shortlist', 'review', 'reject'], default=['shortlist', 'review', 'reject'])
-        with col2:
-            min_score = st.slider("Minimum Score", 0, 100, 0)
-        with col3:
-            max_score = st.slider("Maximum Score", 0, 100, 100)
-        
-        # Apply filters
-        filtered_df = df[
-            (df['verdict'].isin(verdict_filter)) & 
-            (df['score'] >= min_score) & 
-            (df['score'] <= max_score)
-        ]
-        
-        display_df = filtered_df.drop(columns=["resume_text", "embedding"], errors="ignore")
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
-        
-        # Download filtered data
-        if len(filtered_df) > 0:
-            filtered_csv = filtered_df.drop(columns=["resume_text", "embedding"], errors="ignore").to_csv(index=False)
-            st.download_button(
-                "📥 Download Filtered Data", 
-                filtered_csv,
-                file_name=f"filtered_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+            # Threshold analysis
+            st.markdown("#### 🎯 Threshold Analysis")
+            run_total = overview["total"]
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                above_shortlist = overview["thresholds"]["above_shortlist"]
+                st.metric("Above Shortlist Threshold", above_shortlist, f"{(above_shortlist/run_total)*100:.1f}%")
+            
+            with col2:
+                in_review_range = overview["thresholds"]["in_review_range"]
+                st.metric("In Review Range", in_review_range, f"{(in_review_range/run_total)*100:.1f}%")
+            
+            with col3:
+                below_reject = overview["thresholds"]["below_reject"]
+                st.metric("Below Reject Threshold", below_reject, f"{(below_reject/run_total)*100:.1f}%")
+
+            # Score distribution histogram
+            st.markdown("#### 📈 Score Distribution Histogram")
+            st.bar_chart(pd.Series(overview["histogram"], name="count"))
 
-        # Quality control summary
-        st.markdown("#### 🚨 Quality Control")
-        if 'fraud_detected' in df.columns:
-            flagged = df[df["fraud_detected"] == True]
-            if not flagged.empty:
+            # Detailed data table with enhanced filtering
+            st.markdown("#### 🗂️ Complete Dataset")
+            
+            # Filters
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                verdict_filter = st.multiselect("Filter by Verdict", options=['shortlist', 'review', 'reject'], default=['shortlist', 'review', 'reject'])
+            with col2:
+                min_score = st.slider("Minimum Score", 0, 100, 0)
+            with col3:
+                max_score = st.slider("Maximum Score", 0, 100, 100)
+            
+            # Filters run as an indexed query on (run_id, score)
+            filtered_df = warehouse.run_candidates(analytics_run_id, verdicts=verdict_filter,
+                                                   min_score=min_score, max_score=max_score)
+            st.dataframe(filtered_df, use_container_width=True, hide_index=True)
+            
+            # Download filtered data
+            if len(filtered_df) > 0:
+                st.download_button(
+                    "📥 Download Filtered Data", 
+                    filtered_df.to_csv(),
+                    file_name=f"filtered_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    mime="text/csv"
+                )
+
+            # Quality control summary
+            st.markdown("#### 🚨 Quality Control")
+            if overview["flagged"]:
+                flagged = warehouse.run_candidates(analytics_run_id, flagged_only=True)
                 st.error(f"⚠️ Found {len(flagged)} profiles with potential issues:")
-                display_cols = ["name"]
-                if 'red_flags' in flagged.columns:
-                    display_cols.append("red_flags")
-                if 'missing_gaps' in flagged.columns:
-                    display_cols.append("missing_gaps")
-                if 'email' in flagged.columns:
-                    display_cols.append("email")
-                if 'score' in flagged.columns:
-                    display_cols.append("score")
-                
-                flagged_display = flagged[display_cols]
-                column_names = [col.replace('_', ' ').title() for col in display_cols]
-                flagged_display.columns = column_names
+                flagged_display = flagged[["name", "red_flags", "missing_gaps", "email", "score"]]
+                flagged_display.columns = ["Name", "Red Flags", "Missing Gaps", "Email", "Score"]
                 st.dataframe(flagged_display, use_container_width=True, hide_index=True)
             else:
                 st.success("✅ No fraud or quality issues detected in any profiles")
-        else:
-            st.info("Quality control data not available")
 
-        # Skills analysis
-        if 'skills_match' in df.columns:
-            st.markdown("#### 🛠️ Skills Analysis")
-            skills_data = df[df['skills_match'] > 0]['skills_match']
-            if not skills_data.empty:
+            # Skills analysis
+            skills_stats = overview["skills"]
+            if skills_stats["count"]:
+                st.markdown("#### 🛠️ Skills Analysis")
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("Average Skills Match", f"{skills_data.mean():.1f}%")
-                    st.metric("High Skills Match (>80%)", len(skills_data[skills_data > 80]))
+                    st.metric("Average Skills Match", f"{skills_stats['mean']:.1f}%")
+                    st.metric("High Skills Match (>80%)", skills_stats["high"])
                 with col2:
-                    st.metric("Low Skills Match (<40%)", len(skills_data[skills_data < 40]))
-                    st.metric("Skills Match Std Dev", f"{skills_data.std():.1f}%")
+                    st.metric("Low Skills Match (<40%)", skills_stats["low"])
+                    st.metric("Skills Match Std Dev", f"{skills_stats['std']:.1f}%")
+
+        # Cross-run queries against every recorded run
+        st.markdown("---")
+        st.markdown("### 📚 Historical Analytics")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            history_skill = st.text_input("Skill", placeholder="e.g. Python", key="history_skill")
+        with col2:
+            history_verdict = st.selectbox("Verdict", ["any"] + VERDICTS, index=1, key="history_verdict")
+        with col3:
+            history_role = st.text_input("Role", placeholder="any role", key="history_role")
+        with col4:
+            history_days = st.number_input("Last N days", min_value=1, max_value=3650, value=90, key="history_days")
+
+        history = warehouse.find_candidates(
+            verdict=None if history_verdict == "any" else history_verdict,
+            skill=history_skill or None, role=history_role or None, since_days=history_days, limit=200
+        )
+        st.caption(f"{len(history)} candidate(s) found across runs (showing up to 200)")
+        if len(history):
+            history["screened_at"] = pd.to_datetime(history["screened_at"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+            st.dataframe(history[["screened_at", "role", "name", "email", "verdict", "score", "resume_file", "run_id"]],
+                         hide_index=True, use_container_width=True)
+
+        st.markdown("#### 📉 Score Drift per Role")
+        drift_period = st.radio("Period", list(DRIFT_PERIODS), index=1, horizontal=True, key="drift_period")
+        drift = warehouse.score_drift(role=history_role or None, since_days=history_days, period=drift_period)
+        if len(drift):
+            st.line_chart(drift.pivot_table(index="period", columns="role", values="avg_score"))
+            st.dataframe(drift, hide_index=True, use_container_width=True)
+        else:
+            st.info("No recorded runs in this window yet")
 
 elif not st.session_state["analysis_done"]:
     # Welcome screen with enhanced features
@@ -4,10 +4,22 @@ import json
 import asyncio
 import time
 import logging
-from typing import Dict, Any, Optional
-from constants import AZURE_CONFIG, MODEL_CONFIG, WEIGHTS, STRICT_GPT_PROMPT
-from openai import AzureOpenAI
-from utils import chunk_text
+import weakref
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, List, Tuple
+from constants import (
+    AZURE_CONFIG, MODEL_CONFIG, STRICT_GPT_PROMPT,
+    MODEL_ROUTING_CONFIG, DEFAULT_THRESHOLDS, VALIDATION_SCHEMAS, REQUEST_SCHEDULER_CONFIG,
+    PERFORMANCE_CONFIG
+)
+from openai import AzureOpenAI, AsyncAzureOpenAI
+from utils import (
+    chunk_text, count_tokens, compute_content_hash, BoundedCache,
+    get_embedding_cached, extract_skills_from_text
+)
+from request_scheduler import HedgedRequestScheduler, DeadlineExceeded
+from resilience import get_dependency_guard, CircuitOpenError, OPENAI_CHAT
+from scoring import weighted_score, FALLBACK_SIMILARITY_FACTOR
 import numpy as np
 import pandas as pd
 
@@ -23,22 +35,37 @@ client = AzureOpenAI(
     timeout=30.0
 )
 
-# Cache for role extraction to avoid repeated calls
-_role_cache = {}
+# Async clients are bound to the event loop they were created on (the app creates a new
+# loop per analysis run), so keep one per loop. Native async calls can be cancelled cleanly.
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_async_client() -> AsyncAzureOpenAI:
+    """Get the async GPT client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = AsyncAzureOpenAI(
+            api_key=AZURE_CONFIG["openai_key"],
+            api_version=AZURE_CONFIG["api_version"],
+            azure_endpoint=AZURE_CONFIG["azure_endpoint"],
+            max_retries=REQUEST_SCHEDULER_CONFIG["client_max_retries"],
+            timeout=REQUEST_SCHEDULER_CONFIG["per_call_timeout"]
+        )
+        _async_clients[loop] = async_client
+    return async_client
 
-def extract_role_from_jd(jd_text: str) -> str:
-    """Extract job role from JD with caching and improved error handling"""
-    # Use first 500 chars as cache key
-    cache_key = hash(jd_text[:500])
-    
-    if cache_key in _role_cache:
-        return _role_cache[cache_key]
+# Shared scheduler: per-run deadline budget plus hedging based on observed latency
+request_scheduler = HedgedRequestScheduler()
+
+# Bounded caches keyed by the SHA-256 of the full JD text (no prefix collisions, no unbounded growth)
+_role_cache = BoundedCache(maxsize=PERFORMANCE_CONFIG["jd_cache_size"])
+_jd_profile_cache = BoundedCache(maxsize=PERFORMANCE_CONFIG["jd_cache_size"])
+
+def _build_role_prompt(jd_text: str) -> str:
+    # Truncate JD for faster processing
+    jd_truncated = jd_text[:2000]  # Reduced from 4000 for speed
     
-    try:
-        # Truncate JD for faster processing
-        jd_truncated = jd_text[:2000]  # Reduced from 4000 for speed
-        
-        prompt = f"""
+    return f"""
 Extract the primary job title from this job description. Return only the role title (2-4 words max).
 If unclear, return "N/A".
 
@@ -49,51 +76,127 @@ Job Description:
 
 Role:"""
 
-        response = client.chat.completions.create(
+def _clean_role(raw_role: Optional[str]) -> str:
+    role = (raw_role or "").strip()
+    
+    # Validate role format
+    if 2 <= len(role.split()) <= 6 and not any(char in role for char in ['\n', '\t', '|']):
+        return role
+    return "N/A"
+
+def extract_role_from_jd(jd_text: str) -> str:
+    """Extract job role from JD with caching and improved error handling"""
+    cache_key = compute_content_hash(jd_text)
+    
+    cached_role = _role_cache.get(cache_key)
+    if cached_role is not None:
+        return cached_role
+    
+    try:
+        response = get_dependency_guard(OPENAI_CHAT).call(
+            client.chat.completions.create,
             model=MODEL_CONFIG["fast_gpt_model"],
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": _build_role_prompt(jd_text)}],
             temperature=0,
             max_tokens=15,  # Reduced for faster response
         )
-        
-        role = response.choices[0].message.content.strip()
-        
-        # Validate role format
-        if 2 <= len(role.split()) <= 6 and not any(char in role for char in ['\n', '\t', '|']):
-            _role_cache[cache_key] = role
-            return role
-        else:
-            _role_cache[cache_key] = "N/A"
-            return "N/A"
+        role = _clean_role(response.choices[0].message.content)
             
     except Exception as e:
+        # Not cached: a transient failure must not pin "N/A" for this JD
         logger.error(f"Role extraction failed: {str(e)}")
-        _role_cache[cache_key] = "N/A"
         return "N/A"
+    
+    _role_cache.set(cache_key, role)
+    return role
 
-async def get_resume_analysis_async(
+async def extract_role_from_jd_async(jd_text: str) -> str:
+    """Async role extraction sharing the same cache as extract_role_from_jd"""
+    role, _ = await _extract_role_async(jd_text)
+    return role
+
+async def _extract_role_async(jd_text: str) -> Tuple[str, bool]:
+    """(role, ok) where ok is False when the call failed and nothing was cached"""
+    cache_key = compute_content_hash(jd_text)
+    
+    cached_role = _role_cache.get(cache_key)
+    if cached_role is not None:
+        return cached_role, True
+    
+    try:
+        response = await get_dependency_guard(OPENAI_CHAT).acall(
+            get_async_client().chat.completions.create,
+            model=MODEL_CONFIG["fast_gpt_model"],
+            messages=[{"role": "user", "content": _build_role_prompt(jd_text)}],
+            temperature=0,
+            max_tokens=15,
+        )
+        role = _clean_role(response.choices[0].message.content)
+    except Exception as e:
+        logger.error(f"Role extraction failed: {str(e)}")
+        return "N/A", False
+    
+    _role_cache.set(cache_key, role)
+    return role, True
+
+async def preprocess_jd_async(jd_text: str) -> Dict[str, Any]:
+    """
+    JD preprocessing stage: role extraction, JD embedding, skill extraction and token
+    measurement run concurrently, so setup costs roughly one GPT round-trip.
+    Results are cached by the SHA-256 of the full JD.
+    """
+    jd_hash = compute_content_hash(jd_text)
+    cached_profile = _jd_profile_cache.get(jd_hash)
+    if cached_profile is not None:
+        return {**cached_profile, "cache_hit": True, "preprocessing_time": 0.0}
+    
+    start_time = time.time()
+    (role, role_ok), embedding, skills, token_count = await asyncio.gather(
+        _extract_role_async(jd_text),
+        asyncio.to_thread(get_embedding_cached, jd_text),
+        asyncio.to_thread(extract_skills_from_text, jd_text),
+        asyncio.to_thread(count_tokens, jd_text)
+    )
+    preprocessing_time = time.time() - start_time
+    
+    profile = {
+        "jd_hash": jd_hash,
+        "role": role,
+        "embedding": embedding,
+        "skills": skills,
+        "token_count": token_count,
+        "preprocessing_time": preprocessing_time,
+    }
+    # Don't pin a zero-vector embedding or an "N/A" role from a failed call in the cache
+    if any(embedding) and role_ok:
+        _jd_profile_cache.set(jd_hash, profile)
+    
+    logger.info(f"JD preprocessed in {preprocessing_time:.2f}s (role: {role}, {len(skills)} skills, {token_count} tokens)")
+    return {**profile, "cache_hit": False}
+
+def preprocess_jd(jd_text: str) -> Dict[str, Any]:
+    """preprocess_jd_async for synchronous callers (the Streamlit sidebar); shares its cache"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(preprocess_jd_async(jd_text))
+    finally:
+        loop.close()
+
+def build_analysis_messages(
     jd: str,
     resume_text: str,
-    contact: dict,
     role: str,
     domain: str,
     skills: str,
-    experience_range: str,
-    jd_similarity: float,
-    resume_file: str
-) -> dict:
-    """
-    Enhanced async resume evaluator with improved performance and error handling
-    """
-    start_time = time.time()
+    experience_range: str
+) -> list:
+    """Build the chat messages used for resume evaluation"""
+    # Optimize text chunking - use only first 2 chunks for speed
+    chunks = chunk_text(resume_text, max_tokens=1500)
+    combined_text = "\n\n".join(chunks[:2])  # Reduced from 3 to 2 chunks
     
-    try:
-        # Optimize text chunking - use only first 2 chunks for speed
-        chunks = chunk_text(resume_text, max_tokens=1500)
-        combined_text = "\n\n".join(chunks[:2])  # Reduced from 3 to 2 chunks
-        
-        # Construct optimized prompt
-        user_prompt = f"""
+    # Construct optimized prompt
+    user_prompt = f"""
 JD: {jd[:1500]}
 
 REQUIREMENTS:
@@ -107,22 +210,51 @@ RESUME:
 
 Analyze this resume against the job requirements. Focus on accuracy and be strict about scoring."""
 
-        messages = [
-            {"role": "system", "content": STRICT_GPT_PROMPT.strip()},
-            {"role": "user", "content": user_prompt}
-        ]
+    return [
+        {"role": "system", "content": STRICT_GPT_PROMPT.strip()},
+        {"role": "user", "content": user_prompt}
+    ]
 
-        # Make API call with optimized settings
-        response = await asyncio.to_thread(
-            client.chat.completions.create,
-            model=MODEL_CONFIG["deep_gpt_model"],
+async def request_analysis_async(model: str, messages: list) -> Tuple[str, Any]:
+    """Run one evaluation completion through the scheduler and return (raw_content, usage)"""
+    
+    async def attempt(timeout: float):
+        # Circuit breaker + bulkhead: fail fast while Azure OpenAI is degraded
+        return await get_dependency_guard(OPENAI_CHAT).acall(
+            get_async_client().chat.completions.create,
+            model=model,
             messages=messages,
             temperature=0.1,  # Reduced for more consistent results
-            max_tokens=1000,  # Reduced from 1200 for speed
-            timeout=25.0
+            max_tokens=MODEL_ROUTING_CONFIG["max_tokens"],
+            timeout=timeout,
+            on_start=request_scheduler.mark_attempt_started  # Bulkhead wait is not call latency
         )
+    
+    response = await request_scheduler.run(attempt, key=model)
+    return response.choices[0].message.content, getattr(response, "usage", None)
 
-        raw_response = response.choices[0].message.content
+async def get_resume_analysis_async(
+    jd: str,
+    resume_text: str,
+    contact: dict,
+    role: str,
+    domain: str,
+    skills: str,
+    experience_range: str,
+    jd_similarity: float,
+    resume_file: str,
+    model: Optional[str] = None
+) -> dict:
+    """
+    Enhanced async resume evaluator with improved performance and error handling
+    """
+    start_time = time.time()
+    
+    try:
+        messages = build_analysis_messages(jd, resume_text, role, domain, skills, experience_range)
+
+        # Make API call with optimized settings
+        raw_response, _ = await request_analysis_async(model or MODEL_CONFIG["deep_gpt_model"], messages)
         processing_time = time.time() - start_time
         
         logger.info(f"GPT analysis completed for {resume_file} in {processing_time:.2f}s")
@@ -145,6 +277,140 @@ Analyze this resume against the job requirements. Focus on accuracy and be stric
             resume_file, f"Processing error: {str(e)[:100]}"
         )
 
+def is_borderline_score(
+    score: float,
+    shortlist_threshold: float,
+    reject_threshold: float,
+    band: Optional[float] = None
+) -> bool:
+    """Check whether a score sits inside the uncertainty band around a verdict threshold"""
+    if band is None:
+        band = MODEL_ROUTING_CONFIG["uncertainty_band"]
+    return abs(score - shortlist_threshold) <= band or abs(score - reject_threshold) <= band
+
+async def get_resume_analysis_tiered_async(
+    jd: str,
+    resume_text: str,
+    contact: dict,
+    role: str,
+    domain: str,
+    skills: str,
+    experience_range: str,
+    jd_similarity: float,
+    resume_file: str,
+    shortlist_threshold: Optional[float] = None,
+    reject_threshold: Optional[float] = None
+) -> dict:
+    """
+    Tiered resume evaluator: score with the fast model and escalate to the deep model
+    only for borderline scores, malformed output or fast-tier failures
+    """
+    if shortlist_threshold is None:
+        shortlist_threshold = DEFAULT_THRESHOLDS["shortlist_threshold"]
+    if reject_threshold is None:
+        reject_threshold = DEFAULT_THRESHOLDS["reject_threshold"]
+    
+    start_time = time.time()
+    messages = build_analysis_messages(jd, resume_text, role, domain, skills, experience_range)
+    escalation_reason = None
+    
+    # Tier 1: fast model
+    try:
+        raw_response, usage = await request_analysis_async(MODEL_CONFIG["fast_gpt_model"], messages)
+        routing_stats().record_call("fast", time.time() - start_time, usage)
+        
+        issues = validate_gpt_output(raw_response)
+        if issues and MODEL_ROUTING_CONFIG["escalate_on_validation_failure"]:
+            escalation_reason = "validation"
+            logger.info(f"Escalating {resume_file} to deep model: {'; '.join(issues[:3])}")
+        else:
+            result = parse_gpt_response(
+                raw_response, contact, role, jd_similarity,
+                resume_text, resume_file, time.time() - start_time
+            )
+            if is_borderline_score(result["score"], shortlist_threshold, reject_threshold):
+                escalation_reason = "borderline"
+                logger.info(f"Escalating {resume_file} to deep model: borderline score {result['score']}")
+            else:
+                routing_stats().record_resolution("fast")
+                result["model_tier"] = "fast"
+                return result
+    except Exception as e:
+        routing_stats().record_call("fast", time.time() - start_time, None, failed=True)
+        # No point escalating once the run budget is spent or the endpoint is failing fast
+        if isinstance(e, (DeadlineExceeded, CircuitOpenError)) or not MODEL_ROUTING_CONFIG["escalate_on_error"]:
+            logger.error(f"Error processing {resume_file}: {str(e)}")
+            return create_fallback_response(
+                contact, role, jd_similarity, resume_text,
+                resume_file, f"Processing error: {str(e)[:100]}"
+            )
+        escalation_reason = "error"
+        logger.warning(f"Fast model failed for {resume_file}, escalating: {str(e)[:100]}")
+    
+    # Tier 2: deep model
+    routing_stats().record_escalation(escalation_reason)
+    deep_start = time.time()
+    try:
+        raw_response, usage = await request_analysis_async(MODEL_CONFIG["deep_gpt_model"], messages)
+        routing_stats().record_call("deep", time.time() - deep_start, usage)
+        
+        result = parse_gpt_response(
+            raw_response, contact, role, jd_similarity,
+            resume_text, resume_file, time.time() - start_time
+        )
+    except Exception as e:
+        routing_stats().record_call("deep", time.time() - deep_start, None, failed=True)
+        logger.error(f"Error processing {resume_file}: {str(e)}")
+        result = create_fallback_response(
+            contact, role, jd_similarity, resume_text,
+            resume_file, f"Processing error: {str(e)[:100]}"
+        )
+    
+    routing_stats().record_resolution("deep")
+    result["model_tier"] = "deep"
+    result["escalation_reason"] = escalation_reason
+    logger.info(f"Tiered analysis completed for {resume_file} in {time.time() - start_time:.2f}s")
+    return result
+
+def load_gpt_json(raw_json: str) -> dict:
+    """Strip markdown fences from a GPT response and decode the JSON payload"""
+    json_str = raw_json.strip()
+    if json_str.startswith('```json'):
+        json_str = json_str[7:]
+    if json_str.endswith('```'):
+        json_str = json_str[:-3]
+    return json.loads(json_str)
+
+def validate_gpt_output(raw_json: str) -> List[str]:
+    """Validate a raw GPT evaluation against the candidate response schema; returns a list of issues"""
+    schema = VALIDATION_SCHEMAS["candidate_response"]
+    
+    try:
+        parsed = load_gpt_json(raw_json or "")
+    except (json.JSONDecodeError, ValueError) as e:
+        return [f"Invalid JSON: {str(e)[:80]}"]
+    
+    if not isinstance(parsed, dict):
+        return ["Response is not a JSON object"]
+    
+    issues = []
+    for field in schema["required_fields"]:
+        if field not in parsed:
+            issues.append(f"Missing field: {field}")
+    
+    for field in schema["score_fields"]:
+        try:
+            value = float(parsed.get(field))
+            if not 0 <= value <= 100:
+                issues.append(f"Out of range score: {field}")
+        except (TypeError, ValueError):
+            issues.append(f"Non-numeric score: {field}")
+    
+    if str(parsed.get("verdict", "")).lower() not in ["shortlist", "review", "reject"]:
+        issues.append("Invalid verdict")
+    
+    return issues
+
 def parse_gpt_response(
     raw_json: str, 
     contact: dict, 
@@ -158,13 +424,7 @@ def parse_gpt_response(
     
     try:
         # Clean the JSON response
-        json_str = raw_json.strip()
-        if json_str.startswith('```json'):
-            json_str = json_str[7:]
-        if json_str.endswith('```'):
-            json_str = json_str[:-3]
-        
-        parsed = json.loads(json_str)
+        parsed = load_gpt_json(raw_json)
         
     except json.JSONDecodeError as e:
         logger.error(f"JSON parsing failed for {resume_file}: {str(e)}")
@@ -187,15 +447,13 @@ def parse_gpt_response(
     domain_match = get_score("domain_match") 
     experience_match = get_score("experience_match")
 
-    # Calculate weighted final score
-    final_score = (
-        skills_match * WEIGHTS["skills_match"] +
-        domain_match * WEIGHTS["domain_match"] +
-        experience_match * WEIGHTS["experience_match"] +
-        jd_similarity * WEIGHTS["jd_similarity"]
-    )
-
-    score_rounded = round(final_score, 2)
+    # Calculate weighted final score (re-weighted later with scoring.compute_scores)
+    score_rounded = weighted_score({
+        "skills_match": skills_match,
+        "domain_match": domain_match,
+        "experience_match": experience_match,
+        "jd_similarity": jd_similarity
+    })
 
     # Enhanced verdict logic
     verdict = parsed.get("verdict", "review").lower()
@@ -302,6 +560,7 @@ def parse_gpt_response(
         "recommendation": str(get_field("recommendation"))[:500],  # Limit length
         "highlights": highlights[:15],  # Limit number of highlights
         "verdict": verdict,
+        "analysis_failed": False,
         "resume_text": resume_text,
         "resume_file": resume_file,
         "processing_time": processing_time,
@@ -319,7 +578,7 @@ def create_fallback_response(
     """Create a fallback response when GPT analysis fails"""
     
     # Basic scoring based on available data
-    basic_score = max(0, jd_similarity * 0.6)  # Conservative scoring
+    basic_score = max(0, jd_similarity * FALLBACK_SIMILARITY_FACTOR)  # Conservative scoring
     
     # Extract basic info from contact
     candidate_name = contact.get("name", "N/A")
@@ -350,6 +609,7 @@ def create_fallback_response(
         "recommendation": "Manual review recommended due to analysis failure",
         "highlights": [],
         "verdict": "review",  # Default to review for failed analyses
+        "analysis_failed": True,
         "resume_text": resume_text,
         "resume_file": resume_file,
         "processing_time": 0.0,
@@ -465,6 +725,63 @@ class PerformanceMonitor:
     def record_failure(self):
         self.failed_analyses += 1
 
+class ModelRoutingStats:
+    """Per-tier call counts, latency and token spend for the tiered evaluator"""
+    
+    TIERS = ("fast", "deep")
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.tiers = {
+            tier: {
+                "calls": 0,
+                "failed_calls": 0,
+                "resolved": 0,
+                "total_latency": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            }
+            for tier in self.TIERS
+        }
+        self.escalations = {"borderline": 0, "validation": 0, "error": 0}
+    
+    def record_call(self, tier: str, latency: float, usage: Any = None, failed: bool = False):
+        stats = self.tiers[tier]
+        stats["calls"] += 1
+        stats["total_latency"] += latency
+        if failed:
+            stats["failed_calls"] += 1
+        if usage is not None:
+            stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    
+    def record_resolution(self, tier: str):
+        self.tiers[tier]["resolved"] += 1
+    
+    def record_escalation(self, reason: Optional[str]):
+        if reason in self.escalations:
+            self.escalations[reason] += 1
+    
+    def summary(self) -> Dict[str, Any]:
+        tiers = {}
+        for tier, stats in self.tiers.items():
+            calls = stats["calls"]
+            tiers[tier] = {
+                **stats,
+                "model": MODEL_CONFIG[f"{tier}_gpt_model"],
+                "avg_latency": stats["total_latency"] / calls if calls else 0.0,
+                "total_tokens": stats["prompt_tokens"] + stats["completion_tokens"],
+            }
+        
+        resolved = sum(t["resolved"] for t in self.tiers.values())
+        return {
+            "tiers": tiers,
+            "escalations": dict(self.escalations),
+            "escalation_rate": (self.tiers["deep"]["resolved"] / resolved) * 100 if resolved else 0.0,
+        }
+
 # Utility functions for data validation and cleaning
 def validate_candidate_data(candidate_data: dict) -> dict:
     """Validate and clean candidate data before processing"""
@@ -514,3 +831,19 @@ def sanitize_text_field(text: str, max_length: int = 1000) -> str:
 
 # Global performance monitor instance
 performance_monitor = PerformanceMonitor()
+
+# Model routing statistics for calls made outside an analysis run
+model_routing_stats = ModelRoutingStats()
+
+# Each analysis run (pipeline task) gets its own stats, so concurrent jobs don't mix them
+_run_routing_stats: ContextVar[Optional[ModelRoutingStats]] = ContextVar("run_routing_stats", default=None)
+
+def routing_stats() -> ModelRoutingStats:
+    """Routing stats of the run in the current context, or the process-wide fallback"""
+    return _run_routing_stats.get() or model_routing_stats
+
+def start_routing_stats() -> ModelRoutingStats:
+    """Fresh routing stats for the run in the current context (and tasks it creates)"""
+    stats = ModelRoutingStats()
+    _run_routing_stats.set(stats)
+    return stats
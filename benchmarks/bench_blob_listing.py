@@ -0,0 +1,79 @@
+# bench_blob_listing.py — Resume blob listing: whole container vs date-partitioned prefixes
+#
+#   python benchmarks/bench_blob_listing.py --blobs 300000 --days 365 --window 7 --page-ms 40
+#
+# Uses an in-memory container that pages its listings like Azure does (up to 5000 names per
+# List Blobs call, --page-ms per call), filled with resumes named by ingestion. The previous
+# loader listed every blob; the partitioned loader lists only the days in the window.
+
+import argparse
+import bisect
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import list_resume_blob_names, window_start  # noqa: E402
+from resume_index import content_blob_name  # noqa: E402
+
+PAGE_SIZE = 5000
+
+class PagedContainer:
+    """list_blobs(name_starts_with=...) and walk_blobs over sorted names, charging one round trip per page"""
+
+    def __init__(self, names, page_ms: float):
+        self.names = sorted(names)
+        self.page_ms = page_ms
+        self.calls = 0
+
+    def list_blobs(self, name_starts_with: str = ""):
+        low = bisect.bisect_left(self.names, name_starts_with)
+        high = bisect.bisect_left(self.names, name_starts_with + "\uffff")
+        matching = self.names[low:high]
+        for start in range(0, max(len(matching), 1), PAGE_SIZE):
+            self.calls += 1
+            time.sleep(self.page_ms / 1000)
+            for name in matching[start:start + PAGE_SIZE]:
+                yield SimpleNamespace(name=name)
+
+    def walk_blobs(self, delimiter: str = "/"):
+        """Top-level listing: one entry per folder plus the blobs outside any folder"""
+        self.calls += 1
+        time.sleep(self.page_ms / 1000)
+        folders = sorted({name.split(delimiter, 1)[0] + delimiter for name in self.names if delimiter in name})
+        for folder in folders:
+            yield SimpleNamespace(name=folder)
+        for name in self.names:
+            if delimiter not in name:
+                yield SimpleNamespace(name=name, last_modified=datetime.now(timezone.utc))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Blob listing cost by layout")
+    parser.add_argument("--blobs", type=int, default=300000)
+    parser.add_argument("--days", type=int, default=365, help="days of history in the container")
+    parser.add_argument("--window", type=int, default=7, help="days listed by the partitioned loader")
+    parser.add_argument("--page-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    today = datetime.now(timezone.utc).date()
+    names = [
+        content_blob_name(f"{rng.getrandbits(64):016x}", f"resume_{i}.pdf", rng.choice(("gmail", "upload")),
+                          today - timedelta(days=rng.randrange(args.days)))
+        for i in range(args.blobs)
+    ]
+    container = PagedContainer(names, args.page_ms)
+
+    for label, since in (("whole container", None), (f"last {args.window} days", window_start(args.window))):
+        container.calls = 0
+        start = time.perf_counter()
+        listed = list_resume_blob_names(container, since=since)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<20} {len(listed):8d} resumes  {container.calls:4d} list calls  {elapsed:7.2f} s")
+
+if __name__ == "__main__":
+    main()
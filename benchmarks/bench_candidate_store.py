@@ -0,0 +1,71 @@
+# bench_candidate_store.py — Cost of recruiter edits on the candidate DataFrame
+#
+#   python benchmarks/bench_candidate_store.py --sizes 1000 10000
+#
+# "mask scan": the old per-card update, a name/email boolean mask over every row, done for every rendered card
+# "indexed": update_candidate() by candidate_id for one page of cards (what a rerun does now)
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import build_results_frame, update_candidate  # noqa: E402
+
+def make_frame(n: int):
+    rng = np.random.default_rng(0)
+    results = [{
+        "candidate_id": f"{i:064x}", "name": f"Candidate {i}", "email": f"candidate{i}@example.com",
+        "score": float(rng.uniform(0, 100)), "jd_similarity": float(rng.uniform(50, 100)),
+        "skills_match": float(rng.uniform(0, 100)), "domain_match": float(rng.uniform(0, 100)),
+        "experience_match": float(rng.uniform(0, 100)), "recruiter_notes": "", "resume_file": f"resume_{i}.pdf"
+    } for i in range(n)]
+    return build_results_frame(results)
+
+def mask_scan_rerun(df, rows):
+    for candidate_id in rows:
+        name, email = df.at[candidate_id, "name"], df.at[candidate_id, "email"]
+        mask = (df["name"] == name) & (df["email"] == email)
+        if mask.any():
+            df.at[df[mask].index[0], "recruiter_notes"] = "note"
+
+def indexed_rerun(df, rows):
+    for candidate_id in rows:
+        update_candidate(df, candidate_id, recruiter_notes="note")
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recruiter edit cost: mask scans vs indexed updates")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'mask scan, all cards':>22} {'mask scan, 1 edit':>18} {'indexed, 1 edit':>16} "
+          f"{'indexed, 1 page':>16}")
+    for n in args.sizes:
+        df = make_frame(n)
+        ids = list(df.index)
+        page = ids[:args.page_size]
+        # The old card loop ran once per candidate on every rerun; large sizes are sampled and extrapolated
+        sample = ids[:min(n, 500)]
+        all_cards = best_of(lambda: mask_scan_rerun(df, sample), args.repeat) * n / len(sample)
+        one_scan = best_of(lambda: mask_scan_rerun(df, ids[-1:]), args.repeat * 10)
+        one_indexed = best_of(lambda: indexed_rerun(df, ids[-1:]), args.repeat * 10)
+        one_page = best_of(lambda: indexed_rerun(df, page), args.repeat)
+        print(f"{n:>8} {all_cards * 1000:>19.1f} ms {one_scan * 1000:>15.3f} ms {one_indexed * 1000:>13.3f} ms "
+              f"{one_page * 1000:>13.3f} ms")
+
+if __name__ == "__main__":
+    main()
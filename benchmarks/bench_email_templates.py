@@ -0,0 +1,69 @@
+# bench_email_templates.py — Bulk email rendering: per-message formatting vs compiled batch templates
+#
+#   python benchmarks/bench_email_templates.py --candidates 5000
+#
+# The per-message path is what bulk sends did before: str.format on the raw template and an
+# HTML wrapper built for every candidate, with every MIME message built up front.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from constants import EMAIL_TEMPLATES  # noqa: E402
+from email_generator import build_email_message  # noqa: E402
+from email_templates import HTML_FOOTER, HTML_HEADER, format_highlights, get_email_template  # noqa: E402
+
+def candidates(count: int) -> pd.DataFrame:
+    return pd.DataFrame([{
+        "name": f"Candidate {i}",
+        "email": f"candidate{i}@example.com",
+        "highlights": ["Python and SQL", "Led a team of 4", "Shipped a data platform"]
+    } for i in range(count)])
+
+def per_message(df: pd.DataFrame, role: str, company_name: str):
+    template = EMAIL_TEMPLATES["shortlist"]
+    rendered = []
+    for _, row in df.iterrows():
+        subject = template["subject"].format(role=role)
+        body = template["body"].format(name=row["name"], role=role, company_name=company_name,
+                                       highlights=format_highlights(row["highlights"]))
+        html_body = HTML_HEADER + body.replace("\n", "<br>") + HTML_FOOTER
+        rendered.append((subject, body, html_body))
+    return rendered
+
+def timed(label: str, count: int, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {count / elapsed:10.0f} emails/s  ({elapsed * 1000:.1f} ms)")
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Email template rendering throughput")
+    parser.add_argument("--candidates", type=int, default=5000)
+    args = parser.parse_args()
+
+    df = candidates(args.candidates)
+    role, company_name = "Data Engineer", "Acme"
+    template = get_email_template("shortlist")
+
+    timed("per-message format", len(df), lambda: per_message(df, role, company_name))
+    rendered = timed("compiled batch render", len(df),
+                     lambda: template.render_batch(df, role=role, company_name=company_name))
+    timed("per-message format + eager MIME", len(df), lambda: [
+        build_email_message(to, subject, body, html_body=html_body)
+        for to, (subject, body, html_body) in zip(df["email"], per_message(df, role, company_name))
+    ])
+    timed("batch render + MIME at send time", len(df), lambda: [
+        build_email_message(to, email["subject"], email["body"], html_body=email["html"])
+        for to, email in zip(df["email"], template.render_batch(df, role=role, company_name=company_name))
+    ])
+    print(f"Sample subject: {rendered[0]['subject']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bench_imap_ingest.py — Gmail ingestion: full RFC822 fetch vs BODYSTRUCTURE + attachment parts,
+# serial vs pipelined backlog ingestion, and IDLE latency
+#
+#   python benchmarks/bench_imap_ingest.py --messages 500 --upload-ms 40 --deliveries 20
+#
+# Runs against the in-memory IMAP stand-in (benchmarks/imap_standin.py). Each message carries
+# a text body, an inline image and a PDF resume, as application emails typically do.
+# --upload-ms stands in for the blob upload round trip.
+
+import argparse
+import email
+import os
+import statistics
+import sys
+import threading
+import time
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from imap_ingest import IMAPMailbox, MailboxIngester, ingest_unseen  # noqa: E402
+from imap_standin import StandInIMAPServer  # noqa: E402
+
+def application_email(index: int, image_kb: int, resume_kb: int) -> bytes:
+    message = EmailMessage()
+    message["Subject"] = f"Application {index}"
+    message["From"] = f"candidate{index}@example.com"
+    message["To"] = "jobs@example.com"
+    message.set_content("Please find my resume attached.\n" * 20)
+    message.add_attachment(os.urandom(image_kb * 1024), maintype="image", subtype="png", filename="signature.png")
+    message.add_attachment(os.urandom(resume_kb * 1024), maintype="application", subtype="pdf",
+                           filename=f"resume_{index}.pdf")
+    return message.as_bytes()
+
+def full_message_sync(mailbox: IMAPMailbox, upload) -> int:
+    # The previous path: every unseen message downloaded whole with RFC822
+    fetched = 0
+    for uid in mailbox.unseen_uids():
+        _, data = mailbox.conn.uid("FETCH", uid, "(RFC822)")
+        raw = data[0][1]
+        fetched += len(raw)
+        for part in email.message_from_bytes(raw).walk():
+            filename = part.get_filename()
+            if part.get("Content-Disposition") and filename and filename.lower().endswith(".pdf"):
+                upload(filename, part.get_payload(decode=True))
+        mailbox.mark_seen([uid])
+    return fetched
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="IMAP ingestion throughput and latency")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--deliveries", type=int, default=20)
+    parser.add_argument("--image-kb", type=int, default=300)
+    parser.add_argument("--resume-kb", type=int, default=120)
+    parser.add_argument("--upload-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    server = StandInIMAPServer().start()
+    config = {"imap_host": "127.0.0.1", "imap_port": server.port, "imap_ssl": False, "idle_poll": 0.05}
+    uploads = []
+
+    def upload(name: str, payload: bytes):
+        time.sleep(args.upload_ms / 1000)
+        uploads.append((name, len(payload), time.perf_counter()))
+
+    try:
+        for index in range(args.messages):
+            server.deliver(application_email(index, args.image_kb, args.resume_kb))
+
+        mailbox = IMAPMailbox("bench", "bench", config).connect()
+        start = time.perf_counter()
+        fetched = full_message_sync(mailbox, upload)
+        elapsed = time.perf_counter() - start
+        print(f"{'RFC822 per message':<30} {args.messages / elapsed:8.1f} emails/s  {fetched / 1e6:8.1f} MB fetched")
+
+        # One message and one upload at a time, as before pipelining
+        serial = {"fetch_batch_size": 1, "upload_concurrency": 1, "batches_in_flight": 1}
+        for label, overrides in (("BODYSTRUCTURE + parts, serial", serial), ("pipelined", {})):
+            for message in server.mailbox.messages:
+                message["seen"] = False
+            mailbox.bytes_fetched = 0
+            start = time.perf_counter()
+            result = ingest_unseen(mailbox, upload, config={**config, **overrides})
+            elapsed = time.perf_counter() - start
+            print(f"{label:<30} {args.messages / elapsed:8.1f} emails/s  "
+                  f"{mailbox.bytes_fetched / 1e6:8.1f} MB fetched  ({result['files_uploaded']} resumes)")
+        mailbox.close()
+
+        # Time from delivery to upload while the ingester idles
+        uploads.clear()
+        arrived = threading.Event()
+        ingester = MailboxIngester(lambda: IMAPMailbox("bench", "bench", config),
+                                   lambda name, payload: (upload(name, payload), arrived.set()), config=config)
+        ingester.start()
+        time.sleep(0.5)
+        latencies = []
+        for index in range(args.deliveries):
+            arrived.clear()
+            delivered = time.perf_counter()
+            server.deliver(application_email(args.messages + index, args.image_kb, args.resume_kb))
+            arrived.wait(10)
+            latencies.append((uploads[-1][2] - delivered) * 1000)
+        server.drop_connections()
+        arrived.clear()
+        delivered = time.perf_counter()
+        server.deliver(application_email(-1, args.image_kb, args.resume_kb))
+        arrived.wait(30)
+        reconnect_ms = (uploads[-1][2] - delivered) * 1000
+        ingester.stop()
+        print(f"IDLE delivery-to-upload: median {statistics.median(latencies):.0f} ms, "
+              f"max {max(latencies):.0f} ms over {len(latencies)} emails "
+              f"(after a dropped session: {reconnect_ms:.0f} ms, {ingester.stats['reconnects']} reconnects)")
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# bench_near_duplicates.py — Near-duplicate resume clustering: all-pairs MinHash vs the LSH index
+#
+#   python benchmarks/bench_near_duplicates.py --resumes 2000 --versions 3 --edit-rate 0.02
+#
+# Builds a synthetic pool where every CV arrives in several lightly edited versions (a few
+# words changed, a line added), then reports clustering time and how many versions are linked
+# to their original. Distinct CVs share a realistic vocabulary, so false links are reported too.
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import NearDuplicateIndex, estimate_similarity  # noqa: E402
+
+VOCABULARY = [f"term{i}" for i in range(3000)]
+PHRASES = ["python", "sql", "azure", "spark", "led a team", "delivered", "data pipelines", "stakeholders",
+           "senior engineer", "bachelor of technology", "machine learning", "dashboards", "agile"]
+
+def resume(rng: random.Random, words: int) -> list:
+    return [rng.choice(PHRASES) if rng.random() < 0.3 else rng.choice(VOCABULARY) for _ in range(words)]
+
+def edited(rng: random.Random, words: list, edit_rate: float) -> list:
+    version = [rng.choice(VOCABULARY) if rng.random() < edit_rate else word for word in words]
+    position = rng.randrange(len(version))
+    return version[:position] + ["updated", "phone", "and", "current", "role"] + version[position:]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Near-duplicate clustering speed and accuracy")
+    parser.add_argument("--resumes", type=int, default=2000, help="distinct CVs")
+    parser.add_argument("--versions", type=int, default=3, help="versions of each CV")
+    parser.add_argument("--words", type=int, default=600)
+    parser.add_argument("--edit-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    pool = []
+    for owner in range(args.resumes):
+        original = resume(rng, args.words)
+        pool.append((owner, " ".join(original)))
+        pool.extend((owner, " ".join(edited(rng, original, args.edit_rate))) for _ in range(args.versions - 1))
+    rng.shuffle(pool)
+
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    signatures = [index.signature(text) for _, text in pool]
+    signing = time.perf_counter() - start
+
+    start = time.perf_counter()
+    links = {}
+    for key, signature in enumerate(signatures):
+        match = index.find_or_add(key, signature)
+        if match:
+            links[key] = match[0]
+    lsh_time = time.perf_counter() - start
+
+    # All-pairs: each resume compared with every representative so far
+    sample = min(len(signatures), 3000)
+    start = time.perf_counter()
+    representatives = []
+    for signature in signatures[:sample]:
+        if not any(estimate_similarity(signature, other) >= index.config["threshold"] for other in representatives):
+            representatives.append(signature)
+    pairwise_time = (time.perf_counter() - start) * (len(signatures) / sample) ** 2
+
+    correct = sum(pool[key][0] == pool[representative][0] for key, representative in links.items())
+    expected = len(pool) - args.resumes
+    print(f"{len(pool)} resumes, {args.resumes} distinct CVs, {expected} edited versions")
+    print(f"{'MinHash signatures':<30} {len(pool) / signing:10.0f} resumes/s")
+    print(f"{'LSH clustering':<30} {lsh_time * 1000:10.1f} ms  ({len(index)} representatives)")
+    print(f"{'all-pairs (extrapolated)':<30} {pairwise_time * 1000:10.1f} ms")
+    print(f"linked {correct}/{expected} versions to their CV ({len(links) - correct} false links); "
+          f"{len(links)} fewer GPT evaluations")
+
+if __name__ == "__main__":
+    main()
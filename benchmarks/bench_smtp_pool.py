@@ -0,0 +1,99 @@
+# bench_smtp_pool.py — Bulk email throughput: connection per message vs pooled SMTP sessions
+#
+#   pip install aiosmtpd
+#   python benchmarks/bench_smtp_pool.py --messages 300 --handshake-ms 150
+#
+# Sends through a local aiosmtpd server. A real provider spends one or more round trips
+# on connect, EHLO, STARTTLS and AUTH before the first message; --handshake-ms delays
+# each EHLO to stand in for that cost (TLS and login are skipped locally).
+
+import argparse
+import asyncio
+import os
+import smtplib
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit("This benchmark needs aiosmtpd: pip install aiosmtpd")
+
+from email_generator import build_email_message  # noqa: E402
+from mail_transport import MailTransport, SMTPConnectionPool  # noqa: E402
+
+SENDER = "hr@example.com"
+
+class CountingHandler:
+    def __init__(self, handshake_delay: float):
+        self.handshake_delay = handshake_delay
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.handshake_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def messages(count: int):
+    return [(build_email_message(f"candidate{i}@example.com", "Application Status Update",
+                                 f"Dear Candidate {i},\n\nThank you for applying.\n\nBest regards"),
+             SENDER, f"candidate{i}@example.com") for i in range(count)]
+
+def per_message_connections(port: int, mails) -> None:
+    # The previous send_email: a new session for every message
+    for message, from_addr, to_addr in mails:
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.sendmail(from_addr, to_addr, message.as_string())
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pooled SMTP throughput")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--handshake-ms", type=float, default=150.0)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--baseline-messages", type=int, default=50,
+                        help="Messages sent on the slow per-connection path (extrapolated)")
+    args = parser.parse_args()
+
+    handler = CountingHandler(args.handshake_ms / 1000)
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        baseline = messages(min(args.baseline_messages, args.messages))
+        start = time.perf_counter()
+        per_message_connections(port, baseline)
+        elapsed = time.perf_counter() - start
+        rate = len(baseline) / elapsed
+        print(f"{'connection per message':<28} {rate:8.1f} msg/s  "
+              f"(~{args.messages / rate:.1f}s for {args.messages})")
+
+        for size in args.pool_sizes:
+            config = {"pool_size": size, "send_concurrency": size, "max_per_minute": 0}
+            pool = SMTPConnectionPool("127.0.0.1", port, use_tls=False, config=config)
+            transport = MailTransport(pool, config)
+            mails = messages(args.messages)
+            start = time.perf_counter()
+            errors = transport.send_many(mails)
+            elapsed = time.perf_counter() - start
+            transport.close()
+            failed = sum(error is not None for error in errors)
+            print(f"{f'pool of {size}':<28} {args.messages / elapsed:8.1f} msg/s  ({elapsed:.1f}s, "
+                  f"{pool.stats['connections_opened']} sessions, {failed} failed)")
+        print(f"Server received {handler.received} messages")
+    finally:
+        controller.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_summary_pdfs.py — Bulk summary PDF throughput (PDFs per second)
+#
+#   python benchmarks/bench_summary_pdfs.py --candidates 500 --workers 1 2 4
+#
+# Compares rebuilding the ReportLab styles for every PDF (the old per-click path) with
+# shared styles and static furniture, times bulk ZIP and merged-PDF bundles at each
+# worker count from a cold cache, then regenerates with 10% of the notes edited.
+# Uploads are not included; they overlap with rendering in the app.
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_utils  # noqa: E402
+from pdf_utils import generate_summary_bundle, PYMUPDF_AVAILABLE  # noqa: E402
+
+def synthetic_candidates(count: int):
+    verdicts = ["shortlist", "review", "reject"]
+    return [{
+        "name": f"Candidate {i}",
+        "email": f"candidate{i}@example.com",
+        "phone": "+1 555 0100",
+        "jd_role": "Data Scientist",
+        "score": 40 + i % 60,
+        "verdict": verdicts[i % 3],
+        "jd_similarity": 70, "skills_match": 65, "domain_match": 55, "experience_match": 80,
+        "fitment": "Strong analytical background with production ML experience. " * 3,
+        "summary_5_lines": "Seven years building data products across retail and finance. " * 5,
+        "highlights": [f"Highlight {n}" for n in range(6)],
+        "red_flags": [f"Concern {n}" for n in range(i % 4)],
+        "missing_gaps": ["No certification listed"],
+        "reasons_if_rejected": ["Limited domain exposure", "Short tenures"],
+        "recommendation": "Proceed to a technical screen focused on system design.",
+        "recruiter_notes": "Referred by the analytics team." if i % 5 == 0 else ""
+    } for i in range(count)]
+
+def rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:8.1f} PDFs/s  ({seconds:.2f}s)"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk summary PDF throughput")
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    candidates = synthetic_candidates(args.candidates)
+    print(f"{args.candidates} candidates, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    for candidate in candidates:
+        pdf_utils._summary_styles = None  # Styles and furniture rebuilt per PDF, as before
+        pdf_utils._static_flowables = None
+        pdf_utils._render_summary_pdf(candidate)
+    print(f"{'per-PDF styles, serial':<32} {rate(len(candidates), time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    for candidate in candidates:
+        pdf_utils._render_summary_pdf(candidate)
+    print(f"{'shared styles, serial':<32} {rate(len(candidates), time.perf_counter() - start)}")
+
+    formats = ["zip"] + (["pdf"] if PYMUPDF_AVAILABLE else [])
+    for fmt in formats:
+        for workers in args.workers:
+            pdf_utils._pdf_cache.clear()
+            sink = io.BytesIO()
+            start = time.perf_counter()
+            generate_summary_bundle(candidates, sink, fmt, workers=workers)
+            elapsed = time.perf_counter() - start
+            label = f"{fmt} bundle, {workers} worker{'s' if workers > 1 else ''}"
+            print(f"{label:<32} {rate(len(candidates), elapsed)}  {len(sink.getvalue()) / 1e6:.1f} MB")
+
+    # Regenerate after recruiters edit a few notes: only the edited candidates are laid out
+    for candidate in candidates[::10]:
+        candidate["recruiter_notes"] = "Updated after phone screen."
+    start = time.perf_counter()
+    generate_summary_bundle(candidates, io.BytesIO(), "zip", workers=1)
+    print(f"{'zip bundle, 10% changed':<32} {rate(len(candidates), time.perf_counter() - start)}")
+
+if __name__ == "__main__":
+    main()
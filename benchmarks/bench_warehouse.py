@@ -0,0 +1,100 @@
+# bench_warehouse.py — Cross-run query latency of the results warehouse at scale
+#
+#   python benchmarks/bench_warehouse.py --rows 1000000 --db /tmp/warehouse_bench.sqlite3
+#
+# Fills a fresh warehouse with synthetic runs spread over the last year, then times the
+# dashboard and cross-run queries (best of --repeat).
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from warehouse import ResultsWarehouse  # noqa: E402
+
+ROLES = ["Data Scientist", "Backend Engineer", "Frontend Engineer", "DevOps Engineer", "Product Manager"]
+SKILLS = ["python", "java", "sql", "aws", "docker", "kubernetes", "react", "azure", "git", "linux"]
+VERDICT_NAMES = np.array(["shortlist", "review", "reject"])
+
+def synthetic_run(rng: np.random.Generator, run_index: int, size: int) -> pd.DataFrame:
+    score = rng.uniform(0, 100, size).round(2)
+    verdict = np.where(score >= 75, 0, np.where(score < 40, 2, 1))
+    ids = [f"{run_index:06d}{i:08d}" for i in range(size)]
+    return pd.DataFrame({
+        "candidate_id": ids,
+        "name": [f"Candidate {i}" for i in ids],
+        "email": [f"c{i}@example.com" for i in ids],
+        "resume_file": [f"resume_{i}.pdf" for i in ids],
+        "score": score,
+        "jd_similarity": rng.uniform(40, 100, size).round(2),
+        "skills_match": rng.integers(0, 101, size),
+        "domain_match": rng.integers(0, 101, size),
+        "experience_match": rng.integers(0, 101, size),
+        "verdict": VERDICT_NAMES[verdict],
+        "auto_verdict": VERDICT_NAMES[verdict],
+        "fraud_detected": rng.random(size) < 0.02,
+        "analysis_failed": False,
+        "resume_skills": [list(rng.choice(SKILLS, 3, replace=False)) for _ in range(size)],
+    }).set_index("candidate_id")
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Results warehouse query latency")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--run-size", type=int, default=5000)
+    parser.add_argument("--db", default="warehouse_bench.sqlite3")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    warehouse = ResultsWarehouse(args.db)
+    rng = np.random.default_rng(0)
+    now = time.time()
+
+    runs = max(1, args.rows // args.run_size)
+    start = time.perf_counter()
+    for run_index in range(runs):
+        warehouse.record_run(
+            f"run{run_index:06d}", synthetic_run(rng, run_index, args.run_size),
+            role=ROLES[run_index % len(ROLES)], jd_hash=f"jd{run_index % 50}",
+            screened_at=now - (runs - run_index) / runs * 365 * 86400
+        )
+    load_time = time.perf_counter() - start
+    print(f"Loaded {runs * args.run_size:,} candidates in {runs} runs: {load_time:.1f}s "
+          f"({runs * args.run_size / load_time:,.0f} rows/s)")
+
+    last_run = f"run{runs - 1:06d}"
+    queries = {
+        "shortlisted python, last 90 days": lambda: warehouse.find_candidates("shortlist", "python", since_days=90),
+        "shortlisted, last 90 days": lambda: warehouse.find_candidates("shortlist", since_days=90),
+        "score drift per role (weekly, 1 year)": lambda: warehouse.score_drift(period="week"),
+        "score drift, one role (monthly)": lambda: warehouse.score_drift(role=ROLES[0], period="month"),
+        "run overview (dashboard)": lambda: warehouse.run_overview(last_run, 75, 40),
+        "run candidates, score 50-80": lambda: warehouse.run_candidates(last_run, min_score=50, max_score=80),
+        "candidate history": lambda: warehouse.candidate_history(f"{runs - 1:06d}{0:08d}"),
+    }
+    for name, query in queries.items():
+        rows = len(query()) if not name.startswith("run overview") else 1
+        print(f"{name:<40} {best_of(query, args.repeat) * 1000:8.1f} ms  ({rows} rows)")
+
+    start = time.perf_counter()
+    frame = warehouse.run_candidates(last_run).head(100)
+    warehouse.update_candidates(last_run, frame.index, ["shortlist"] * len(frame), frame["score"].to_numpy())
+    print(f"{'update 100 verdicts + rollup':<40} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# imap_standin.py — Minimal in-memory IMAP server for exercising imap_ingest.py locally
+#
+# Speaks just enough IMAP4rev1 for the ingester: LOGIN, SELECT, UID SEARCH, UID FETCH
+# (UID, FLAGS, BODYSTRUCTURE, RFC822, BODY[...] and BODY.PEEK[...]), UID STORE, NOOP,
+# LOGOUT and IDLE. Messages delivered while a client idles are announced with EXISTS.
+#
+#   server = StandInIMAPServer().start()
+#   server.deliver(message_bytes)
+#   config = {"imap_host": "127.0.0.1", "imap_port": server.port, "imap_ssl": False}
+
+import email
+import re
+import select
+import socketserver
+import threading
+from email.message import Message
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+NEWLINE = b"\n"
+FETCH_ITEM = re.compile(r"BODY(?:\.PEEK)?\[[^\]]*\]|[A-Z0-9.]+", re.IGNORECASE)
+
+def _quote(value: Optional[str]) -> str:
+    if value is None:
+        return "NIL"
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _param_list(pairs) -> str:
+    if not pairs:
+        return "NIL"
+    quoted = []
+    for key, value in pairs:
+        if isinstance(value, tuple):  # RFC 2231 parameter, sent on as KEY*
+            charset, language, text = value
+            key, value = f"{key}*", f"{charset or ''}'{language or ''}'{quote(text.encode('latin-1'), safe='')}"
+        quoted.append(f"{_quote(key)} {_quote(value)}")
+    return "(" + " ".join(quoted) + ")"
+
+def _leaf_content(part: Message) -> bytes:
+    payload = part.get_payload()
+    return payload.encode("utf-8") if isinstance(payload, str) else bytes(payload or b"")
+
+def bodystructure(part: Message) -> str:
+    maintype, subtype = part.get_content_maintype(), part.get_content_subtype()
+    if part.get_content_type() == "message/rfc822":
+        inner = part.get_payload()[0].as_bytes()
+        return (f'("MESSAGE" "RFC822" NIL NIL NIL "7BIT" {len(inner)} NIL '
+                f'{bodystructure(part.get_payload()[0])} {inner.count(NEWLINE)} NIL NIL NIL)')
+    if part.is_multipart():
+        return "(" + "".join(bodystructure(child) for child in part.get_payload()) + f' {_quote(subtype.upper())})'
+
+    body = _leaf_content(part)
+    params = _param_list([(key, value) for key, value in part.get_params()[1:]] if part.get_params() else [])
+    encoding = _quote(part.get("Content-Transfer-Encoding", "7bit").upper())
+    disposition = "NIL"
+    if part.get_content_disposition():
+        filename = part.get_param("filename", header="content-disposition")
+        disposition = (f"({_quote(part.get_content_disposition().upper())} "
+                       f"{_param_list([('FILENAME', filename)] if filename else [])})")
+    if maintype == "text":
+        return (f"({_quote(maintype.upper())} {_quote(subtype.upper())} {params} NIL NIL {encoding} "
+                f"{len(body)} {body.count(NEWLINE)} NIL {disposition} NIL)")
+    return (f"({_quote(maintype.upper())} {_quote(subtype.upper())} {params} NIL NIL {encoding} "
+            f"{len(body)} NIL {disposition} NIL)")
+
+def section_content(message: Message, section: str) -> bytes:
+    if section == "":
+        return message.as_bytes()
+    if section.upper().startswith("HEADER.FIELDS"):
+        names = section[section.index("(") + 1:section.rindex(")")].split()
+        lines = [f"{name}: {message[name]}\r\n" for name in names if message[name] is not None]
+        return ("".join(lines) + "\r\n").encode("utf-8")
+    part = message
+    for number in section.split("."):
+        if part.get_content_type() == "message/rfc822":
+            part = part.get_payload()[0]
+            if not part.is_multipart():
+                continue  # N.1 of an attached single-part message is its body
+        part = part.get_payload()[int(number) - 1]
+    return _leaf_content(part)
+
+class StandInMailbox:
+    def __init__(self):
+        self.messages: List[Dict] = []
+        self.next_uid = 1
+        self.changed = threading.Condition()
+
+    def deliver(self, raw: bytes) -> int:
+        with self.changed:
+            uid = self.next_uid
+            self.next_uid += 1
+            self.messages.append({"uid": uid, "raw": raw, "message": email.message_from_bytes(raw), "seen": False})
+            self.changed.notify_all()
+            return uid
+
+    def select(self, uid_set: str) -> List[Dict]:
+        wanted = set()
+        top = self.next_uid - 1
+        for piece in uid_set.split(","):
+            if ":" in piece:
+                low, high = (top if value == "*" else int(value) for value in piece.split(":"))
+                wanted.update(range(min(low, high), max(low, high) + 1))
+            else:
+                wanted.add(top if piece == "*" else int(piece))
+        return [message for message in self.messages if message["uid"] in wanted]
+
+class IMAPHandler(socketserver.StreamRequestHandler):
+    def send_line(self, line: str):
+        self.wfile.write(line.encode("utf-8") + b"\r\n")
+
+    def handle(self):
+        self.server.connections.add(self.connection)
+        mailbox: StandInMailbox = self.server.mailbox
+        try:
+            self.send_line("* OK [CAPABILITY IMAP4rev1 IDLE] stand-in ready")
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                tag, _, rest = line.decode("utf-8").rstrip("\r\n").partition(" ")
+                command, _, args = rest.partition(" ")
+                command = command.upper()
+                if command == "UID":
+                    command, _, args = args.partition(" ")
+                    command = "UID " + command.upper()
+
+                if command == "CAPABILITY":
+                    self.send_line("* CAPABILITY IMAP4rev1 IDLE")
+                elif command in ("LOGIN", "NOOP"):
+                    pass
+                elif command == "SELECT":
+                    self.send_line(f"* {len(mailbox.messages)} EXISTS")
+                    self.send_line("* OK [UIDVALIDITY 1] UIDs valid")
+                    self.send_line(f"{tag} OK [READ-WRITE] SELECT completed")
+                    continue
+                elif command == "LOGOUT":
+                    self.send_line("* BYE logging out")
+                    self.send_line(f"{tag} OK LOGOUT completed")
+                    return
+                elif command == "UID SEARCH":
+                    with mailbox.changed:
+                        unseen_only = "UNSEEN" in args.upper()
+                        uids = [str(message["uid"]) for message in mailbox.messages
+                                if not (unseen_only and message["seen"])]
+                    self.send_line("* SEARCH" + "".join(f" {uid}" for uid in uids))
+                elif command == "UID FETCH":
+                    uid_set, _, items = args.partition(" ")
+                    self.fetch(mailbox, uid_set, items)
+                elif command == "UID STORE":
+                    uid_set, _, flags = args.partition(" ")
+                    with mailbox.changed:
+                        for message in mailbox.select(uid_set):
+                            if "\\SEEN" in flags.upper():
+                                message["seen"] = not flags.startswith("-")
+                elif command == "IDLE":
+                    if not self.idle(mailbox):
+                        return
+                else:
+                    self.send_line(f"{tag} BAD unknown command")
+                    continue
+                self.send_line(f"{tag} OK {command} completed")
+        except (ConnectionError, OSError, ValueError):
+            return
+        finally:
+            self.server.connections.discard(self.connection)
+
+    def fetch(self, mailbox: StandInMailbox, uid_set: str, items: str):
+        with mailbox.changed:
+            selected = {message["uid"] for message in mailbox.select(uid_set)}
+            messages = [(index + 1, message) for index, message in enumerate(mailbox.messages)
+                        if message["uid"] in selected]
+        for sequence, message in messages:
+            out = bytearray(f"* {sequence} FETCH (UID {message['uid']}".encode())
+            for item in FETCH_ITEM.findall(items.strip("()")):
+                name = item.upper()
+                if name == "UID":
+                    continue
+                if name == "FLAGS":
+                    out += b" FLAGS (\\Seen)" if message["seen"] else b" FLAGS ()"
+                elif name == "BODYSTRUCTURE":
+                    out += b" BODYSTRUCTURE " + bodystructure(message["message"]).encode("utf-8")
+                elif name in ("RFC822", "BODY[]", "BODY.PEEK[]"):
+                    out += f" {'RFC822' if name == 'RFC822' else 'BODY[]'} {{{len(message['raw'])}}}\r\n".encode()
+                    out += message["raw"]
+                    message["seen"] = message["seen"] or not name.startswith("BODY.PEEK")
+                elif name.startswith("BODY"):
+                    section = item[item.index("[") + 1:-1]
+                    content = section_content(message["message"], section)
+                    out += f" BODY[{section}] {{{len(content)}}}\r\n".encode() + content
+                    message["seen"] = message["seen"] or not name.startswith("BODY.PEEK")
+            self.wfile.write(bytes(out) + b")\r\n")
+
+    def idle(self, mailbox: StandInMailbox) -> bool:
+        self.send_line("+ idling")
+        with mailbox.changed:
+            announced = len(mailbox.messages)
+        while True:
+            with mailbox.changed:
+                mailbox.changed.wait_for(lambda: len(mailbox.messages) != announced, timeout=0.02)
+                count = len(mailbox.messages)
+            if count != announced:
+                announced = count
+                self.send_line(f"* {count} EXISTS")
+            ready, _, _ = select.select([self.connection], [], [], 0)
+            if ready:
+                line = self.rfile.readline()
+                if not line:
+                    return False
+                return line.strip().upper() == b"DONE"
+
+class StandInIMAPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), IMAPHandler)
+        self.mailbox = StandInMailbox()
+        self.connections = set()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "StandInIMAPServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.drop_connections()
+        self.server_close()
+
+    def deliver(self, raw: bytes) -> int:
+        return self.mailbox.deliver(raw)
+
+    def drop_connections(self):
+        """Cut every client session, as a server restart or network blip would"""
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(2)
+            except OSError:
+                pass
@@ -13,6 +13,27 @@ AZURE_CONFIG = {
     "csv_container": "csvdata"
 }
 
+# Local Storage - Durable state kept next to the app (journals, queues, indexes)
+DATA_DIR = os.getenv("SCREENER_DATA_DIR", "data")
+
+STORAGE_CONFIG = {
+    "data_dir": DATA_DIR,
+    "run_journal_path": os.path.join(DATA_DIR, "run_journal.sqlite3"),
+    "task_queue_path": os.path.join(DATA_DIR, "task_queue.sqlite3"),
+    "warehouse_path": os.path.join(DATA_DIR, "warehouse.sqlite3"),  # Historical results across runs
+    "email_outbox_path": os.path.join(DATA_DIR, "email_outbox.sqlite3"),  # Queued and sent candidate emails
+    "resume_index_path": os.path.join(DATA_DIR, "resume_index.sqlite3")  # Dedupe index of stored resumes
+}
+
+# Resume Blob Layout - resumes are stored as <source>/<YYYY>/<MM>/<DD>/<sha256 prefix>_<name>
+RESUME_BLOB_CONFIG = {
+    "sources": ("gmail", "upload"),  # Top-level prefixes written by ingestion
+    "index_tags": os.getenv("BLOB_INDEX_TAGS", "0") == "1",  # Opt-in: needs blob index tags (not on HNS accounts)
+    "window_days": int(os.getenv("RESUME_WINDOW_DAYS", "0")),  # Default listing window; 0 lists the whole container
+    "max_day_prefixes": 31,  # Longer windows are listed by month prefix instead of by day
+    "refresh_after_days": int(os.getenv("RESUME_REFRESH_DAYS", "7"))  # Re-sent CVs stored longer ago move to today's partition; 0 never
+}
+
 # Model Configuration - Optimized for performance
 MODEL_CONFIG = {
     "fast_gpt_model": "gpt-35-turbo",           # For role extraction (faster)
@@ -20,6 +41,15 @@ MODEL_CONFIG = {
     "embedding_model": "text-embedding-ada-002" # For similarity calculations
 }
 
+# Tiered Model Routing - Score everyone with the fast model, escalate borderline cases
+MODEL_ROUTING_CONFIG = {
+    "enable_tiered_routing": True,          # Use fast model first, deep model only when needed
+    "uncertainty_band": 8.0,                # +/- points around shortlist/reject thresholds
+    "escalate_on_validation_failure": True, # Re-run on deep model if fast output is malformed
+    "escalate_on_error": True,              # Re-run on deep model if the fast call fails
+    "max_tokens": 1000                      # Completion budget per evaluation call
+}
+
 # Enhanced Scoring Weights - Fine-tuned for better results
 WEIGHTS = {
     "jd_similarity": 0.35,      # Slightly reduced for more balanced scoring
@@ -46,7 +76,120 @@ PERFORMANCE_CONFIG = {
     "batch_size": 5,             # Process 5 resumes concurrently
     "request_timeout": 30.0,     # Timeout for GPT requests
     "max_retries": 3,            # Retry failed requests
-    "rate_limit_delay": 0.5      # Delay between batches (seconds)
+    "rate_limit_delay": 0.5,     # Delay between batches (seconds)
+    "jd_cache_size": 128,        # Max preprocessed JDs kept in memory (LRU)
+    "pipeline_concurrency": 10,  # Resumes parsed/evaluated at once by the screening pipeline
+    "blob_transfer_concurrency": 4,       # Parallel block transfers per blob upload/download
+    "spool_max_bytes": 8 * 1024 * 1024,   # Exports larger than this are spooled to disk before upload
+    "pdf_workers": min(4, os.cpu_count() or 1),  # Processes rendering bulk summary PDFs
+    "pdf_pool_min_batch": 8,     # Smaller batches are rendered in-process (pool startup costs more)
+    "pdf_cache_size": 512,       # Rendered summary PDFs kept in memory, keyed by their field hash
+    "summary_upload_concurrency": 8       # Summary PDFs uploaded at once during bulk generation
+}
+
+# Request Scheduler - Deadlines and hedged requests for GPT tail latency
+REQUEST_SCHEDULER_CONFIG = {
+    "enable_hedging": True,
+    "hedge_percentile": 95,      # Hedge a call once it runs longer than this latency percentile
+    "min_hedge_delay": 2.0,      # Never hedge earlier than this (seconds)
+    "min_latency_samples": 10,   # Samples needed before the percentile is trusted
+    "latency_window": 200,       # Rolling window of recent latencies per model
+    "max_hedge_ratio": 0.1,      # At most 10% extra requests from hedging
+    "per_call_timeout": 25.0,    # Upper bound for a single completion (seconds)
+    "run_deadline": None,        # Optional wall-clock budget for a whole run (seconds); None = no run budget
+    "per_resume_deadline": None, # Alternatively, seconds per resume per concurrent slot, scaled to the batch
+    "client_max_retries": 1      # SDK retries per call; hedging replaces the long retry ladder
+}
+
+# HTTP Screening Service - Job queue and worker pool (service.py)
+SERVICE_CONFIG = {
+    "workers": int(os.getenv("SCREENER_WORKERS", "2")),  # Jobs processed concurrently per service process
+    "lease_seconds": 120.0,      # A job is handed to another worker if not heartbeated within this
+    "heartbeat_interval": 20.0,  # Seconds between lease renewals while a job runs
+    "max_attempts": 3,           # Job attempts before it is marked failed
+    "poll_interval": 1.0,        # Idle worker sleep between queue polls (seconds)
+    "default_page_size": 50,
+    "max_page_size": 200,
+    "cors_origins": os.getenv("SCREENER_CORS_ORIGINS", "http://localhost:3000").split(",")
+}
+
+# Distributed Mode - Coordinator shards blob names; worker nodes lease shards from a shared broker
+DISTRIBUTED_CONFIG = {
+    "broker_path": os.getenv("SCREENER_BROKER_PATH", STORAGE_CONFIG["task_queue_path"]),  # On a shared volume
+    "journal_path": os.getenv("SCREENER_JOURNAL_PATH", STORAGE_CONFIG["run_journal_path"]),  # Shard results; shared too
+    "shard_size": 25,            # Resumes per shard task
+    "workers": int(os.getenv("SCREENER_WORKERS", "2")),  # Shards processed concurrently per node
+    "lease_seconds": 120.0,
+    "heartbeat_interval": 20.0,
+    "max_attempts": 3,
+    "poll_interval": 2.0
+}
+
+# Outgoing Mail - Pooled SMTP sessions shared by single and bulk sends (mail_transport.py)
+MAIL_TRANSPORT_CONFIG = {
+    "pool_size": 4,              # Authenticated SMTP sessions kept open
+    "send_concurrency": 4,       # Messages in flight at once during bulk sends
+    "max_per_minute": int(os.getenv("SMTP_MAX_PER_MINUTE", "60")),  # Provider send limit (0 = unlimited)
+    "max_messages_per_connection": 100,  # Providers cap messages per session; reconnect before that
+    "idle_check_seconds": 30.0,  # NOOP-check a session idle longer than this before reusing it
+    "timeout": 30.0              # Socket timeout for connect and each SMTP command
+}
+
+# Email Outbox - Durable queue drained by a background dispatcher (email_outbox.py)
+EMAIL_OUTBOX_CONFIG = {
+    "max_attempts": 5,           # Sends tried before a message is marked failed
+    "backoff_base": 30.0,        # Seconds before the first retry; doubles per attempt
+    "backoff_max": 1800.0,       # Upper bound on the retry delay (seconds)
+    "claim_batch_size": 50,      # Due messages claimed per dispatcher pass
+    "lease_seconds": 300.0,      # A claimed message becomes due again if not confirmed within this
+    "poll_interval": 2.0         # Idle dispatcher sleep between outbox polls (seconds)
+}
+
+# Mail Ingestion - Resume attachments pushed from the Gmail inbox over IMAP IDLE (imap_ingest.py)
+MAIL_INGEST_CONFIG = {
+    "imap_host": os.getenv("IMAP_HOST", "imap.gmail.com"),
+    "imap_port": int(os.getenv("IMAP_PORT", "993")),
+    "imap_ssl": os.getenv("IMAP_SSL", "1") != "0",  # Plain IMAP only for a local stand-in server
+    "mailbox": "inbox",
+    "use_idle": os.getenv("IMAP_USE_IDLE", "1") != "0",  # Keep a session in IDLE; otherwise sync once at startup
+    "idle_timeout": 25 * 60.0,   # Re-issue IDLE before servers drop it (RFC 2177: at most 29 minutes)
+    "idle_poll": 1.0,            # How often an idling session checks for stop and manual-sync requests
+    "poll_interval": 60.0,       # Check interval for servers without IDLE (seconds)
+    "reconnect_base": 2.0,       # Seconds before the first reconnect; doubles per failed attempt
+    "reconnect_max": 300.0,      # Upper bound on the reconnect delay (seconds)
+    "timeout": 60.0,             # Socket timeout for IMAP commands outside IDLE
+    "fetch_batch_size": 100,     # Messages per BODYSTRUCTURE UID FETCH
+    "fetch_max_bytes": 8 * 1024 * 1024,  # Expected attachment bytes per parts UID FETCH
+    "upload_concurrency": 8,     # Attachments decoded and uploaded at once
+    "batches_in_flight": 2,      # Fetched batches held in memory while uploads catch up
+    "max_message_attempts": 5,   # Syncs a message may fail before it is set aside (marked seen and flagged)
+    "failed_keyword": "$ResumeIngestFailed",  # IMAP keyword on set-aside messages; search for it to review them
+    "supported_extensions": (".pdf", ".docx", ".doc")
+}
+
+# Resilience - Circuit breaker and bulkhead settings per external dependency
+RESILIENCE_CONFIG = {
+    "azure_openai_chat": {
+        "failure_threshold": 5,      # Consecutive failures before the circuit opens
+        "recovery_timeout": 30.0,    # Seconds to stay open before half-open probing
+        "half_open_max_calls": 1,    # Concurrent probe calls allowed while half-open
+        "max_concurrent": 10,        # Bulkhead size
+        "max_wait": 30.0             # Max seconds to wait for a bulkhead slot
+    },
+    "azure_openai_embeddings": {
+        "failure_threshold": 5,
+        "recovery_timeout": 30.0,
+        "half_open_max_calls": 1,
+        "max_concurrent": 4,
+        "max_wait": 30.0
+    },
+    "azure_blob": {
+        "failure_threshold": 5,
+        "recovery_timeout": 20.0,
+        "half_open_max_calls": 1,
+        "max_concurrent": 8,
+        "max_wait": 60.0
+    }
 }
 
 # Enhanced GPT Prompt - Optimized for consistency and speed
@@ -142,9 +285,131 @@ We wish you success in your career endeavors.
 
 Best regards,
 {company_name} Recruitment Team"""
+    },
+    
+    # Sent from the Rejected tab's bulk action
+    "rejection_notice": {
+        "subject": "Application Status Update - {role}",
+        "body": """Dear {name},
+
+Thank you for your interest in our {role} position. After careful consideration, we have decided not to proceed with your application at this time.
+
+We appreciate the time you invested in the application process and wish you success in your future endeavors.
+
+Best regards,
+EAZYAI Recruitment Team"""
+    },
+    
+    "rejection_feedback": {
+        "subject": "Application Status Update - {role} Position",
+        "body": """Dear {name},
+
+Thank you for your interest in the {role} position and for taking the time to apply.
+
+After careful consideration of all applications, we have decided not to proceed with your candidacy for this specific role. This decision was difficult given the quality of applications we received.
+{feedback_section}
+
+We encourage you to continue developing your skills and to apply for future opportunities that may be a better match for your background.
+
+We will keep your resume on file for future openings that may align with your experience.
+
+Thank you again for considering us, and we wish you all the best in your career journey.
+
+Best regards,
+Recruitment Team
+
+---
+If you have any questions about this decision, please feel free to reach out."""
+    },
+    
+    "interview_invitation": {
+        "subject": "Interview Invitation - {role} Position",
+        "body": """Dear {name},
+
+Congratulations! We are pleased to invite you for an interview for the {role} position.
+
+Interview Details:
+• Date: {date}
+• Time: {time}
+• Duration: {duration}
+• Format: {format}
+• Location: {location}
+
+Please confirm your availability by replying to this email within 24 hours.
+
+What to expect:
+• Technical discussion about your experience
+• Questions about the role and our company
+• Opportunity for you to ask questions
+
+Please bring:
+• Updated resume
+• Portfolio (if applicable)
+• Valid ID
+
+If you need to reschedule, please let us know as soon as possible.
+
+We look forward to meeting you!
+
+Best regards,
+Recruitment Team"""
+    },
+    
+    "follow_up": {
+        "subject": "Application Status Update - {role} Position",
+        "body": """Dear {name},
+
+Thank you for your interest in the {role} position and for your patience during our review process.
+
+We wanted to provide you with an update on your application status:
+
+Your application is currently under review by our hiring team. We have received a high volume of applications for this position, and we are carefully evaluating each candidate to ensure we make the best hiring decision.
+
+What happens next:
+• Our team will complete the initial review within the next 3-5 business days
+• Qualified candidates will be contacted for the next stage of the process
+• All applicants will be notified of their status regardless of the outcome
+
+We appreciate your continued interest in our organization and will be in touch soon with an update.
+
+If you have any questions in the meantime, please don't hesitate to reach out.
+
+Best regards,
+Recruitment Team
+
+---
+Application submitted: {days_since_application} days ago
+Current status: Under Review"""
+    },
+    
+    "missing_info": {
+        "subject": "Additional Information Required - {role} Application",
+        "body": """Dear {name},
+
+Thank you for your application for the {role} position.
+
+To complete our review of your application, we need some additional information:
+
+{missing_list}
+
+Please provide the missing information at your earliest convenience by replying to this email.
+
+If you have any questions, please don't hesitate to contact us.
+
+Best regards,
+Recruitment Team"""
     }
 }
 
+# Interview details not yet fixed when an invitation is sent
+INTERVIEW_DETAIL_DEFAULTS = {
+    "date": "To be confirmed",
+    "time": "To be confirmed",
+    "duration": "45-60 minutes",
+    "format": "In-person/Video call",
+    "location": "To be confirmed"
+}
+
 # Fraud Detection Patterns
 FRAUD_PATTERNS = {
     "suspicious_keywords": [
@@ -173,6 +438,15 @@ QUALITY_CONTROL = {
     "suspicious_score_threshold": 95  # Flag perfect scores as suspicious
 }
 
+# Near-Duplicate Resume Detection (MinHash/LSH across the resumes of a run)
+NEAR_DUPLICATE_CONFIG = {
+    "enabled": True,
+    "shingle_size": 3,       # Words per shingle
+    "num_perm": 128,         # MinHash signature length
+    "bands": 32,             # LSH bands of num_perm / bands rows; pairs at the threshold are found >99.9% of the time
+    "threshold": 0.7         # Estimated Jaccard similarity of shingles at which resumes are linked
+}
+
 # Analytics Configuration
 ANALYTICS_CONFIG = {
     "score_bins": [0, 20, 40, 60, 80, 100],
@@ -0,0 +1,161 @@
+# distributed.py — Multi-node screening: a coordinator shards blob names onto a shared broker,
+# worker nodes lease shards with heartbeats, and finished shards are merged into one DataFrame
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from constants import DISTRIBUTED_CONFIG
+from pipeline import list_resume_blob_names, build_results_frame
+from run_journal import RunJournal
+from task_queue import TaskQueue, QUEUED, LEASED, DONE, FAILED
+from workers import ScreeningWorkerPool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DISTRIBUTED_QUEUE = "distributed"
+
+def get_broker(config: Optional[Dict[str, Any]] = None) -> TaskQueue:
+    """Shard queue on the shared broker database (SQLite on a shared volume)"""
+    config = {**DISTRIBUTED_CONFIG, **(config or {})}
+    return TaskQueue(DISTRIBUTED_QUEUE, db_path=config["broker_path"])
+
+def get_shared_journal(config: Optional[Dict[str, Any]] = None) -> RunJournal:
+    """Run journal the shard workers write and the coordinator merges from (shared volume)"""
+    config = {**DISTRIBUTED_CONFIG, **(config or {})}
+    return RunJournal(config["journal_path"])
+
+class ShardWorkerPool(ScreeningWorkerPool):
+    """
+    Worker pool for shard tasks. A shard's task result is only its summary and run_id; its
+    candidates stay in the shared run journal, so polling the broker stays cheap.
+    """
+
+    def record(self, run: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        # A shard is only part of a job; the merged job is recorded once, at merge time
+        return None
+
+class Coordinator:
+    """Splits a screening job into shards of blob names and merges the finished shards"""
+
+    def __init__(self, broker: Optional[TaskQueue] = None, config: Optional[Dict[str, Any]] = None,
+                 journal: Optional[RunJournal] = None):
+        self.config = {**DISTRIBUTED_CONFIG, **(config or {})}
+        self.broker = broker or get_broker(self.config)
+        self.journal = journal or get_shared_journal(self.config)
+
+    def submit(self, jd: str, blob_names: Optional[List[str]] = None, shard_size: Optional[int] = None,
+               role: Optional[str] = None, domain: str = "", skills: str = "", experience_range: str = "",
+               thresholds: Optional[Dict[str, float]] = None, top_n: int = 0, since: Optional[date] = None) -> str:
+        """Enqueue one shard task per slice of blob names (by default those received since `since`); returns the job id"""
+        if blob_names is None:
+            blob_names = list_resume_blob_names(since=since)
+        if not blob_names:
+            raise ValueError("No resume blobs to screen")
+
+        shard_size = max(1, shard_size or self.config["shard_size"])
+        job_id = uuid.uuid4().hex[:12]
+        base = {
+            "jd": jd, "source": "blob", "role": role, "domain": domain, "skills": skills,
+            "experience_range": experience_range, "thresholds": thresholds or {},
+            # Top-N is a global ranking, so it is applied once at merge time rather than per shard
+            "top_n": top_n, "job_id": job_id
+        }
+        payloads = [
+            {**base, "blob_names": blob_names[start:start + shard_size], "shard_index": index}
+            for index, start in enumerate(range(0, len(blob_names), shard_size))
+        ]
+        self.broker.enqueue_many(payloads, max_attempts=self.config["max_attempts"], group_id=job_id)
+        logger.info(f"Job {job_id}: {len(blob_names)} resumes in {len(payloads)} shards")
+        return job_id
+
+    def _shards(self, job_id: str) -> List[Dict[str, Any]]:
+        # Page through the group; list_tasks caps each page
+        shards, offset, page = [], 0, 500
+        while True:
+            batch = self.broker.list_tasks(limit=page, offset=offset, group_id=job_id)
+            shards.extend(batch)
+            if len(batch) < page:
+                return shards
+            offset += page
+
+    def job_payload(self, job_id: str) -> Dict[str, Any]:
+        """Job parameters (JD, role, thresholds), shared by every shard"""
+        shards = self.broker.list_tasks(limit=1, group_id=job_id)
+        return shards[0]["payload"] if shards else {}
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        shards = self._shards(job_id)
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        resumes_total = resumes_done = 0
+        for shard in shards:
+            counts[shard["status"]] = counts.get(shard["status"], 0) + 1
+            resumes_total += len(shard["payload"]["blob_names"])
+            if shard["status"] == DONE:
+                resumes_done += len(shard["payload"]["blob_names"])
+            elif shard["progress"]:
+                resumes_done += shard["progress"].get("done", 0)
+        return {
+            "job_id": job_id,
+            "shards": counts,
+            "total_shards": len(shards),
+            "resumes_total": resumes_total,
+            "resumes_done": resumes_done,
+            "finished": bool(shards) and counts[QUEUED] == 0 and counts[LEASED] == 0
+        }
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: Optional[float] = None) -> Dict[str, Any]:
+        """Block until every shard is done or failed (or the timeout passes)"""
+        poll_interval = poll_interval or self.config["poll_interval"]
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            status = self.status(job_id)
+            if status["finished"] or (deadline and time.monotonic() >= deadline):
+                return status
+            time.sleep(poll_interval)
+
+    def merge_results(self, job_id: str) -> Optional[pd.DataFrame]:
+        """Merge finished shards into the DataFrame schema produced by build_results_frame"""
+        shards = self._shards(job_id)
+        if not shards:
+            return None
+
+        results, seen = [], set()
+        for shard in sorted(shards, key=lambda s: s["payload"].get("shard_index", 0)):
+            if shard["status"] != DONE:
+                if shard["status"] == FAILED:
+                    logger.warning(f"Job {job_id}: shard {shard['task_id']} failed - {shard['error']}")
+                continue
+            run_id = (shard["result"] or {}).get("run_id") or shard["task_id"]
+            # Fallback rows too: the shard counted them in its resumes_processed
+            for result in self.journal.load_results(run_id, include_retry=True):
+                # Guard against the same blob name being submitted twice
+                key = result.get("candidate_id") or result.get("resume_file")
+                if key in seen:
+                    continue
+                seen.add(key)
+                results.append(result)
+
+        if not results:
+            return None
+        payload = shards[0]["payload"]
+        return build_results_frame(results, payload.get("thresholds"), payload.get("top_n", 0))
+
+async def run_worker_node(workers: Optional[int] = None, config: Optional[Dict[str, Any]] = None,
+                          journal: Optional[RunJournal] = None) -> None:
+    """Run shard workers on this node until cancelled (Ctrl+C)"""
+    config = {**DISTRIBUTED_CONFIG, **(config or {})}
+    pool = ShardWorkerPool(get_broker(config), journal or get_shared_journal(config), workers or config["workers"],
+                           config)
+    pool.start()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await pool.stop()
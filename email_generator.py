@@ -5,9 +5,17 @@ import ssl
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from functools import partial
 from typing import Dict, List, Optional, Any
-from constants import EMAIL_TEMPLATES
+from constants import EMAIL_TEMPLATES, INTERVIEW_DETAIL_DEFAULTS
+from email_outbox import OutboxDispatcher, get_email_outbox
+from email_templates import format_highlights, get_email_template, html_document  # format_highlights kept importable from here
+from mail_transport import MailTransport, SMTPConnectionPool
+from utils import compute_content_hash, legacy_candidate_id
+from datetime import datetime
+import asyncio
 import os
+import threading
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -27,6 +35,44 @@ def validate_email(email: str) -> bool:
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email.strip()) is not None
 
+_mail_transport: Optional[MailTransport] = None
+
+def get_mail_transport() -> MailTransport:
+    """Process-wide pooled SMTP transport for the configured account"""
+    global _mail_transport
+    if _mail_transport is None:
+        _mail_transport = MailTransport(SMTPConnectionPool(
+            EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"],
+            EMAIL_CONFIG["smtp_user"], EMAIL_CONFIG["smtp_pass"]
+        ))
+    return _mail_transport
+
+def build_email_message(to_email: str, subject: str, body: str, from_email: Optional[str] = None,
+                        html_body: Optional[str] = None) -> MIMEMultipart:
+    """Plain text and HTML alternatives of a message body"""
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = from_email or EMAIL_CONFIG["hr_email"]
+    message["To"] = to_email
+    
+    # Create HTML and plain text versions; batch-rendered emails bring their HTML with them
+    text_part = MIMEText(body, "plain")
+    html_part = MIMEText(html_body or html_document(body), "html")
+    
+    message.attach(text_part)
+    message.attach(html_part)
+    return message
+
+def log_send_error(to_email: str, error: Exception):
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        logger.error(f"SMTP authentication failed: {str(error)}")
+    elif isinstance(error, smtplib.SMTPRecipientsRefused):
+        logger.error(f"Recipient email refused: {str(error)}")
+    elif isinstance(error, smtplib.SMTPException):
+        logger.error(f"SMTP error sending to {to_email}: {str(error)}")
+    else:
+        logger.error(f"Unexpected error sending email to {to_email}: {str(error)}")
+
 def send_email(to_email: str, subject: str, body: str, from_email: Optional[str] = None) -> bool:
     """
     Send email with enhanced error handling and validation
@@ -45,80 +91,82 @@ def send_email(to_email: str, subject: str, body: str, from_email: Optional[str]
         if not from_email:
             from_email = EMAIL_CONFIG["hr_email"]
         
-        # Create message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = subject
-        message["From"] = from_email
-        message["To"] = to_email
-        
-        # Create HTML and plain text versions
-        text_part = MIMEText(body, "plain")
-        html_body = body.replace('\n', '<br>')
-        html_part = MIMEText(f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                {html_body}
-                <br><br>
-                <hr>
-                <p style="font-size: 12px; color: #666;">
-                    This email was sent by EAZYAI Resume Screener
-                </p>
-            </body>
-        </html>
-        """, "html")
-        
-        message.attach(text_part)
-        message.attach(html_part)
-        
-        # Send email
-        context = ssl.create_default_context()
-        
-        with smtplib.SMTP(EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"]) as server:
-            server.starttls(context=context)
-            server.login(EMAIL_CONFIG["smtp_user"], EMAIL_CONFIG["smtp_pass"])
-            text = message.as_string()
-            server.sendmail(from_email, to_email, text)
+        # Sent over a pooled, already authenticated SMTP session
+        message = build_email_message(to_email, subject, body, from_email)
+        get_mail_transport().send(message, from_email, to_email)
         
         logger.info(f"Email sent successfully to {to_email}")
         return True
         
-    except smtplib.SMTPAuthenticationError as e:
-        logger.error(f"SMTP authentication failed: {str(e)}")
-        return False
-    except smtplib.SMTPRecipientsRefused as e:
-        logger.error(f"Recipient email refused: {str(e)}")
-        return False
-    except smtplib.SMTPException as e:
-        logger.error(f"SMTP error: {str(e)}")
-        return False
     except Exception as e:
-        logger.error(f"Unexpected error sending email: {str(e)}")
+        log_send_error(to_email, e)
         return False
 
+def send_prepared_emails(emails: List[Dict[str, str]], from_email: Optional[str] = None,
+                         progress_callback=None) -> Dict[str, int]:
+    """
+    Send many {"to", "subject", "body", "html"?} emails concurrently over the pooled transport,
+    within the configured per-minute limit. MIME messages are built by the sending worker,
+    so only in-flight emails are held as MIME objects.
+    """
+    from_email = from_email or EMAIL_CONFIG["hr_email"]
+    results = {"sent": 0, "failed": 0, "invalid_emails": 0}
+    
+    mails, recipients = [], []
+    for email in emails:
+        to_email = str(email.get("to", "")).strip()
+        if not to_email or not validate_email(to_email) or not email.get("subject") or not email.get("body"):
+            results["invalid_emails"] += 1
+            continue
+        message = partial(build_email_message, to_email, email["subject"], email["body"], from_email, email.get("html"))
+        mails.append((message, from_email, to_email))
+        recipients.append(to_email)
+    
+    errors = get_mail_transport().send_many(mails, progress_callback=progress_callback)
+    for to_email, error in zip(recipients, errors):
+        if error is None:
+            results["sent"] += 1
+        else:
+            results["failed"] += 1
+            log_send_error(to_email, error)
+    
+    logger.info(f"Bulk email results: {results}")
+    return results
+
+def deliver_outbox_message(message: Dict[str, Any]) -> None:
+    """Send one outbox message; raises on failure so the dispatcher can retry it"""
+    from_email = EMAIL_CONFIG["hr_email"]
+    mime = build_email_message(message["to_email"], message["subject"], message["body"], from_email,
+                               message.get("html"))
+    get_mail_transport().send(mime, from_email, message["to_email"])
+
+_dispatcher_thread: Optional[threading.Thread] = None
+_dispatcher_lock = threading.Lock()
+
+def start_email_dispatcher() -> None:
+    """Drain the outbox on a background thread (one per process) so callers never wait on SMTP"""
+    global _dispatcher_thread
+    with _dispatcher_lock:
+        if _dispatcher_thread is not None and _dispatcher_thread.is_alive():
+            return
+        dispatcher = OutboxDispatcher(get_email_outbox(), deliver_outbox_message)
+        _dispatcher_thread = threading.Thread(target=lambda: asyncio.run(dispatcher.run()),
+                                              name="email-outbox-dispatcher", daemon=True)
+        _dispatcher_thread.start()
+        logger.info("Email outbox dispatcher started")
+
 def generate_email_content(candidate: Dict[str, Any], verdict: str, role: str = "Position", company_name: str = "Our Company") -> Dict[str, str]:
     """
     Generate email content based on candidate data and verdict
     """
     try:
-        name = candidate.get("name", "Candidate")
-        
         # Get template based on verdict
-        template = EMAIL_TEMPLATES.get(verdict.lower(), EMAIL_TEMPLATES["review"])
-        
-        # Format subject
-        subject = template["subject"].format(role=role)
-        
-        # Format body with candidate-specific information
-        body = template["body"].format(
-            name=name,
-            role=role,
-            company_name=company_name,
-            highlights=format_highlights(candidate.get("highlights", [])),
-        )
+        name = verdict.lower() if verdict.lower() in ("shortlist", "review", "reject") else "review"
+        email = get_email_template(name).render(candidate, role=role, company_name=company_name)
         
         return {
-            "subject": subject,
-            "body": body
+            "subject": email["subject"],
+            "body": email["body"]
         }
         
     except Exception as e:
@@ -128,56 +176,29 @@ def generate_email_content(candidate: Dict[str, Any], verdict: str, role: str =
             "body": f"Dear {candidate.get('name', 'Candidate')},\n\nThank you for your application.\n\nBest regards,\n{company_name} Team"
         }
 
-def format_highlights(highlights: List[str]) -> str:
-    """Format highlights list for email"""
-    try:
-        if not highlights:
-            return "• Your qualifications and experience"
-        
-        formatted = []
-        for highlight in highlights[:5]:  # Limit to 5 highlights
-            if highlight and highlight.strip():
-                formatted.append(f"• {highlight.strip()}")
-        
-        return "\n".join(formatted) if formatted else "• Your qualifications and experience"
-        
-    except Exception as e:
-        logger.error(f"Error formatting highlights: {str(e)}")
-        return "• Your qualifications and experience"
+def generate_email_batch(candidates: List[Dict[str, Any]], verdict: str, role: str = "Position",
+                         company_name: str = "Our Company") -> List[Dict[str, str]]:
+    """
+    Verdict emails ({"subject", "body", "html"}) for many candidates, rendered in one pass
+    from the pre-compiled template
+    """
+    name = verdict.lower() if verdict.lower() in ("shortlist", "review", "reject") else "review"
+    return get_email_template(name).render_batch(candidates, role=role, company_name=company_name)
 
 def send_bulk_emails(candidates: List[Dict[str, Any]], verdict: str, role: str = "Position", company_name: str = "Our Company") -> Dict[str, int]:
     """
     Send bulk emails to multiple candidates
     """
-    results = {
-        "sent": 0,
-        "failed": 0,
-        "invalid_emails": 0
-    }
-    
     try:
-        for candidate in candidates:
-            email = candidate.get("email", "").strip()
-            
-            if not email or not validate_email(email):
-                results["invalid_emails"] += 1
-                continue
-            
-            # Generate email content
-            email_content = generate_email_content(candidate, verdict, role, company_name)
-            
-            # Send email
-            if send_email(email, email_content["subject"], email_content["body"]):
-                results["sent"] += 1
-            else:
-                results["failed"] += 1
+        rendered = generate_email_batch(candidates, verdict, role, company_name)
+        emails = [{"to": str(candidate.get("email", "")).strip(), **email_content}
+                  for candidate, email_content in zip(candidates, rendered)]
         
-        logger.info(f"Bulk email results: {results}")
-        return results
+        return send_prepared_emails(emails)
         
     except Exception as e:
         logger.error(f"Error in bulk email sending: {str(e)}")
-        return results
+        return {"sent": 0, "failed": len(candidates), "invalid_emails": 0}
 
 def check_missing_info(candidate: Dict[str, Any]) -> List[str]:
     """
@@ -231,27 +252,10 @@ def send_missing_info_email(candidate: Dict[str, Any], missing_info: List[str],
             logger.error(f"Invalid email for missing info request: {email}")
             return False
         
-        name = candidate.get("name", "Candidate")
         missing_list = "\n".join([f"• {item}" for item in missing_info])
+        content = get_email_template("missing_info").render(candidate, role=role, missing_list=missing_list)
         
-        subject = f"Additional Information Required - {role} Application"
-        
-        body = f"""Dear {name},
-
-Thank you for your application for the {role} position.
-
-To complete our review of your application, we need some additional information:
-
-{missing_list}
-
-Please provide the missing information at your earliest convenience by replying to this email.
-
-If you have any questions, please don't hesitate to contact us.
-
-Best regards,
-Recruitment Team"""
-        
-        return send_email(email, subject, body)
+        return send_email(email, content["subject"], content["body"])
         
     except Exception as e:
         logger.error(f"Error sending missing info email: {str(e)}")
@@ -262,41 +266,11 @@ def create_interview_invitation(candidate: Dict[str, Any], interview_details: Di
     Create interview invitation email content
     """
     try:
-        name = candidate.get("name", "Candidate")
-        
-        subject = f"Interview Invitation - {role} Position"
-        
-        body = f"""Dear {name},
-
-Congratulations! We are pleased to invite you for an interview for the {role} position.
-
-Interview Details:
-• Date: {interview_details.get('date', 'To be confirmed')}
-• Time: {interview_details.get('time', 'To be confirmed')}
-• Duration: {interview_details.get('duration', '45-60 minutes')}
-• Format: {interview_details.get('format', 'In-person/Video call')}
-• Location: {interview_details.get('location', 'To be confirmed')}
-
-Please confirm your availability by replying to this email within 24 hours.
-
-What to expect:
-• Technical discussion about your experience
-• Questions about the role and our company
-• Opportunity for you to ask questions
-
-Please bring:
-• Updated resume
-• Portfolio (if applicable)
-• Valid ID
-
-If you need to reschedule, please let us know as soon as possible.
-
-We look forward to meeting you!
-
-Best regards,
-Recruitment Team"""
+        details = {**INTERVIEW_DETAIL_DEFAULTS,
+                   **{key: value for key, value in (interview_details or {}).items() if key in INTERVIEW_DETAIL_DEFAULTS}}
+        email = get_email_template("interview_invitation").render(candidate, role=role, **details)
         
-        return {"subject": subject, "body": body}
+        return {"subject": email["subject"], "body": email["body"]}
         
     except Exception as e:
         logger.error(f"Error creating interview invitation: {str(e)}")
@@ -327,35 +301,10 @@ def create_follow_up_email(candidate: Dict[str, Any], role: str = "Position", da
     Create follow-up email content for candidates under review
     """
     try:
-        name = candidate.get("name", "Candidate")
-        
-        subject = f"Application Status Update - {role} Position"
-        
-        body = f"""Dear {name},
-
-Thank you for your interest in the {role} position and for your patience during our review process.
-
-We wanted to provide you with an update on your application status:
-
-Your application is currently under review by our hiring team. We have received a high volume of applications for this position, and we are carefully evaluating each candidate to ensure we make the best hiring decision.
-
-What happens next:
-• Our team will complete the initial review within the next 3-5 business days
-• Qualified candidates will be contacted for the next stage of the process
-• All applicants will be notified of their status regardless of the outcome
-
-We appreciate your continued interest in our organization and will be in touch soon with an update.
-
-If you have any questions in the meantime, please don't hesitate to reach out.
-
-Best regards,
-Recruitment Team
-
----
-Application submitted: {days_since_application} days ago
-Current status: Under Review"""
+        email = get_email_template("follow_up").render(candidate, role=role,
+                                                       days_since_application=days_since_application)
         
-        return {"subject": subject, "body": body}
+        return {"subject": email["subject"], "body": email["body"]}
         
     except Exception as e:
         logger.error(f"Error creating follow-up email: {str(e)}")
@@ -495,36 +444,16 @@ def create_rejection_with_feedback(candidate: Dict[str, Any], role: str = "Posit
     Create constructive rejection email with feedback
     """
     try:
-        name = candidate.get("name", "Candidate")
-        
-        subject = f"Application Status Update - {role} Position"
-        
         feedback_section = ""
         if feedback_points:
             feedback_section = """
 Areas for potential development based on our requirements:
 """ + "\n".join([f"• {point}" for point in feedback_points[:3]])  # Limit to 3 points
         
-        body = f"""Dear {name},
-
-Thank you for your interest in the {role} position and for taking the time to apply.
-
-After careful consideration of all applications, we have decided not to proceed with your candidacy for this specific role. This decision was difficult given the quality of applications we received.
-{feedback_section}
-
-We encourage you to continue developing your skills and to apply for future opportunities that may be a better match for your background.
-
-We will keep your resume on file for future openings that may align with your experience.
-
-Thank you again for considering us, and we wish you all the best in your career journey.
-
-Best regards,
-Recruitment Team
-
----
-If you have any questions about this decision, please feel free to reach out."""
+        email = get_email_template("rejection_feedback").render(candidate, role=role,
+                                                                feedback_section=feedback_section)
         
-        return {"subject": subject, "body": body}
+        return {"subject": email["subject"], "body": email["body"]}
         
     except Exception as e:
         logger.error(f"Error creating rejection with feedback: {str(e)}")
@@ -533,24 +462,51 @@ If you have any questions about this decision, please feel free to reach out."""
             "body": f"Dear {candidate.get('name', 'Candidate')},\n\nThank you for your application.\n\nBest regards,\nRecruitment Team"
         }
 
-def schedule_email_batch(candidates: List[Dict[str, Any]], verdict: str, role: str, delay_hours: int = 0) -> Dict[str, Any]:
+def queue_emails(emails: List[Dict[str, Any]], template: str, delay_hours: float = 0,
+                 jd_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write {"candidate_id", "to", "subject", "body", "html"?} emails to the durable outbox and make
+    sure the background dispatcher is running. Returns immediately; sending happens
+    in the background, and a candidate already sent this template for the JD is skipped.
     """
-    Schedule batch emails to be sent (placeholder for future scheduling functionality)
+    batch = get_email_outbox().enqueue_many(emails, template, delay_seconds=delay_hours * 3600, jd_hash=jd_hash)
+    start_email_dispatcher()
+    return batch
+
+def schedule_email_batch(candidates: List[Dict[str, Any]], verdict: str, role: str, delay_hours: int = 0,
+                         jd_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Queue verdict emails for a batch of candidates in the outbox, to be sent after delay_hours.
+    Candidates are identified like the results DataFrame index; without the run's JD hash,
+    emails are scoped to the role.
     """
     try:
-        # For now, this is a placeholder that returns scheduling info
-        # In a full implementation, this would integrate with a task queue
-        
-        valid_emails = [c for c in candidates if validate_email(c.get("email", ""))]
+        valid = [c for c in candidates if validate_email(str(c.get("email", "")))]
+        emails = []
+        for candidate, email_content in zip(valid, generate_email_batch(valid, verdict, role)):
+            to_email = str(candidate["email"]).strip()
+            emails.append({
+                "candidate_id": candidate.get("candidate_id") or legacy_candidate_id(candidate),
+                "to": to_email,
+                **email_content
+            })
+        
+        batch = queue_emails(emails, template=verdict.lower(), delay_hours=delay_hours,
+                             jd_hash=jd_hash or compute_content_hash(role))
+        send_time = datetime.fromtimestamp(batch["send_after"])
         
         schedule_info = {
             "total_candidates": len(candidates),
-            "valid_emails": len(valid_emails),
-            "invalid_emails": len(candidates) - len(valid_emails),
+            "valid_emails": len(valid),
+            "invalid_emails": len(candidates) - len(valid),
             "verdict": verdict,
             "role": role,
             "delay_hours": delay_hours,
             "scheduled": True,
+            "batch_id": batch["batch_id"],
+            "queued": batch["queued"],
+            "already_queued": batch["duplicates"],
+            "scheduled_for": send_time.isoformat(timespec="minutes"),
             "estimated_send_time": f"In {delay_hours} hours" if delay_hours > 0 else "Immediately"
         }
         
@@ -0,0 +1,277 @@
+# email_outbox.py — Durable SQLite outbox for candidate emails and the async worker that drains it
+#
+# Emails are written to the outbox before anything is sent, keyed by (candidate, template, job),
+# so a rerun or crash never loses track of who was emailed and never emails anyone twice.
+# The job is the JD hash, so a candidate screened for another role can still hear about it.
+
+import asyncio
+import hashlib
+import logging
+import os
+import smtplib
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from constants import EMAIL_OUTBOX_CONFIG, MAIL_TRANSPORT_CONFIG, STORAGE_CONFIG
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    message_id TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    batch_id TEXT NOT NULL,
+    candidate_id TEXT NOT NULL,
+    template TEXT NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    html TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    send_after REAL NOT NULL,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, send_after);
+CREATE INDEX IF NOT EXISTS idx_outbox_batch ON outbox (batch_id, status);
+"""
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+def idempotency_key(candidate_id: str, template: str, jd_hash: Optional[str] = None) -> str:
+    """
+    One email per candidate, template and job description, however many times it is queued.
+    Without a JD hash the key is the (candidate, template) key used before jobs were part of it.
+    """
+    scope = f"{candidate_id}\n{template}" + (f"\n{jd_hash}" if jd_hash else "")
+    return hashlib.sha256(scope.encode("utf-8")).hexdigest()
+
+def is_permanent_failure(error: Exception) -> bool:
+    """Rejected recipients and 5xx replies will fail the same way on every retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False  # Credentials can be fixed while the message waits
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+class EmailOutbox:
+    """
+    Outgoing emails with their delivery state. Due messages are claimed with a lease;
+    a claim that is never confirmed (worker crashed mid-send) becomes due again when
+    the lease expires, so delivery is at-least-once and never silently dropped.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        self.db_path = db_path or STORAGE_CONFIG["email_outbox_path"]
+        self.config = {**EMAIL_OUTBOX_CONFIG, **(config or {})}
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Outboxes created before rendered HTML was stored get the column added in place
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if "html" not in columns:
+                conn.execute("ALTER TABLE outbox ADD COLUMN html TEXT")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation; safe across threads and processes
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue_many(self, emails: List[Dict[str, Any]], template: str, delay_seconds: float = 0.0,
+                     batch_id: Optional[str] = None, jd_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue {"candidate_id", "to", "subject", "body", "html"?} emails for sending after the delay.
+        Candidates that already have this template queued or sent for the same JD are skipped.
+        """
+        batch_id = batch_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        rows = [(uuid.uuid4().hex, idempotency_key(str(email["candidate_id"]), template, jd_hash), batch_id,
+                 str(email["candidate_id"]), template, email["to"], email["subject"], email["body"],
+                 email.get("html"), PENDING, self.config["max_attempts"], now + delay_seconds, now, now)
+                for email in emails]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                """INSERT OR IGNORE INTO outbox (message_id, idempotency_key, batch_id, candidate_id, template,
+                       to_email, subject, body, html, status, max_attempts, send_after, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            queued = conn.total_changes - before
+            conn.execute("COMMIT")
+        logger.info(f"Outbox batch {batch_id}: {queued} queued, {len(rows) - queued} already queued or sent")
+        return {"batch_id": batch_id, "queued": queued, "duplicates": len(rows) - queued,
+                "send_after": now + delay_seconds}
+
+    def claim_due(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """Lease up to `limit` due messages (pending, or sending with an expired lease)"""
+        now = time.time()
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock so two dispatchers never claim the same message
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    """SELECT * FROM outbox
+                       WHERE (status = ? AND send_after <= ?) OR (status = ? AND lease_expires < ?)
+                       ORDER BY send_after LIMIT ?""",
+                    (PENDING, now, SENDING, now, limit)
+                ).fetchall()
+                conn.executemany(
+                    """UPDATE outbox SET status = ?, attempts = attempts + 1, lease_expires = ?, updated_at = ?
+                       WHERE message_id = ?""",
+                    [(SENDING, now + lease_seconds, now, row["message_id"]) for row in rows]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [{**dict(row), "attempts": row["attempts"] + 1} for row in rows]
+
+    def mark_sent(self, message_ids: List[str]) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE outbox SET status = ?, lease_expires = NULL, last_error = NULL, sent_at = ?, updated_at = ? "
+                "WHERE message_id = ?",
+                [(SENT, now, now, message_id) for message_id in message_ids]
+            )
+
+    def mark_failed(self, message: Dict[str, Any], error: str, permanent: bool = False) -> str:
+        """Schedule a retry with exponential backoff, or fail the message when out of attempts"""
+        now = time.time()
+        if permanent or message["attempts"] >= message["max_attempts"]:
+            status, send_after = FAILED, message["send_after"]
+        else:
+            backoff = min(self.config["backoff_base"] * 2 ** (message["attempts"] - 1), self.config["backoff_max"])
+            status, send_after = PENDING, now + backoff
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, send_after = ?, lease_expires = NULL, last_error = ?, updated_at = ? "
+                "WHERE message_id = ?",
+                (status, send_after, error, now, message["message_id"])
+            )
+        return status
+
+    def counts(self, batch_id: Optional[str] = None) -> Dict[str, int]:
+        query = "SELECT status, COUNT(*) AS n FROM outbox"
+        args: list = []
+        if batch_id:
+            query += " WHERE batch_id = ?"
+            args.append(batch_id)
+        with self._connect() as conn:
+            counts = {PENDING: 0, SENDING: 0, SENT: 0, FAILED: 0}
+            counts.update({row["status"]: row["n"] for row in conn.execute(query + " GROUP BY status", args)})
+            return counts
+
+    def list_messages(self, batch_id: Optional[str] = None, status: Optional[str] = None,
+                      limit: int = 100) -> List[Dict[str, Any]]:
+        query = "SELECT message_id, batch_id, candidate_id, template, to_email, status, attempts, send_after, " \
+                "last_error, sent_at FROM outbox WHERE 1 = 1"
+        args: list = []
+        if batch_id:
+            query += " AND batch_id = ?"
+            args.append(batch_id)
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        query += " ORDER BY created_at LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, args)]
+
+class OutboxDispatcher:
+    """
+    Asyncio worker that drains due outbox messages. Each claimed batch is sent with
+    bounded concurrency through a blocking `deliver(message)` callable run in threads;
+    failures are retried with exponential backoff until max_attempts.
+    """
+
+    def __init__(self, outbox: EmailOutbox, deliver: Callable[[Dict[str, Any]], None],
+                 concurrency: Optional[int] = None):
+        self.outbox = outbox
+        self.deliver = deliver
+        self.concurrency = concurrency or MAIL_TRANSPORT_CONFIG["send_concurrency"]
+        self.stats = {"sent": 0, "retried": 0, "failed": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self):
+        config = self.outbox.config
+        while True:
+            try:
+                drained = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Outbox dispatcher error: {str(e)}")
+                drained = 0
+            if drained == 0:
+                await asyncio.sleep(config["poll_interval"])
+
+    async def drain_once(self) -> int:
+        """Send one claimed batch of due messages; returns how many were claimed"""
+        config = self.outbox.config
+        messages = await asyncio.to_thread(self.outbox.claim_due, config["claim_batch_size"], config["lease_seconds"])
+        if not messages:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(message: Dict[str, Any]) -> Optional[Exception]:
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(self.deliver, message)
+                    return None
+                except Exception as e:
+                    return e
+
+        errors = await asyncio.gather(*(send(message) for message in messages))
+        sent = [message["message_id"] for message, error in zip(messages, errors) if error is None]
+        if sent:
+            await asyncio.to_thread(self.outbox.mark_sent, sent)
+            self.stats["sent"] += len(sent)
+        for message, error in zip(messages, errors):
+            if error is None:
+                continue
+            status = await asyncio.to_thread(self.outbox.mark_failed, message, str(error), is_permanent_failure(error))
+            self.stats["failed" if status == FAILED else "retried"] += 1
+            logger.warning(f"Email to {message['to_email']} {'failed' if status == FAILED else 'will be retried'}: "
+                           f"{str(error)}")
+        return len(messages)
+
+_email_outbox: Optional[EmailOutbox] = None
+
+def get_email_outbox() -> EmailOutbox:
+    """Process-wide outbox at the configured path"""
+    global _email_outbox
+    if _email_outbox is None:
+        _email_outbox = EmailOutbox()
+    return _email_outbox
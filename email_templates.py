@@ -0,0 +1,173 @@
+# email_templates.py — Pre-compiled email templates rendered to plain text and HTML in batches
+#
+# Each template is parsed once into literal segments and fields. Batch-wide values (role,
+# company name, interview details) are folded into the literals once per batch, so each
+# candidate only costs a join of pre-escaped pieces.
+
+import html
+import logging
+import threading
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Union
+
+import pandas as pd
+
+from constants import EMAIL_TEMPLATES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_HIGHLIGHT = "• Your qualifications and experience"
+
+HTML_HEADER = """
+        <html>
+            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+                """
+
+HTML_FOOTER = """
+                <br><br>
+                <hr>
+                <p style="font-size: 12px; color: #666;">
+                    This email was sent by EAZYAI Resume Screener
+                </p>
+            </body>
+        </html>
+        """
+
+def format_highlights(highlights: List[str]) -> str:
+    """Format highlights list for email"""
+    try:
+        if not isinstance(highlights, (list, tuple)) or not highlights:
+            return DEFAULT_HIGHLIGHT
+
+        formatted = []
+        for highlight in highlights[:5]:  # Limit to 5 highlights
+            if highlight and str(highlight).strip():
+                formatted.append(f"• {str(highlight).strip()}")
+
+        return "\n".join(formatted) if formatted else DEFAULT_HIGHLIGHT
+
+    except Exception as e:
+        logger.error(f"Error formatting highlights: {str(e)}")
+        return DEFAULT_HIGHLIGHT
+
+def to_html(text: str) -> str:
+    """HTML fragment for plain text: escaped, with line breaks kept"""
+    return html.escape(text, quote=False).replace("\n", "<br>")
+
+def html_document(text: str) -> str:
+    """The full HTML alternative sent with a plain text body"""
+    return HTML_HEADER + to_html(text) + HTML_FOOTER
+
+# Values derived from a candidate rather than read straight from a field
+FIELD_FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "highlights": format_highlights
+}
+
+FIELD_DEFAULTS = {
+    "name": "Candidate"
+}
+
+def _field_value(field: str, value: Any) -> str:
+    if field in FIELD_FORMATTERS:
+        return FIELD_FORMATTERS[field](value)
+    if value is None or (isinstance(value, float) and value != value) or value == "":
+        return FIELD_DEFAULTS.get(field, "")
+    return str(value)
+
+class CompiledTemplate:
+    """A str.format template split once into literal segments and field names"""
+
+    def __init__(self, literals: List[str], fields: List[str]):
+        # literals has one more entry than fields: literal, field, literal, ..., literal
+        self.literals = literals
+        self.fields = fields
+
+    @classmethod
+    def compile(cls, template: str) -> "CompiledTemplate":
+        literals, fields = [""], []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            literals[-1] += literal
+            if field is not None:
+                if spec or conversion:
+                    raise ValueError(f"Format specs are not supported in email templates: {{{field}}}")
+                fields.append(field)
+                literals.append("")
+        return cls(literals, fields)
+
+    def bind(self, values: Mapping[str, str], escape: Callable[[str], str] = lambda text: text) -> "CompiledTemplate":
+        """Fold known values into the literals; the result only has the remaining fields"""
+        literals, fields = [self.literals[0]], []
+        for field, literal in zip(self.fields, self.literals[1:]):
+            if field in values:
+                literals[-1] += escape(values[field]) + literal
+            else:
+                fields.append(field)
+                literals.append(literal)
+        return CompiledTemplate(literals, fields)
+
+    def render_columns(self, columns: Mapping[str, Sequence[str]], count: int) -> List[str]:
+        """Render `count` outputs from per-field value columns in one pass"""
+        if not self.fields:
+            return [self.literals[0]] * count
+        parts = [[literal] * count for literal in self.literals]
+        interleaved = [parts[0]]
+        for field, literal_column in zip(self.fields, parts[1:]):
+            interleaved.append(columns[field])
+            interleaved.append(literal_column)
+        return ["".join(row) for row in zip(*interleaved)]
+
+class EmailTemplate:
+    """Subject and body of one email, compiled once and rendered for many candidates"""
+
+    def __init__(self, name: str, subject: str, body: str):
+        self.name = name
+        self.subject = CompiledTemplate.compile(subject)
+        self.body = CompiledTemplate.compile(body)
+        # The HTML body keeps the same fields; its literals are escaped once here
+        self.html = CompiledTemplate([to_html(literal) for literal in self.body.literals], list(self.body.fields))
+        self.html.literals[0] = HTML_HEADER + self.html.literals[0]
+        self.html.literals[-1] += HTML_FOOTER
+
+    def render_batch(self, candidates: Union[Sequence[Mapping[str, Any]], pd.DataFrame],
+                     **context: Any) -> List[Dict[str, str]]:
+        """
+        {"subject", "body", "html"} for each candidate, in order. Context values are shared
+        by the whole batch (role, company_name, ...) and bound once; candidate fields are
+        read as columns and rendered in a single pass.
+        """
+        shared = {field: _field_value(field, value) for field, value in context.items()}
+        subject = self.subject.bind(shared)
+        body = self.body.bind(shared)
+        html_body = self.html.bind(shared, escape=to_html)
+
+        count = len(candidates)
+        columns: Dict[str, List[str]] = {}
+        for field in set(subject.fields) | set(body.fields):
+            if isinstance(candidates, pd.DataFrame):
+                raw = candidates[field].tolist() if field in candidates.columns else [None] * count
+            else:
+                raw = [candidate.get(field) for candidate in candidates]
+            columns[field] = [_field_value(field, value) for value in raw]
+        html_columns = {field: [to_html(value) for value in columns[field]] for field in html_body.fields}
+
+        return [
+            {"subject": s, "body": b, "html": h}
+            for s, b, h in zip(subject.render_columns(columns, count), body.render_columns(columns, count),
+                               html_body.render_columns(html_columns, count))
+        ]
+
+    def render(self, candidate: Mapping[str, Any], **context: Any) -> Dict[str, str]:
+        return self.render_batch([candidate], **context)[0]
+
+_compiled: Dict[str, EmailTemplate] = {}
+_compiled_lock = threading.Lock()
+
+def get_email_template(name: str) -> EmailTemplate:
+    """Compiled template from EMAIL_TEMPLATES, compiled on first use"""
+    template = _compiled.get(name)
+    if template is None:
+        spec = EMAIL_TEMPLATES[name]
+        with _compiled_lock:
+            template = _compiled.setdefault(name, EmailTemplate(name, spec["subject"], spec["body"]))
+    return template
@@ -1,12 +1,14 @@
-import imaplib
-import email
 import threading
 import time
 import logging
-from email.header import decode_header
+from azure.core.exceptions import ResourceExistsError
 from azure.storage.blob import BlobServiceClient
 from typing import Dict, List, Tuple, Optional
 import streamlit as st
+from constants import MAIL_INGEST_CONFIG
+from imap_ingest import IMAPMailbox, MailboxIngester, ingest_unseen
+from resilience import get_dependency_guard, AZURE_BLOB
+from resume_index import ingest_resume
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -14,8 +16,8 @@ logger = logging.getLogger(__name__)
 # Gmail credentials
 EMAIL = "EAZYhire111@gmail.com"
 PASSWORD = "vdla vduu aepn lbng"  # Your App Password
-IMAP_SERVER = "imap.gmail.com"
-IMAP_PORT = 993
+IMAP_SERVER = MAIL_INGEST_CONFIG["imap_host"]
+IMAP_PORT = MAIL_INGEST_CONFIG["imap_port"]
 
 class GmailToAzureService:
     def __init__(self, azure_connection_string: str, container_name: str = "resumes"):
@@ -28,15 +30,19 @@ class GmailToAzureService:
             "emails_processed": 0,
             "files_uploaded": 0,
             "errors": [],
-            "is_active": False
+            "is_active": False,
+            "listening": False,
+            "duplicates_skipped": 0
         }
+        self.ingester: Optional[MailboxIngester] = None
+        self._ingest_attempts: Dict = {}  # Failed syncs per message, kept across one-shot syncs
+        self._container_client = None
+        self._status_lock = threading.Lock()
         
-    def connect_to_gmail(self) -> Optional[imaplib.IMAP4_SSL]:
+    def connect_to_gmail(self) -> Optional[IMAPMailbox]:
         """Connect to Gmail with error handling"""
         try:
-            mail = imaplib.IMAP4_SSL(IMAP_SERVER, IMAP_PORT)
-            mail.login(EMAIL, PASSWORD)
-            return mail
+            return IMAPMailbox(EMAIL, PASSWORD).connect()
         except Exception as e:
             logger.error(f"Gmail connection failed: {str(e)}")
             self.status["errors"].append(f"Gmail connection failed: {str(e)}")
@@ -55,13 +61,35 @@ class GmailToAzureService:
             self.status["errors"].append(f"Azure connection failed: {str(e)}")
             return None
     
+    def upload_attachment(self, filename: str, payload: bytes) -> None:
+        """
+        Store one resume attachment under a content-addressed name. Resumes already stored
+        (same file, or same text under another name or format) are not uploaded again.
+        """
+        stored = ingest_resume(payload, filename, self._upload_blob, source="gmail")
+        if stored["duplicate"]:
+            with self._status_lock:
+                self.status["duplicates_skipped"] += 1
+    
+    def _upload_blob(self, blob_name: str, payload: bytes, metadata: Optional[Dict[str, str]] = None,
+                     tags: Optional[Dict[str, str]] = None) -> None:
+        if self._container_client is None:
+            blob_service_client = BlobServiceClient.from_connection_string(self.azure_connection_string)
+            self._container_client = blob_service_client.get_container_client(self.container_name)
+        blob_client = self._container_client.get_blob_client(blob_name)
+        try:
+            # Never overwrite: a name is only ever reused for identical bytes
+            get_dependency_guard(AZURE_BLOB).call(blob_client.upload_blob, payload, overwrite=False,
+                                                  metadata=metadata, tags=tags)
+        except ResourceExistsError:
+            pass
+    
     def process_unread_emails(self) -> Dict[str, any]:
-        """Process unread emails and extract attachments"""
+        """Process unread emails and extract attachments (one-shot sync on a fresh session)"""
         self.status["is_active"] = True
         self.status["errors"] = []  # Clear previous errors
-        processed_count = 0
-        uploaded_count = 0
         
+        mail = None
         try:
             # Connect to Gmail
             mail = self.connect_to_gmail()
@@ -71,95 +99,20 @@ class GmailToAzureService:
             # Connect to Azure
             blob_service_client = self.connect_to_azure()
             if not blob_service_client:
-                mail.logout()
-                return self.get_status()
-            
-            container_client = blob_service_client.get_container_client(self.container_name)
-            
-            # Select inbox and search for unread emails
-            mail.select("inbox")
-            status, messages = mail.search(None, '(UNSEEN)')
-            email_ids = messages[0].split()
-            
-            logger.info(f"Found {len(email_ids)} unread emails")
-            
-            if len(email_ids) == 0:
-                self.status["last_sync"] = time.strftime("%Y-%m-%d %H:%M:%S")
-                self.status["is_active"] = False
-                mail.logout()
                 return self.get_status()
+            self._container_client = blob_service_client.get_container_client(self.container_name)
             
-            # Process each email
-            for e_id in email_ids:
-                try:
-                    _, msg_data = mail.fetch(e_id, "(RFC822)")
-                    raw_email = msg_data[0][1]
-                    msg = email.message_from_bytes(raw_email)
-                    
-                    # Decode subject
-                    subject, encoding = decode_header(msg["Subject"])[0]
-                    if isinstance(subject, bytes):
-                        subject = subject.decode(encoding or "utf-8")
-                    
-                    logger.info(f"Processing email: {subject}")
-                    processed_count += 1
-                    
-                    # Process attachments
-                    for part in msg.walk():
-                        if part.get_content_maintype() == "multipart":
-                            continue
-                        if part.get("Content-Disposition") is None:
-                            continue
-                        
-                        filename = part.get_filename()
-                        if filename:
-                            # Decode filename
-                            filename = decode_header(filename)[0][0]
-                            if isinstance(filename, bytes):
-                                filename = filename.decode()
-                            
-                            # Check if it's a supported resume format (PDF, DOCX, DOC)
-                            supported_extensions = ['.pdf', '.docx', '.doc']
-                            file_extension = ''.join(filename.lower().split('.')[1:])  # Handle multiple dots
-                            
-                            if any(filename.lower().endswith(ext) for ext in supported_extensions):
-                                try:
-                                    payload = part.get_payload(decode=True)
-                                    
-                                    # Ensure filename has proper extension
-                                    if not any(filename.lower().endswith(ext) for ext in supported_extensions):
-                                        # Add .pdf as default if no extension
-                                        filename += '.pdf'
-                                    
-                                    blob_client = container_client.get_blob_client(filename)
-                                    blob_client.upload_blob(payload, overwrite=True)
-                                    
-                                    logger.info(f"Uploaded '{filename}' ({file_extension.upper()}) to Azure Blob Storage")
-                                    uploaded_count += 1
-                                    
-                                except Exception as upload_error:
-                                    error_msg = f"Failed to upload {filename}: {str(upload_error)}"
-                                    logger.error(error_msg)
-                                    self.status["errors"].append(error_msg)
-                            else:
-                                logger.info(f"Skipping unsupported file format: {filename}")
-                    
-                    # Mark email as read
-                    mail.store(e_id, "+FLAGS", "\\Seen")
-                    
-                except Exception as email_error:
-                    error_msg = f"Error processing email {e_id}: {str(email_error)}"
-                    logger.error(error_msg)
-                    self.status["errors"].append(error_msg)
-                    continue
+            # Only BODYSTRUCTURE is fetched per email, then just the resume attachments
+            result = ingest_unseen(mail, self.upload_attachment, attempts=self._ingest_attempts)
+            self.status["errors"].extend(result["errors"])
             
             # Update status
-            self.status["emails_processed"] = processed_count
-            self.status["files_uploaded"] = uploaded_count
+            self.status["emails_processed"] = result["emails_processed"]
+            self.status["files_uploaded"] = result["files_uploaded"]
             self.status["last_sync"] = time.strftime("%Y-%m-%d %H:%M:%S")
             
-            mail.logout()
-            logger.info(f"Gmail sync completed: {processed_count} emails, {uploaded_count} files uploaded")
+            logger.info(f"Gmail sync completed: {result['emails_processed']} emails, "
+                        f"{result['files_uploaded']} files uploaded")
             
         except Exception as e:
             error_msg = f"Gmail sync failed: {str(e)}"
@@ -167,16 +120,47 @@ class GmailToAzureService:
             self.status["errors"].append(error_msg)
         
         finally:
+            if mail:
+                mail.close()
             self.status["is_active"] = False
         
         return self.get_status()
     
+    def _record_push_sync(self, result: Dict[str, any]) -> None:
+        """Fold one push sync into the running totals shown in the UI"""
+        self.status["emails_processed"] += result["emails_processed"]
+        self.status["files_uploaded"] += result["files_uploaded"]
+        self.status["errors"] = (self.status["errors"] + result["errors"])[-20:]
+        self.status["last_sync"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        if result["files_uploaded"]:
+            logger.info(f"Gmail push sync: {result['emails_processed']} emails, "
+                        f"{result['files_uploaded']} files uploaded")
+    
+    def start_push_sync(self) -> None:
+        """Keep one Gmail session in IMAP IDLE and upload resumes as soon as mail arrives"""
+        if self.ingester and self.ingester.running:
+            return
+        self.ingester = MailboxIngester(lambda: IMAPMailbox(EMAIL, PASSWORD), self.upload_attachment,
+                                        on_sync=self._record_push_sync)
+        self.ingester.start()
+        logger.info("Gmail push sync started (IMAP IDLE)")
+    
     def get_status(self) -> Dict[str, any]:
         """Get current sync status"""
-        return self.status.copy()
+        status = self.status.copy()
+        if self.ingester and self.ingester.running:
+            status["listening"] = self.ingester.stats["connected"]
+            status["bytes_fetched"] = self.ingester.stats["bytes_fetched"]
+            if not self.ingester.stats["connected"] and self.ingester.stats["last_error"]:
+                status["errors"] = status["errors"] + [f"Gmail connection lost: {self.ingester.stats['last_error']}"]
+        return status
     
     def start_background_sync(self) -> None:
         """Start background Gmail sync in a separate thread"""
+        if MAIL_INGEST_CONFIG["use_idle"]:
+            self.start_push_sync()
+            return
+        
         if self.is_running:
             return
         
@@ -194,6 +178,12 @@ class GmailToAzureService:
     
     def sync_now(self) -> Dict[str, any]:
         """Manually trigger sync and return status"""
+        if self.ingester and self.ingester.running:
+            # The idling session picks up the backlog itself; no second login
+            if not self.ingester.request_sync(timeout=30):
+                return {"error": "Gmail is reconnecting; new mail will sync once it is back"}
+            return self.get_status()
+        
         if self.is_running:
             return {"error": "Sync already in progress"}
         
@@ -0,0 +1,590 @@
+# imap_ingest.py — Push-based resume ingestion from an IMAP mailbox (IDLE, BODYSTRUCTURE, per-part fetch)
+#
+# Messages are addressed by UID so work survives reconnects. For each unseen message only
+# BODYSTRUCTURE and the Subject header are fetched first; the attachment parts worth keeping
+# are then fetched by section number, so message bodies, inline images and unsupported files
+# are never downloaded. Fetches cover UID ranges, and decoding and uploads overlap the next fetch.
+
+import base64
+import binascii
+import email
+import imaplib
+import logging
+import quopri
+import select
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.header import decode_header, make_header
+from email.utils import collapse_rfc2231_value, decode_rfc2231
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from constants import MAIL_INGEST_CONFIG
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SUBJECT_SECTION = "HEADER.FIELDS (SUBJECT)"
+SUBJECT_FIELD = f"BODY[{SUBJECT_SECTION}]"
+
+# ==========================
+# 🧩 IMAP response parsing
+# ==========================
+
+def join_fetch_response(data: List[Any]) -> bytes:
+    """imaplib splits responses around literals into (prefix, literal) tuples; put them back together"""
+    joined = bytearray()
+    for item in data:
+        if isinstance(item, tuple):
+            joined += item[0] + b"\r\n" + item[1]
+        elif item:
+            joined += b" " + item
+    return bytes(joined)
+
+def parse_response(data: bytes) -> List[Any]:
+    """
+    Parse IMAP response data into nested lists. Atoms and quoted strings become str,
+    NIL becomes None and literals stay bytes.
+    """
+    stack: List[List[Any]] = [[]]
+    pos, length = 0, len(data)
+    while pos < length:
+        char = data[pos:pos + 1]
+        if char in (b" ", b"\r", b"\n"):
+            pos += 1
+        elif char == b"(":
+            stack.append([])
+            pos += 1
+        elif char == b")":
+            if len(stack) == 1:
+                raise ValueError(f"Unbalanced IMAP response at {pos}")
+            closed = stack.pop()
+            stack[-1].append(closed)
+            pos += 1
+        elif char == b'"':
+            pos += 1
+            value = bytearray()
+            while data[pos:pos + 1] != b'"':
+                if pos >= length:
+                    raise ValueError("Unterminated quoted string in IMAP response")
+                if data[pos:pos + 1] == b"\\":
+                    pos += 1
+                value += data[pos:pos + 1]
+                pos += 1
+            stack[-1].append(value.decode("utf-8", errors="replace"))
+            pos += 1
+        elif char == b"{":
+            end = data.index(b"}", pos)
+            size = int(data[pos + 1:end])
+            start = end + 1
+            if data[start:start + 2] == b"\r\n":
+                start += 2
+            stack[-1].append(data[start:start + size])
+            pos = start + size
+        else:
+            start = pos
+            while pos < length and data[pos:pos + 1] not in (b" ", b"(", b")", b"\r", b"\n"):
+                if data[pos:pos + 1] == b"[":
+                    # Section specs like BODY[HEADER.FIELDS (SUBJECT)] hold spaces and parens
+                    pos = data.index(b"]", pos)
+                pos += 1
+            atom = data[start:pos].decode("ascii", errors="replace")
+            stack[-1].append(None if atom.upper() == "NIL" else atom)
+    if len(stack) != 1:
+        raise ValueError("Unbalanced IMAP response")
+    return stack[0]
+
+def parse_fetch_items(data: bytes) -> Dict[str, Dict[str, Any]]:
+    """FETCH responses keyed by UID, each a dict of data item name (upper case) to value"""
+    tokens = parse_response(data)
+    messages = {}
+    for items in tokens:
+        if not isinstance(items, list):
+            continue  # Message sequence numbers
+        fields = {str(key).upper(): value for key, value in zip(items[::2], items[1::2])}
+        if "UID" in fields:
+            messages[fields["UID"]] = fields
+    return messages
+
+# ==========================
+# 📎 BODYSTRUCTURE
+# ==========================
+
+def _text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value or ""
+
+def _params(value: Any) -> Dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    return {_text(key).lower(): _text(val) for key, val in zip(value[::2], value[1::2])}
+
+def _decode_filename(params: Dict[str, str]) -> str:
+    if "filename*" in params:
+        charset, language, text = decode_rfc2231(params["filename*"])
+        if charset is None:
+            return unquote(text)
+        return collapse_rfc2231_value((charset, language, unquote(text, encoding="latin-1")))
+    name = params.get("filename") or params.get("name") or ""
+    if "=?" in name:
+        name = str(make_header(decode_header(name)))
+    return name
+
+def attachment_parts(structure: List[Any], section: str = "") -> List[Dict[str, Any]]:
+    """
+    Named leaf parts of a BODYSTRUCTURE with their section numbers:
+    {"section", "filename", "content_type", "encoding", "size"}. Attached messages are
+    walked too, as email.message.walk() would.
+    """
+    if structure and isinstance(structure[0], list):  # multipart: children, then the subtype
+        parts = []
+        for index, child in enumerate(structure):
+            if not isinstance(child, list):
+                break  # The subtype; extension data follows it
+            child_section = f"{section}.{index + 1}" if section else str(index + 1)
+            parts.extend(attachment_parts(child, child_section))
+        return parts
+
+    section = section or "1"
+    content_type = f"{_text(structure[0])}/{_text(structure[1])}".lower()
+    if content_type == "message/rfc822" and len(structure) > 8 and isinstance(structure[8], list):
+        inner = structure[8]
+        inner_section = section if inner and isinstance(inner[0], list) else f"{section}.1"
+        return attachment_parts(inner, inner_section)
+
+    # Extension data positions differ by type; the disposition is the ("type" (params)) pair
+    disposition: Dict[str, str] = {}
+    for item in structure[7:]:
+        if (isinstance(item, list) and len(item) == 2 and isinstance(item[0], str)
+                and (item[1] is None or isinstance(item[1], list))):
+            disposition = _params(item[1])
+            break
+    filename = _decode_filename({**_params(structure[2]), **disposition})
+    if not filename:
+        return []
+    return [{
+        "section": section,
+        "filename": filename,
+        "content_type": content_type,
+        "encoding": _text(structure[5]).lower(),
+        "size": int(structure[6]) if str(structure[6]).isdigit() else 0
+    }]
+
+def decode_part(data: Any, encoding: str) -> bytes:
+    """Undo the part's Content-Transfer-Encoding"""
+    data = data if isinstance(data, bytes) else _text(data).encode("utf-8")
+    if encoding == "base64":
+        try:
+            return base64.b64decode(data)
+        except binascii.Error:
+            return base64.b64decode(data + b"==", validate=False)
+    if encoding == "quoted-printable":
+        return quopri.decodestring(data)
+    return data
+
+def decode_subject(header: Any) -> str:
+    message = email.message_from_bytes(header if isinstance(header, bytes) else _text(header).encode("utf-8"))
+    subject = message.get("Subject", "")
+    try:
+        return str(make_header(decode_header(subject)))
+    except Exception:
+        return subject
+
+def uid_set(uids: List[str]) -> str:
+    """Compact IMAP sequence set for UIDs, e.g. 3:7,9,12:14"""
+    numbers = sorted({int(uid) for uid in uids})
+    ranges = []
+    for number in numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ",".join(str(low) if low == high else f"{low}:{high}" for low, high in ranges)
+
+def is_supported_attachment(filename: str, extensions=None) -> bool:
+    extensions = extensions or MAIL_INGEST_CONFIG["supported_extensions"]
+    return filename.lower().endswith(tuple(extensions))
+
+# ==========================
+# 📬 Mailbox session
+# ==========================
+
+class IMAPMailbox:
+    """One authenticated IMAP session on a selected mailbox"""
+
+    def __init__(self, user: str, password: str, config: Optional[Dict[str, Any]] = None):
+        self.user = user
+        self.password = password
+        self.config = {**MAIL_INGEST_CONFIG, **(config or {})}
+        self.conn: Optional[imaplib.IMAP4] = None
+        self.supports_idle = False
+        self.uid_validity = ""
+        self.bytes_fetched = 0
+        self._idle_count = 0
+
+    @property
+    def connected(self) -> bool:
+        return self.conn is not None
+
+    def connect(self) -> "IMAPMailbox":
+        config = self.config
+        if config["imap_ssl"]:
+            conn = imaplib.IMAP4_SSL(config["imap_host"], config["imap_port"], timeout=config["timeout"])
+        else:
+            conn = imaplib.IMAP4(config["imap_host"], config["imap_port"], timeout=config["timeout"])
+        try:
+            conn.login(self.user, self.password)
+            typ, data = conn.select(config["mailbox"])
+            if typ != "OK":
+                raise imaplib.IMAP4.error(f"Cannot select {config['mailbox']}: {data}")
+        except Exception:
+            conn.shutdown()
+            raise
+        self.conn = conn
+        self.supports_idle = "IDLE" in conn.capabilities
+        # UIDs are only stable within one UIDVALIDITY; failure counts are keyed on both
+        validity = conn.response("UIDVALIDITY")[1]
+        self.uid_validity = validity[0].decode() if validity and validity[0] else ""
+        return self
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.conn.logout()
+        except Exception:
+            pass  # Already dropped
+        self.conn = None
+
+    def _uid(self, command: str, *args) -> List[Any]:
+        typ, data = self.conn.uid(command, *args)
+        if typ != "OK":
+            raise imaplib.IMAP4.error(f"UID {command} failed: {data}")
+        return data
+
+    def unseen_uids(self) -> List[str]:
+        data = self._uid("SEARCH", None, "UNSEEN")
+        return [uid.decode() for uid in (data[0] or b"").split()]
+
+    def _fetch(self, uids: List[str], items: str) -> Dict[str, Dict[str, Any]]:
+        """One UID FETCH for a whole set of messages"""
+        data = join_fetch_response(self._uid("FETCH", uid_set(uids), f"(UID {items})"))
+        self.bytes_fetched += len(data)
+        return parse_fetch_items(data)
+
+    def fetch_structures(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """{uid: {"structure", "subject"}} — no message content is transferred"""
+        if not uids:
+            return {}
+        return {uid: {"structure": fields.get("BODYSTRUCTURE") or [],
+                      "subject": decode_subject(fields.get(SUBJECT_FIELD))}
+                for uid, fields in self._fetch(uids, f"BODYSTRUCTURE BODY.PEEK[{SUBJECT_SECTION}]").items()}
+
+    def fetch_sections(self, uids: List[str], sections: List[str]) -> Dict[str, Dict[str, Any]]:
+        """{uid: {section: raw}} for messages that share the same attachment sections"""
+        items = " ".join(f"BODY.PEEK[{section}]" for section in sections)
+        return {uid: {section: fields.get(f"BODY[{section}]") for section in sections}
+                for uid, fields in self._fetch(uids, items).items()}
+
+    def mark_seen(self, uids: List[str]):
+        if uids:
+            self._uid("STORE", uid_set(uids), "+FLAGS", "(\\Seen)")
+
+    def set_aside(self, uids: List[str]):
+        """Stop retrying messages that keep failing: mark them seen and flag them for review"""
+        if not uids:
+            return
+        try:
+            self._uid("STORE", uid_set(uids), "+FLAGS", f"(\\Seen {self.config['failed_keyword']})")
+        except imaplib.IMAP4.error:
+            self.mark_seen(uids)  # Server does not allow custom keywords
+
+    def idle(self, timeout: float, should_stop: Callable[[], bool] = lambda: False) -> bool:
+        """
+        Wait in IDLE until the server reports a mailbox change, `timeout` passes or
+        `should_stop()` is true. Returns whether the mailbox changed.
+        """
+        conn = self.conn
+        self._idle_count += 1
+        tag = b"IDLE%d" % self._idle_count
+        conn.send(tag + b" IDLE\r\n")
+        line = conn.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("Connection closed starting IDLE")
+        if not line.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"IDLE refused: {line!r}")
+
+        sock = conn.socket()
+        deadline = time.monotonic() + timeout
+        changed = False
+        while not changed and not should_stop():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Decrypted bytes can sit in the SSL object where select() cannot see them
+            ready = isinstance(sock, ssl.SSLSocket) and sock.pending()
+            if not ready:
+                ready, _, _ = select.select([sock], [], [], min(self.config["idle_poll"], remaining))
+            if not ready:
+                continue
+            line = conn.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed during IDLE")
+            # EXISTS, EXPUNGE and FETCH all end the wait; keepalives ("* OK Still here") do not
+            changed = line.startswith(b"* ") and not line.upper().startswith(b"* OK")
+
+        conn.send(b"DONE\r\n")
+        while True:
+            line = conn.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("Connection closed ending IDLE")
+            if line.startswith(tag + b" "):
+                if not line[len(tag) + 1:].upper().startswith(b"OK"):
+                    raise imaplib.IMAP4.error(f"IDLE failed: {line!r}")
+                return changed
+            if line.startswith(b"* ") and not line.upper().startswith(b"* OK"):
+                changed = True
+
+# ==========================
+# 📥 Ingestion
+# ==========================
+
+def wanted_parts(message: Dict[str, Any], extensions=None) -> List[Dict[str, Any]]:
+    """Supported attachment parts of a message, from its BODYSTRUCTURE"""
+    logger.info(f"Processing email: {message['subject']}")
+    wanted = []
+    for part in attachment_parts(message["structure"]):
+        if is_supported_attachment(part["filename"], extensions):
+            wanted.append(part)
+        else:
+            logger.info(f"Skipping unsupported file format: {part['filename']}")
+    return wanted
+
+def fetch_groups(plan: Dict[str, List[Dict[str, Any]]], max_bytes: int) -> List[Tuple[List[str], List[str]]]:
+    """
+    (uids, sections) fetches covering every planned part. Messages laid out alike (the
+    resume is part 2 of nearly every application) share one UID FETCH, split so that no
+    fetch is expected to return more than max_bytes.
+    """
+    by_sections: Dict[Tuple[str, ...], List[str]] = {}
+    for uid, parts in plan.items():
+        if parts:
+            by_sections.setdefault(tuple(part["section"] for part in parts), []).append(uid)
+
+    groups = []
+    for sections, uids in by_sections.items():
+        batch, batch_bytes = [], 0
+        for uid in uids:
+            size = sum(part["size"] for part in plan[uid])
+            if batch and batch_bytes + size > max_bytes:
+                groups.append((batch, list(sections)))
+                batch, batch_bytes = [], 0
+            batch.append(uid)
+            batch_bytes += size
+        groups.append((batch, list(sections)))
+    return groups
+
+def _decode_and_upload(upload: Callable[[str, bytes], None], part: Dict[str, Any], raw: Any):
+    upload(part["filename"], decode_part(raw, part["encoding"]))
+    logger.info(f"Uploaded '{part['filename']}' to Azure Blob Storage")
+
+def ingest_unseen(mailbox: IMAPMailbox, upload: Callable[[str, bytes], None],
+                  extensions=None, config: Optional[Dict[str, Any]] = None,
+                  attempts: Optional[Dict[Tuple[str, str], int]] = None) -> Dict[str, Any]:
+    """
+    Upload supported attachments of every unseen message, pipelined: while one batch of
+    attachments is decoded and uploaded on a bounded worker pool, the IMAP session fetches
+    the next batch. A message is marked seen only once all of its uploads succeeded, so a
+    failed upload is retried on the next sync. Lost connections are raised to the caller.
+
+    `attempts` counts failed syncs per message and is kept by the caller between syncs.
+    A message that fails max_message_attempts times, or whose structure cannot be parsed,
+    is set aside instead of being retried forever.
+    """
+    config = {**MAIL_INGEST_CONFIG, **(config or {})}
+    attempts = {} if attempts is None else attempts
+    result = {"emails_processed": 0, "files_uploaded": 0, "deferred": 0, "set_aside": 0, "errors": []}
+    uids = mailbox.unseen_uids()
+    logger.info(f"Found {len(uids)} unread emails")
+    if not uids:
+        return result
+
+    in_flight = deque()  # (batch uids, {uid: [(part, future)]}) awaiting uploads
+
+    def set_aside(failed_uids: List[str]):
+        mailbox.set_aside(failed_uids)
+        for uid in failed_uids:
+            attempts.pop((mailbox.uid_validity, uid), None)
+            logger.error(f"Email {uid} set aside after repeated failures (flagged {config['failed_keyword']})")
+        result["set_aside"] += len(failed_uids)
+
+    def finish(batch_uids: List[str], uploads: Dict[str, List[Tuple[Dict[str, Any], Future]]]):
+        seen, failed = [], []
+        for uid in batch_uids:
+            ok = True
+            for part, future in uploads.get(uid, []):
+                try:
+                    future.result()
+                    result["files_uploaded"] += 1
+                except Exception as upload_error:
+                    ok = False
+                    error_msg = f"Failed to upload {part['filename']}: {str(upload_error)}"
+                    logger.error(error_msg)
+                    result["errors"].append(error_msg)
+            key = (mailbox.uid_validity, uid)
+            if ok:
+                seen.append(uid)
+                attempts.pop(key, None)
+                result["emails_processed"] += 1
+            elif attempts.get(key, 0) + 1 >= config["max_message_attempts"]:
+                failed.append(uid)
+            else:
+                attempts[key] = attempts.get(key, 0) + 1
+                result["deferred"] += 1  # Stays unseen and is retried on the next sync
+        mailbox.mark_seen(seen)
+        set_aside(failed)
+
+    with ThreadPoolExecutor(max_workers=config["upload_concurrency"], thread_name_prefix="mail-upload") as pool:
+        try:
+            batch_size = config["fetch_batch_size"]
+            for offset in range(0, len(uids), batch_size):
+                batch = uids[offset:offset + batch_size]
+                structures = mailbox.fetch_structures(batch)
+                batch = [uid for uid in batch if uid in structures]  # Others were expunged since the search
+
+                plan, unreadable = {}, []
+                for uid in batch:
+                    try:
+                        plan[uid] = wanted_parts(structures[uid], extensions)
+                    except Exception as email_error:
+                        # The same structure fails the same way on every sync
+                        error_msg = f"Error processing email {uid}: {str(email_error)}"
+                        logger.error(error_msg)
+                        result["errors"].append(error_msg)
+                        unreadable.append(uid)
+                set_aside(unreadable)
+                batch = [uid for uid in batch if uid in plan]
+
+                uploads: Dict[str, List[Tuple[Dict[str, Any], Future]]] = {}
+                for group_uids, sections in fetch_groups(plan, config["fetch_max_bytes"]):
+                    for uid, raw_sections in mailbox.fetch_sections(group_uids, sections).items():
+                        uploads[uid] = [(part, pool.submit(_decode_and_upload, upload, part, raw_sections[part["section"]]))
+                                        for part in plan[uid]]
+                for uid in batch:
+                    if plan[uid] and uid not in uploads:
+                        uploads[uid] = []  # Vanished between fetches; nothing to upload
+                in_flight.append((batch, uploads))
+
+                # Keep a bounded number of batches in memory while the next one is fetched
+                while len(in_flight) >= config["batches_in_flight"]:
+                    finish(*in_flight.popleft())
+            while in_flight:
+                finish(*in_flight.popleft())
+        except (imaplib.IMAP4.abort, OSError):
+            # Uploads already running are left to complete; their messages stay unseen
+            for _, uploads in in_flight:
+                for parts in uploads.values():
+                    for _, future in parts:
+                        future.cancel()
+            raise
+    return result
+
+class MailboxIngester:
+    """
+    Long-running ingestion over one IMAP session kept in IDLE, so new mail is picked up
+    within seconds of arriving. A dropped session is reconnected with exponential backoff
+    and the unseen backlog is caught up on every (re)connect.
+    """
+
+    def __init__(self, mailbox_factory: Callable[[], IMAPMailbox], upload: Callable[[str, bytes], None],
+                 on_sync: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        self.mailbox_factory = mailbox_factory
+        self.upload = upload
+        self.on_sync = on_sync
+        self.config = {**MAIL_INGEST_CONFIG, **(config or {})}
+        self.stats = {"connected": False, "syncs": 0, "reconnects": 0, "bytes_fetched": 0, "last_error": None}
+        self._attempts: Dict[Tuple[str, str], int] = {}  # Failed syncs per (UIDVALIDITY, UID), across reconnects
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._synced = threading.Condition()
+        self._syncing = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="imap-idle-ingester", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request_sync(self, timeout: float = 60.0) -> bool:
+        """Interrupt IDLE and wait for a sync that started after this call"""
+        with self._synced:
+            target = self.stats["syncs"] + (2 if self._syncing else 1)
+            self._wake.set()
+            return self._synced.wait_for(lambda: self.stats["syncs"] >= target, timeout)
+
+    def _sync(self, mailbox: IMAPMailbox):
+        with self._synced:
+            self._syncing = True
+        self._wake.clear()
+        try:
+            result = ingest_unseen(mailbox, self.upload, self.config["supported_extensions"], self.config,
+                                   attempts=self._attempts)
+        finally:
+            with self._synced:
+                self._syncing = False
+                self.stats["syncs"] += 1
+                self.stats["bytes_fetched"] = mailbox.bytes_fetched
+                self._synced.notify_all()
+        if self.on_sync:
+            self.on_sync(result)
+
+    def run(self):
+        failures = 0
+        mailbox: Optional[IMAPMailbox] = None
+        while not self._stop.is_set():
+            try:
+                if mailbox is None:
+                    mailbox = self.mailbox_factory().connect()
+                    self.stats["connected"] = True
+                    if failures:
+                        self.stats["reconnects"] += 1
+                        logger.info("IMAP session re-established")
+                    failures = 0
+                    if not mailbox.supports_idle:
+                        logger.warning("IMAP server does not support IDLE; polling instead")
+
+                self._sync(mailbox)
+                if mailbox.supports_idle:
+                    mailbox.idle(self.config["idle_timeout"], lambda: self._stop.is_set() or self._wake.is_set())
+                else:
+                    self._wake.wait(self.config["poll_interval"])
+                    mailbox.conn.noop()
+            except Exception as e:
+                failures += 1
+                delay = min(self.config["reconnect_base"] * 2 ** (failures - 1), self.config["reconnect_max"])
+                self.stats.update(connected=False, last_error=str(e))
+                logger.warning(f"IMAP ingestion interrupted ({str(e)}); reconnecting in {delay:.0f}s")
+                if mailbox is not None:
+                    mailbox.close()
+                    mailbox = None
+                self._stop.wait(delay)
+        if mailbox is not None:
+            mailbox.close()
+        self.stats["connected"] = False
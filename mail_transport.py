@@ -0,0 +1,205 @@
+# mail_transport.py — Pooled, persistent SMTP sessions with per-minute send limits
+
+import logging
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from constants import MAIL_TRANSPORT_CONFIG
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Errors after which a pooled session is dropped and the message retried on a fresh one
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+# A message, its sender and its recipients; the message may be a built MIME object or its text
+# A message may be passed as a factory so its MIME is only built when it is sent
+MessageSource = Union[Message, str, Callable[[], Union[Message, str]]]
+OutgoingMail = Tuple[MessageSource, str, Union[str, List[str]]]
+
+class SendRateLimiter:
+    """Sliding one-minute window on messages sent, shared by every sending thread"""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._sent = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.per_minute <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= 60.0:
+                    self._sent.popleft()
+                if len(self._sent) < self.per_minute:
+                    self._sent.append(now)
+                    return
+                wait = 60.0 - (now - self._sent[0])
+            time.sleep(wait)
+
+class _PooledSession:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+class SMTPConnectionPool:
+    """
+    Authenticated SMTP sessions reused across messages. A session is opened (connect,
+    STARTTLS, login) only when none is idle, checked with NOOP after sitting idle, and
+    replaced after max_messages_per_connection or when the server drops it.
+    """
+
+    def __init__(self, host: str, port: int, user: str = "", password: str = "", use_tls: bool = True,
+                 config: Optional[Dict[str, Any]] = None):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.config = {**MAIL_TRANSPORT_CONFIG, **(config or {})}
+        self._slots = threading.BoundedSemaphore(self.config["pool_size"])
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.stats = {"connections_opened": 0, "reconnects": 0, "messages_sent": 0}
+
+    def _open(self) -> _PooledSession:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.config["timeout"])
+        try:
+            if self.use_tls:
+                server.starttls(context=ssl.create_default_context())
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            self._quit(server)
+            raise
+        with self._lock:
+            self.stats["connections_opened"] += 1
+        return _PooledSession(server)
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _is_alive(self, session: _PooledSession) -> bool:
+        if time.monotonic() - session.last_used < self.config["idle_check_seconds"]:
+            return True
+        try:
+            return session.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> _PooledSession:
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    session = self._idle.pop() if self._idle else None
+                if session is None:
+                    return self._open()
+                if self._is_alive(session):
+                    return session
+                self._quit(session.server)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, session: _PooledSession, reusable: bool):
+        if reusable and session.messages_sent < self.config["max_messages_per_connection"]:
+            session.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(session)
+        else:
+            self._quit(session.server)
+        self._slots.release()
+
+    def send(self, message: MessageSource, from_addr: str, to_addrs: Union[str, List[str]]):
+        """Send on a pooled session; a dropped session is replaced and the send retried once"""
+        if callable(message):
+            message = message()
+        payload = message if isinstance(message, str) else message.as_string()
+        for attempt in range(2):
+            session = self._checkout()
+            try:
+                session.server.sendmail(from_addr, to_addrs, payload)
+            except RECONNECT_ERRORS as e:
+                self._checkin(session, reusable=False)
+                if attempt == 1:
+                    raise
+                logger.warning(f"SMTP session dropped ({str(e)}); reconnecting")
+                with self._lock:
+                    self.stats["reconnects"] += 1
+                continue
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # The server answered (e.g. mailbox unavailable); the session is still usable
+                self._checkin(session, reusable=True)
+                raise
+            except Exception:
+                self._checkin(session, reusable=False)
+                raise
+            session.messages_sent += 1
+            self._checkin(session, reusable=True)
+            with self._lock:
+                self.stats["messages_sent"] += 1
+            return
+
+    def close(self):
+        """Log out of every idle session"""
+        with self._lock:
+            sessions, self._idle = list(self._idle), deque()
+        for session in sessions:
+            self._quit(session.server)
+
+class MailTransport:
+    """Pooled sessions plus the provider's per-minute limit; sends one message or many concurrently"""
+
+    def __init__(self, pool: SMTPConnectionPool, config: Optional[Dict[str, Any]] = None):
+        self.pool = pool
+        self.config = {**MAIL_TRANSPORT_CONFIG, **(config or {})}
+        self.limiter = SendRateLimiter(self.config["max_per_minute"])
+
+    def send(self, message: MessageSource, from_addr: str, to_addrs: Union[str, List[str]]):
+        self.limiter.acquire()
+        self.pool.send(message, from_addr, to_addrs)
+
+    def send_many(self, mails: Iterable[OutgoingMail], concurrency: Optional[int] = None,
+                  progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Optional[Exception]]:
+        """
+        Send messages over the pool with up to `concurrency` in flight (never more than
+        the pool size). Returns the error for each message in order, None when sent.
+        """
+        mails = list(mails)
+        concurrency = min(concurrency or self.config["send_concurrency"], self.config["pool_size"])
+        errors: List[Optional[Exception]] = [None] * len(mails)
+        done = 0
+        done_lock = threading.Lock()
+
+        def deliver(index: int):
+            nonlocal done
+            message, from_addr, to_addrs = mails[index]
+            try:
+                self.send(message, from_addr, to_addrs)
+            except Exception as e:
+                errors[index] = e
+            if progress_callback:
+                with done_lock:
+                    done += 1
+                    progress_callback(done, len(mails))
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            list(executor.map(deliver, range(len(mails))))
+        return errors
+
+    def close(self):
+        self.pool.close()
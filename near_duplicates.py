@@ -0,0 +1,129 @@
+# near_duplicates.py — MinHash signatures and an LSH index for near-duplicate resumes
+#
+# Candidates often send several lightly edited versions of one CV. Each resume gets a
+# MinHash signature over word shingles of its normalized text; signatures are split into
+# bands and bucketed, so finding resumes similar to a new one only touches the buckets it
+# falls into instead of comparing it with every resume in the pool.
+
+import logging
+import zlib
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from constants import NEAR_DUPLICATE_CONFIG
+from utils import comparable_resume_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+class MinHasher:
+    """MinHash signatures from universal hashes (a * x + b) mod p over 32-bit shingle hashes"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # a, b < 2^32 keep a * x + b within uint64 for 32-bit x
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def shingle_hashes(self, normalized: str) -> np.ndarray:
+        words = normalized.split()
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                           dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a resume, or None when the text is too short to compare"""
+        normalized = comparable_resume_text(text)
+        if normalized is None:
+            return None
+        hashes = self.shingle_hashes(normalized)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return float(np.mean(first == second))
+
+class NearDuplicateIndex:
+    """
+    LSH index over MinHash signatures. Only cluster representatives are added, so each
+    new resume is either linked to an existing representative or becomes one itself.
+    Not thread-safe; the pipeline uses it from its event loop only.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**NEAR_DUPLICATE_CONFIG, **(config or {})}
+        self.hasher = MinHasher(self.config["num_perm"], self.config["shingle_size"])
+        self.bands = self.config["bands"]
+        self.rows = self.config["num_perm"] // self.bands
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        return self.hasher.signature(text)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: Hashable, signature: np.ndarray) -> None:
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Drop a representative, e.g. one whose evaluation failed, so its cluster can form again"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in self._band_keys(signature):
+            bucket = self._buckets[band][band_key]
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[band][band_key]
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[Hashable, float]]:
+        """Most similar indexed resume at or above the threshold, as (key, similarity)"""
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        best = None
+        for key in candidates:
+            similarity = estimate_similarity(signature, self._signatures[key])
+            if similarity >= self.config["threshold"] and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def find_or_add(self, key: Hashable, signature: np.ndarray) -> Optional[Tuple[Hashable, float]]:
+        """The representative this resume duplicates, or None after adding it as a new representative"""
+        match = self.query(signature)
+        if match is None:
+            self.add(key, signature)
+        return match
+
+def cluster_near_duplicates(texts: Dict[Hashable, str],
+                            config: Optional[Dict[str, Any]] = None) -> Dict[Hashable, Hashable]:
+    """Map each resume that near-duplicates an earlier one (in order) to that representative"""
+    index = NearDuplicateIndex(config)
+    links = {}
+    for key, text in texts.items():
+        signature = index.signature(text)
+        if signature is None:
+            continue
+        match = index.find_or_add(key, signature)
+        if match:
+            links[key] = match[0]
+    return links
@@ -8,8 +8,35 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.platypus.flowables import HRFlowable
 from io import BytesIO
+import contextlib
+import copy
+import json
+import logging
+import os
 import textwrap
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+from constants import AZURE_CONFIG, PERFORMANCE_CONFIG
+from utils import BoundedCache, compute_content_hash, save_summary_to_blob
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bulk summary outputs: a ZIP of per-candidate PDFs or one merged PDF
+SUMMARY_BUNDLE_FORMATS = {
+    "zip": "application/zip",
+    "pdf": "application/pdf"
+}
 
 def wrap_text(text, width):
     """Wrap text to fit within specified width"""
@@ -33,7 +60,161 @@ def wrap_text(text, width):
     
     return wrapped_lines
 
+_summary_styles = None
+
+def get_summary_styles():
+    """Paragraph styles for summary PDFs, created once per process"""
+    global _summary_styles
+    if _summary_styles is not None:
+        return _summary_styles
+    
+    base = getSampleStyleSheet()
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=base['Normal'],
+        fontSize=10,
+        spaceAfter=8,
+        leading=12
+    )
+    
+    def verdict_style(color):
+        return ParagraphStyle(
+            'VerdictStyle',
+            parent=base['Normal'],
+            fontSize=14,
+            textColor=HexColor(color),
+            fontName='Helvetica-Bold',
+            alignment=1
+        )
+    
+    _summary_styles = {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=base['Heading1'],
+            fontSize=16,
+            spaceAfter=20,
+            textColor=HexColor('#2E86AB'),
+            alignment=1  # Center alignment
+        ),
+        'header': ParagraphStyle(
+            'CustomHeader',
+            parent=base['Heading2'],
+            fontSize=12,
+            spaceAfter=10,
+            textColor=HexColor('#A23B72'),
+            spaceBefore=15
+        ),
+        'normal': normal_style,
+        'verdict': {
+            'SHORTLIST': verdict_style('#10B981'),
+            'REJECT': verdict_style('#EF4444'),
+            'REVIEW': verdict_style('#F59E0B')
+        },
+        'flag': ParagraphStyle('FlagStyle', parent=normal_style, textColor=HexColor('#EF4444')),
+        'reject': ParagraphStyle('RejectStyle', parent=normal_style, textColor=HexColor('#EF4444')),
+        'notes': ParagraphStyle(
+            'NotesStyle',
+            parent=normal_style,
+            backColor=HexColor('#F9FAFB'),
+            borderColor=HexColor('#E5E7EB'),
+            borderWidth=1,
+            leftIndent=10,
+            rightIndent=10,
+            spaceAfter=10,
+            spaceBefore=5
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=base['Normal'],
+            fontSize=8,
+            textColor=HexColor('#6B7280'),
+            alignment=1  # Center
+        )
+    }
+    return _summary_styles
+
+# Section headings; parsed once into static flowables
+SECTION_HEADINGS = {
+    'contact': "👤 CANDIDATE INFORMATION",
+    'scores': "📊 ASSESSMENT SCORES",
+    'fitment': "📌 FITMENT ANALYSIS",
+    'summary': "📝 PROFESSIONAL SUMMARY",
+    'highlights': "🌟 KEY HIGHLIGHTS",
+    'red_flags': "🚩 AREAS OF CONCERN",
+    'missing_gaps': "❓ INFORMATION GAPS",
+    'notes': "🗒️ RECRUITER NOTES",
+    'rejection': "❌ REJECTION REASONS",
+    'recommendation': "🎯 RECOMMENDATIONS"
+}
+
+_static_flowables = None
+
+def _static(name):
+    """
+    A copy of a pre-built piece of page furniture (title, rules, section headings).
+    The markup is parsed once per process; each document gets its own shallow copy
+    so layout state is never shared between concurrent builds.
+    """
+    global _static_flowables
+    if _static_flowables is None:
+        styles = get_summary_styles()
+        flowables = {
+            'title': Paragraph("📄 CANDIDATE FITMENT ANALYSIS", styles['title']),
+            'title_rule': HRFlowable(width="100%", thickness=1, color=HexColor('#2E86AB')),
+            'footer_rule': HRFlowable(width="100%", thickness=0.5, color=HexColor('#E5E7EB'))
+        }
+        for key, heading in SECTION_HEADINGS.items():
+            flowables[key] = Paragraph(heading, styles['header'])
+        _static_flowables = flowables
+    return copy.copy(_static_flowables[name])
+
+CONTACT_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+SCORES_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, black),
+    ('BACKGROUND', (0, 0), (-1, 0), HexColor('#F3F4F6')),
+    ('ALIGN', (1, 1), (1, -1), 'CENTER'),
+    ('ALIGN', (2, 1), (2, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+# Candidate fields that appear in the summary; the render cache is keyed on these
+SUMMARY_PDF_FIELDS = (
+    'name', 'email', 'phone', 'jd_role', 'score', 'verdict', 'jd_similarity', 'skills_match',
+    'domain_match', 'experience_match', 'fitment', 'summary_5_lines', 'highlights', 'red_flags',
+    'missing_gaps', 'recruiter_notes', 'reasons_if_rejected', 'recommendation', 'analysis_date'
+)
+
+_pdf_cache = BoundedCache(maxsize=PERFORMANCE_CONFIG["pdf_cache_size"])
+
+def summary_cache_key(candidate: Mapping) -> str:
+    """Hash of the fields the summary shows; unchanged candidates map to the same key"""
+    fields = {field: candidate.get(field) for field in SUMMARY_PDF_FIELDS}
+    return compute_content_hash(json.dumps(fields, sort_keys=True, default=str))
+
 def generate_summary_pdf(candidate):
+    """
+    Summary PDF for a candidate. Rendered PDFs are cached by the hash of the fields
+    they show, so regenerating an unchanged candidate returns the earlier bytes
+    without any layout work. The page therefore carries nothing that changes between
+    renders, such as the generation time.
+    """
+    key = summary_cache_key(candidate)
+    pdf_bytes = _pdf_cache.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = _render_summary_pdf(candidate)
+        _pdf_cache.set(key, pdf_bytes)
+    return pdf_bytes
+
+def _render_summary_pdf(candidate):
     """Generate a professional, properly formatted PDF summary"""
     buffer = BytesIO()
     
@@ -48,55 +229,20 @@ def generate_summary_pdf(candidate):
         title=f"Resume Analysis - {candidate.get('name', 'Unknown')}"
     )
     
-    # Get styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=20,
-        textColor=HexColor('#2E86AB'),
-        alignment=1  # Center alignment
-    )
-    
-    header_style = ParagraphStyle(
-        'CustomHeader',
-        parent=styles['Heading2'],
-        fontSize=12,
-        spaceAfter=10,
-        textColor=HexColor('#A23B72'),
-        spaceBefore=15
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        spaceAfter=8,
-        leading=12
-    )
-    
-    bold_style = ParagraphStyle(
-        'CustomBold',
-        parent=styles['Normal'],
-        fontSize=10,
-        spaceAfter=8,
-        leading=12,
-        fontName='Helvetica-Bold'
-    )
+    # Styles are built once per process and shared by every summary
+    styles = get_summary_styles()
+    normal_style = styles['normal']
     
     # Story elements
     story = []
     
     # Title
-    story.append(Paragraph("📄 CANDIDATE FITMENT ANALYSIS", title_style))
-    story.append(HRFlowable(width="100%", thickness=1, color=HexColor('#2E86AB')))
+    story.append(_static('title'))
+    story.append(_static('title_rule'))
     story.append(Spacer(1, 15))
     
     # Contact Information Section
-    story.append(Paragraph("👤 CANDIDATE INFORMATION", header_style))
+    story.append(_static('contact'))
     
     # Contact info table
     contact_data = [
@@ -104,22 +250,16 @@ def generate_summary_pdf(candidate):
         ['Email:', candidate.get('email', 'N/A')],
         ['Phone:', candidate.get('phone', 'N/A')],
         ['Target Role:', candidate.get('jd_role', 'N/A')],
-        ['Analysis Date:', datetime.now().strftime('%Y-%m-%d %H:%M')]
+        ['Analysis Date:', candidate.get('analysis_date', 'N/A')]
     ]
     
     contact_table = Table(contact_data, colWidths=[30*mm, 120*mm])
-    contact_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
+    contact_table.setStyle(CONTACT_TABLE_STYLE)
     story.append(contact_table)
     story.append(Spacer(1, 15))
     
     # Scoring Section
-    story.append(Paragraph("📊 ASSESSMENT SCORES", header_style))
+    story.append(_static('scores'))
     
     # Score data with color coding
     def get_score_color(score):
@@ -164,36 +304,19 @@ def generate_summary_pdf(candidate):
         scores_data.append([label, score_display, status])
     
     scores_table = Table(scores_data, colWidths=[60*mm, 30*mm, 50*mm])
-    scores_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, black),
-        ('BACKGROUND', (0, 0), (-1, 0), HexColor('#F3F4F6')),
-        ('ALIGN', (1, 1), (1, -1), 'CENTER'),
-        ('ALIGN', (2, 1), (2, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
+    scores_table.setStyle(SCORES_TABLE_STYLE)
     story.append(scores_table)
     story.append(Spacer(1, 15))
     
     # Verdict Section
     verdict = candidate.get('verdict', 'N/A').upper()
-    verdict_color = HexColor('#10B981') if verdict == 'SHORTLIST' else HexColor('#EF4444') if verdict == 'REJECT' else HexColor('#F59E0B')
-    
-    verdict_style = ParagraphStyle(
-        'VerdictStyle',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=verdict_color,
-        fontName='Helvetica-Bold',
-        alignment=1
-    )
+    verdict_style = styles['verdict'].get(verdict, styles['verdict']['REVIEW'])
     
     story.append(Paragraph(f"🏆 FINAL VERDICT: {verdict}", verdict_style))
     story.append(Spacer(1, 15))
     
     # Fitment Summary
-    story.append(Paragraph("📌 FITMENT ANALYSIS", header_style))
+    story.append(_static('fitment'))
     fitment_text = candidate.get('fitment', 'No analysis available')
     
     # Wrap and format fitment text
@@ -202,7 +325,7 @@ def generate_summary_pdf(candidate):
     story.append(Spacer(1, 15))
     
     # Professional Summary
-    story.append(Paragraph("📝 PROFESSIONAL SUMMARY", header_style))
+    story.append(_static('summary'))
     summary_text = candidate.get('summary_5_lines', 'No summary available')
     summary_wrapped = '\n'.join(wrap_text(summary_text, 80))
     story.append(Paragraph(summary_wrapped, normal_style))
@@ -211,7 +334,7 @@ def generate_summary_pdf(candidate):
     # Highlights Section
     highlights = candidate.get('highlights', [])
     if highlights and isinstance(highlights, list) and len(highlights) > 0:
-        story.append(Paragraph("🌟 KEY HIGHLIGHTS", header_style))
+        story.append(_static('highlights'))
         for highlight in highlights[:8]:  # Limit to 8 highlights
             story.append(Paragraph(f"• {highlight}", normal_style))
         story.append(Spacer(1, 15))
@@ -219,20 +342,15 @@ def generate_summary_pdf(candidate):
     # Red Flags Section
     red_flags = candidate.get('red_flags', [])
     if red_flags and isinstance(red_flags, list) and len(red_flags) > 0:
-        story.append(Paragraph("🚩 AREAS OF CONCERN", header_style))
+        story.append(_static('red_flags'))
         for flag in red_flags[:8]:  # Limit to 8 flags
-            flag_style = ParagraphStyle(
-                'FlagStyle',
-                parent=normal_style,
-                textColor=HexColor('#EF4444')
-            )
-            story.append(Paragraph(f"• {flag}", flag_style))
+            story.append(Paragraph(f"• {flag}", styles['flag']))
         story.append(Spacer(1, 15))
     
     # Missing Information
     missing_gaps = candidate.get('missing_gaps', [])
     if missing_gaps and isinstance(missing_gaps, list) and len(missing_gaps) > 0:
-        story.append(Paragraph("❓ INFORMATION GAPS", header_style))
+        story.append(_static('missing_gaps'))
         for gap in missing_gaps[:8]:  # Limit to 8 gaps
             story.append(Paragraph(f"• {gap}", normal_style))
         story.append(Spacer(1, 15))
@@ -240,64 +358,197 @@ def generate_summary_pdf(candidate):
     # Recruiter Notes
     notes = candidate.get('recruiter_notes', '').strip()
     if notes and notes != 'N/A':
-        story.append(Paragraph("🗒️ RECRUITER NOTES", header_style))
+        story.append(_static('notes'))
         notes_wrapped = '\n'.join(wrap_text(notes, 80))
-        notes_style = ParagraphStyle(
-            'NotesStyle',
-            parent=normal_style,
-            backColor=HexColor('#F9FAFB'),
-            borderColor=HexColor('#E5E7EB'),
-            borderWidth=1,
-            leftIndent=10,
-            rightIndent=10,
-            spaceAfter=10,
-            spaceBefore=5
-        )
-        story.append(Paragraph(notes_wrapped, notes_style))
+        story.append(Paragraph(notes_wrapped, styles['notes']))
         story.append(Spacer(1, 15))
     
     # Rejection Reasons (if applicable)
     if verdict == 'REJECT':
         rejection_reasons = candidate.get('reasons_if_rejected', [])
         if rejection_reasons and isinstance(rejection_reasons, list):
-            story.append(Paragraph("❌ REJECTION REASONS", header_style))
+            story.append(_static('rejection'))
             for reason in rejection_reasons[:6]:
-                reason_style = ParagraphStyle(
-                    'RejectStyle',
-                    parent=normal_style,
-                    textColor=HexColor('#EF4444')
-                )
-                story.append(Paragraph(f"• {reason}", reason_style))
+                story.append(Paragraph(f"• {reason}", styles['reject']))
             story.append(Spacer(1, 15))
     
     # Recommendations
     recommendation = candidate.get('recommendation', '').strip()
     if recommendation and recommendation != 'N/A':
-        story.append(Paragraph("🎯 RECOMMENDATIONS", header_style))
+        story.append(_static('recommendation'))
         rec_wrapped = '\n'.join(wrap_text(recommendation, 80))
         story.append(Paragraph(rec_wrapped, normal_style))
         story.append(Spacer(1, 15))
     
     # Footer
     story.append(Spacer(1, 30))
-    story.append(HRFlowable(width="100%", thickness=0.5, color=HexColor('#E5E7EB')))
-    
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=HexColor('#6B7280'),
-        alignment=1  # Center
-    )
+    story.append(_static('footer_rule'))
     
     story.append(Paragraph(
-        f"Generated by EAZYAI Resume Screener | {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Confidential Document",
-        footer_style
+        "Generated by EAZYAI Resume Screener | Confidential Document",
+        styles['footer']
     ))
     
     doc.build(story)
     buffer.seek(0)
     return buffer.getvalue()
-    c.showPage()
-    c.save()
-    buffer.seek(0)
\ No newline at end of file
+
+# ==========================
+# 📦 Bulk Summary Generation
+# ==========================
+
+def summary_pdf_fields(row: Mapping, default_role: str = "N/A") -> Dict[str, Any]:
+    """Fields of a results row used by generate_summary_pdf, with the card's fallbacks"""
+    def score(key):
+        value = row.get(key, 0)
+        try:
+            return int(float(value)) if value == value else 0
+        except (ValueError, TypeError):
+            return 0
+    
+    def text(key, default=""):
+        value = row.get(key, default)
+        return value if isinstance(value, str) else default
+    
+    def items(key):
+        value = row.get(key, [])
+        return list(value) if isinstance(value, (list, tuple)) else []
+    
+    def date(key):
+        value = row.get(key)
+        try:
+            return datetime.fromtimestamp(float(value)).strftime('%Y-%m-%d %H:%M')
+        except (ValueError, TypeError, OverflowError, OSError):
+            return 'N/A'
+    
+    fitment = text('fitment', 'N/A')
+    if fitment in ('', 'None'):
+        fitment = 'Analysis pending'
+    if len(fitment) > 200:
+        fitment = fitment[:200] + "..."
+    
+    return {
+        "name": text('name', 'Unknown'),
+        "email": text('email', 'N/A'),
+        "phone": text('phone', 'N/A'),
+        "jd_role": text('jd_role', default_role),
+        "score": score('score'),
+        "verdict": str(row.get('verdict', 'review')),
+        "jd_similarity": score('jd_similarity'),
+        "skills_match": score('skills_match'),
+        "domain_match": score('domain_match'),
+        "experience_match": score('experience_match'),
+        "fitment": fitment,
+        "summary_5_lines": text('summary_5_lines', 'Summary not available'),
+        "highlights": items('highlights'),
+        "red_flags": items('red_flags'),
+        "missing_gaps": items('missing_gaps'),
+        "reasons_if_rejected": items('reasons_if_rejected'),
+        "recommendation": text('recommendation'),
+        "recruiter_notes": text('recruiter_notes'),
+        "fraud_detected": bool(row.get('fraud_detected', False)),
+        "analysis_date": date('analysis_timestamp')
+    }
+
+def summary_file_name(candidate_name: str) -> str:
+    return f"{str(candidate_name).replace(' ', '_')}_Summary.pdf"
+
+def _unique_file_names(candidates: Sequence[Mapping]) -> List[str]:
+    """Per-candidate file names; repeated names get a numeric suffix so ZIP entries do not collide"""
+    seen: Dict[str, int] = {}
+    names = []
+    for candidate in candidates:
+        name = summary_file_name(candidate.get('name', 'Unknown'))
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        names.append(name if count == 1 else name.replace("_Summary.pdf", f"_{count}_Summary.pdf"))
+    return names
+
+def render_summary_pdfs(candidates: Sequence[Mapping], workers: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Summary PDFs in input order. Cached summaries are returned as-is; only changed
+    candidates are laid out. Layout is CPU-bound, so large batches of misses are
+    rendered in a process pool; each worker builds the styles once and reuses them.
+    """
+    keys = [summary_cache_key(candidate) for candidate in candidates]
+    cached = [_pdf_cache.get(key) for key in keys]
+    misses = [candidate for candidate, pdf_bytes in zip(candidates, cached) if pdf_bytes is None]
+    
+    workers = workers or PERFORMANCE_CONFIG["pdf_workers"]
+    with contextlib.ExitStack() as stack:
+        if workers <= 1 or len(misses) < PERFORMANCE_CONFIG["pdf_pool_min_batch"]:
+            rendered = map(_render_summary_pdf, misses)
+        else:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            chunksize = max(1, len(misses) // (workers * 4))
+            rendered = pool.map(_render_summary_pdf, misses, chunksize=chunksize)
+        
+        for key, pdf_bytes in zip(keys, cached):
+            if pdf_bytes is None:
+                pdf_bytes = next(rendered)
+                _pdf_cache.set(key, pdf_bytes)
+            yield pdf_bytes
+
+def merge_summary_pdfs(pdfs: Iterator[bytes], sink: IO[bytes]) -> int:
+    """Append each PDF to one document written to sink; returns the number merged"""
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("Merged PDF output needs PyMuPDF (pip install PyMuPDF) - or use ZIP")
+    merged = fitz.open()
+    count = 0
+    for pdf_bytes in pdfs:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            merged.insert_pdf(doc)
+        count += 1
+    merged.save(sink, garbage=3, deflate=True)
+    merged.close()
+    return count
+
+def generate_summary_bundle(candidates: Sequence[Mapping], sink: IO[bytes], fmt: str = "zip",
+                            upload: bool = False, container: Optional[str] = None, workers: Optional[int] = None,
+                            progress_callback=None) -> Dict[str, Any]:
+    """
+    Render summaries for many candidates and stream them into one ZIP (an entry per
+    candidate) or one merged PDF. With upload, each PDF is also saved to the summaries
+    container as soon as it is rendered, several at a time, while rendering continues.
+    """
+    if fmt not in SUMMARY_BUNDLE_FORMATS:
+        raise ValueError(f"Unknown summary bundle format: {fmt}")
+    container = container or AZURE_CONFIG["summaries_container"]
+    
+    start = time.time()
+    file_names = _unique_file_names(candidates)
+    uploader = ThreadPoolExecutor(max_workers=PERFORMANCE_CONFIG["summary_upload_concurrency"]) \
+        if upload else None
+    uploads = []
+    
+    def rendered() -> Iterator[bytes]:
+        for index, pdf_bytes in enumerate(render_summary_pdfs(candidates, workers)):
+            if uploader:
+                uploads.append(uploader.submit(save_summary_to_blob, pdf_bytes, file_names[index], container))
+            if progress_callback:
+                progress_callback(index + 1, len(candidates))
+            yield pdf_bytes
+    
+    try:
+        if fmt == "zip":
+            # PDFs are already compressed; storing them keeps the ZIP step cheap
+            with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+                for index, pdf_bytes in enumerate(rendered()):
+                    archive.writestr(file_names[index], pdf_bytes)
+        else:
+            merge_summary_pdfs(rendered(), sink)
+    finally:
+        if uploader:
+            uploader.shutdown(wait=True)
+    
+    uploaded = sum(1 for future in uploads if not future.exception() and future.result())
+    elapsed = time.time() - start
+    logger.info(f"Generated {len(candidates)} summaries ({fmt}) in {elapsed:.2f}s"
+                + (f", uploaded {uploaded}/{len(uploads)}" if uploader else ""))
+    return {
+        "count": len(candidates),
+        "uploaded": uploaded,
+        "upload_failures": len(uploads) - uploaded,
+        "processing_time": elapsed,
+        "pdfs_per_second": len(candidates) / elapsed if elapsed > 0 else 0.0
+    }
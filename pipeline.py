@@ -0,0 +1,462 @@
+# pipeline.py — Streamlit-free screening pipeline: load, parse, embed, evaluate and verdict
+
+import asyncio
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from azure.storage.blob import BlobServiceClient, ContainerClient
+
+from constants import (
+    AZURE_CONFIG, DEFAULT_THRESHOLDS, MODEL_ROUTING_CONFIG, NEAR_DUPLICATE_CONFIG, PERFORMANCE_CONFIG,
+    RESUME_BLOB_CONFIG
+)
+from utils import (
+    parse_resume,
+    get_text_chunks,
+    get_embedding_cached,
+    get_cosine_similarity,
+    upload_to_blob,
+    extract_contact_info,
+    compute_content_hash,
+    compute_text_fingerprint,
+    legacy_candidate_id,
+    extract_skills_from_text,
+    is_supported_resume_format
+)
+from backend import (
+    get_resume_analysis_async,
+    get_resume_analysis_tiered_async,
+    preprocess_jd_async,
+    request_scheduler,
+    start_routing_stats
+)
+from resilience import get_dependency_guard, get_resilience_status, CircuitOpenError, AZURE_BLOB
+from near_duplicates import NearDuplicateIndex
+from resume_index import blob_partition_date, ingest_resume, partition_prefixes, resume_file_name, tag_query
+from run_journal import RunJournal
+from scoring import apply_verdicts, ensure_score_columns
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int, str], None]
+
+# ==========================
+# 📥 Resume Sources
+# ==========================
+
+def get_resumes_container_client() -> ContainerClient:
+    """Container client for the resumes container"""
+    blob_service_client = BlobServiceClient.from_connection_string(AZURE_CONFIG["connection_string"])
+    return blob_service_client.get_container_client(AZURE_CONFIG["resumes_container"])
+
+def window_start(days: Optional[int] = None) -> Optional[date]:
+    """First day of a listing window of `days` days ending today (UTC); None lists everything"""
+    days = RESUME_BLOB_CONFIG["window_days"] if days is None else days
+    if days <= 0:
+        return None
+    return datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
+def list_resume_blob_names(container_client: Optional[ContainerClient] = None, since: Optional[date] = None,
+                           until: Optional[date] = None, sources: Optional[Sequence[str]] = None,
+                           jd_tag: Optional[str] = None) -> List[str]:
+    """
+    Names of supported resume blobs, without downloading them. With a time window only
+    the <source>/<YYYY>/<MM>/<DD>/ partitions inside it are listed, plus top-level blobs
+    stored before partitioning that were modified inside it; with a JD tag the blob index
+    is queried instead. Without either, the whole container is listed.
+    """
+    container_client = container_client or get_resumes_container_client()
+    blob_guard = get_dependency_guard(AZURE_BLOB)
+
+    if jd_tag:
+        query = tag_query(since, until, sources, jd_tag)
+        names = [blob.name for blob in blob_guard.call(lambda: list(container_client.find_blobs_by_tags(query)))]
+    elif since is not None:
+        names = []
+        for prefix in partition_prefixes(since, until, sources):
+            blobs = blob_guard.call(lambda p=prefix: list(container_client.list_blobs(name_starts_with=p)))
+            names.extend(blob.name for blob in blobs)
+        # Month prefixes can reach outside the window
+        until = until or datetime.now(timezone.utc).date()
+        names = [name for name in names if since <= (blob_partition_date(name) or since) <= until]
+        if not sources:
+            # Resumes stored before partitioning sit at the top level; one delimited listing finds them
+            top_level = blob_guard.call(lambda: list(container_client.walk_blobs(delimiter="/")))
+            names.extend(blob.name for blob in top_level
+                         if not blob.name.endswith("/") and since <= blob.last_modified.date() <= until)
+    else:
+        names = [blob.name for blob in blob_guard.call(lambda: list(container_client.list_blobs()))]
+    return [name for name in names if is_supported_resume_format(name)]
+
+def load_resumes_from_blob(container_client: Optional[ContainerClient] = None,
+                           blob_names: Optional[List[str]] = None, **listing: Any) -> List[Tuple[str, bytes]]:
+    """
+    Download supported resume files (PDF, DOCX, DOC) from Azure Blob Storage, optionally
+    only the named ones. Other keyword arguments (since, until, sources, jd_tag) narrow
+    the listing as in list_resume_blob_names.
+    """
+    container_client = container_client or get_resumes_container_client()
+    blob_guard = get_dependency_guard(AZURE_BLOB)
+    if blob_names is None:
+        blob_names = list_resume_blob_names(container_client, **listing)
+    resume_files = []
+
+    for blob_name in blob_names:
+        try:
+            file_bytes = blob_guard.call(
+                lambda name=blob_name: container_client.download_blob(name).readall()
+            )
+            resume_files.append((blob_name, file_bytes))
+        except CircuitOpenError as e:
+            logger.error(f"Blob storage unavailable, stopping download: {str(e)}")
+            break
+        except Exception as e:
+            logger.error(f"Error downloading {blob_name}: {str(e)}")
+            continue
+
+    logger.info(f"Downloaded {len(resume_files)} supported resume files")
+    return resume_files
+
+def load_resumes_from_dir(directory: str, recursive: bool = False) -> List[Tuple[str, bytes]]:
+    """Read all supported resume files from a local directory"""
+    resume_files = []
+
+    for root, _, files in os.walk(directory):
+        for file_name in sorted(files):
+            if not is_supported_resume_format(file_name):
+                continue
+            path = os.path.join(root, file_name)
+            try:
+                with open(path, "rb") as f:
+                    resume_files.append((os.path.relpath(path, directory), f.read()))
+            except OSError as e:
+                logger.error(f"Error reading {path}: {str(e)}")
+        if not recursive:
+            break
+
+    logger.info(f"Loaded {len(resume_files)} supported resume files from {directory}")
+    return resume_files
+
+# ==========================
+# 🧠 Parse, Embed & Evaluate
+# ==========================
+
+def parse_resume_file(file_name: str, file_bytes: bytes) -> Dict[str, Any]:
+    """Parse a resume and extract contact info"""
+    resume_text = parse_resume(file_bytes, file_name)
+    return {
+        # Content-addressed blob names are shown as the file name the candidate sent
+        "resume_file": resume_file_name(file_name),
+        "resume_text": resume_text,
+        "contact": extract_contact_info(resume_text),
+    }
+
+def embed_resume(parsed: Dict[str, Any], jd_embedding: Tuple[float, ...]) -> Dict[str, Any]:
+    """Compute JD similarity for a parsed resume"""
+    chunks = get_text_chunks(parsed["resume_text"])
+    resume_embedding = get_embedding_cached(" ".join(chunks[:3]))  # Limit chunks for speed
+    jd_similarity = round(get_cosine_similarity(resume_embedding, jd_embedding) * 100, 2)
+    return {**parsed, "jd_similarity": jd_similarity}
+
+def prepare_resume(file_name: str, file_bytes: bytes, jd_embedding: Tuple[float, ...]) -> Dict[str, Any]:
+    """Parse a resume, extract contact info and compute JD similarity"""
+    return embed_resume(parse_resume_file(file_name, file_bytes), jd_embedding)
+
+def upload_resume(file_bytes: bytes, file_name: str, container: str, text: Optional[str] = None,
+                  jd_tag: Optional[str] = None) -> Dict[str, Any]:
+    """Store a local resume in the container under its content-addressed name, skipping duplicates"""
+    try:
+        return ingest_resume(
+            file_bytes, file_name,
+            lambda blob_name, data, metadata, tags: upload_to_blob(data, blob_name, container, overwrite=False,
+                                                                   metadata=metadata, tags=tags),
+            source="upload", text=text, jd_tag=jd_tag
+        )
+    except Exception as e:
+        # Screening goes ahead without the stored copy, as it always has
+        logger.error(f"Could not store {file_name}: {str(e)}")
+        return {"blob_name": None, "sha256": compute_content_hash(file_bytes), "duplicate": None}
+
+async def screen_resumes_async(
+    jd: str,
+    resume_files: List[Tuple[str, bytes]],
+    role: Optional[str] = None,
+    domain: str = "",
+    skills: str = "",
+    experience_range: str = "",
+    thresholds: Optional[Dict[str, float]] = None,
+    concurrency: Optional[int] = None,
+    journal: Optional[RunJournal] = None,
+    run_id: Optional[str] = None,
+    upload_container: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    run_params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Screen resumes against a JD with bounded concurrency. Parsing and embedding run
+    in worker threads so they overlap with in-flight GPT calls. When a journal is
+    given, results are committed as they finish and finished resumes are skipped.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    concurrency = concurrency or PERFORMANCE_CONFIG["pipeline_concurrency"]
+    total = len(resume_files)
+
+    def report(done: int, message: str):
+        if progress_callback:
+            progress_callback(done, total, message)
+
+    # JD preprocessing stage - role, embedding, skills and token count concurrently
+    report(0, "Preprocessing job description...")
+    jd_profile = await preprocess_jd_async(jd)
+    if not role or role == "N/A":
+        role = jd_profile["role"]
+    # Fall back to skills found in the JD when none were entered
+    effective_skills = skills if skills and skills.strip() else ", ".join(jd_profile["skills"])
+
+    # Open (or reopen) the run journal entry
+    completed_keys = set()
+    journaled_results = []
+    if journal is not None:
+        resumed_run = journal.get_run(run_id) if run_id else None
+        if resumed_run and resumed_run["jd_hash"] == jd_profile["jd_hash"]:
+            completed_keys = journal.completed_keys(run_id)
+            journaled_results = journal.load_results(run_id)
+            logger.info(f"Resuming run {run_id}: {len(journaled_results)} resumes already analyzed")
+        elif resumed_run:
+            logger.warning(f"JD differs from run {run_id} - starting a new run instead")
+            run_id = None
+        params = {"role": role, "domain": domain, "skills": skills, "experience_range": experience_range}
+        run_id = journal.start_run(jd_profile["jd_hash"], {**params, **(run_params or {})}, total, run_id=run_id)
+
+    # Tiered routing scores everyone with the fast model and escalates borderline candidates
+    routing_stats = start_routing_stats()
+    # Fresh deadline budget per run; hedging keeps slow completions from stalling the batch
+    request_scheduler.start_run(batch_size=total, concurrency=concurrency)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    done_count = len(journaled_results)
+    processing_start = time.time()
+
+    # One evaluation per resume text: re-saved or renamed copies of a CV are skipped
+    # before any embedding or GPT call. Only touched from the event loop thread.
+    text_owners: Dict[str, str] = {}
+    for result in journaled_results:
+        fingerprint = compute_text_fingerprint(result.get("resume_text", ""))
+        if fingerprint:
+            text_owners.setdefault(fingerprint, result.get("candidate_id", ""))
+    duplicates_skipped = 0
+    # Uploaded resumes are tagged with the JD they were screened against
+    jd_tag = jd_profile["jd_hash"][:16]
+
+    # Lightly edited versions of one CV are linked to the first version evaluated (the
+    # cluster representative) through a MinHash/LSH index and are not evaluated again
+    near_duplicates = NearDuplicateIndex() if NEAR_DUPLICATE_CONFIG["enabled"] else None
+    near_duplicate_links: Dict[str, Dict[str, Any]] = {}
+    if near_duplicates is not None:
+        for result in journaled_results:
+            signature = near_duplicates.signature(result.get("resume_text", ""))
+            if signature is not None:
+                near_duplicates.add(result.get("candidate_id", ""), signature)
+
+    # Files skipped as copies of a resume still being evaluated, by that resume's key. If its
+    # evaluation fails or falls back, its claims are released and the copies are screened on their own.
+    skipped_copies: Dict[str, List[Tuple[str, bytes, str]]] = {}
+    rescreen: List[Tuple[str, bytes, str]] = []
+
+    def release(resume_key: str, fingerprint: Optional[str]):
+        nonlocal done_count, duplicates_skipped
+        if fingerprint and text_owners.get(fingerprint) == resume_key:
+            del text_owners[fingerprint]
+        if near_duplicates is not None:
+            near_duplicates.remove(resume_key)
+        copies = skipped_copies.pop(resume_key, [])
+        for _, _, copy_key in copies:
+            if near_duplicate_links.pop(copy_key, None) is None:
+                duplicates_skipped -= 1
+        done_count -= len(copies)
+        rescreen.extend(copies)
+
+    async def evaluate(prepared: Dict[str, Any]) -> dict:
+        kwargs = dict(
+            jd=jd, resume_text=prepared["resume_text"], contact=prepared["contact"], role=role,
+            domain=domain, skills=effective_skills, experience_range=experience_range,
+            jd_similarity=prepared["jd_similarity"], resume_file=prepared["resume_file"]
+        )
+        if MODEL_ROUTING_CONFIG["enable_tiered_routing"]:
+            return await get_resume_analysis_tiered_async(
+                **kwargs,
+                shortlist_threshold=thresholds["shortlist_threshold"],
+                reject_threshold=thresholds["reject_threshold"]
+            )
+        return await get_resume_analysis_async(**kwargs)
+
+    async def screen_one(file_name: str, file_bytes: bytes, resume_key: str) -> Optional[dict]:
+        nonlocal done_count, duplicates_skipped
+        fingerprint = None
+        async with semaphore:
+            try:
+                parsed = await asyncio.to_thread(parse_resume_file, file_name, file_bytes)
+                if upload_container:
+                    await asyncio.to_thread(upload_resume, file_bytes, file_name, upload_container,
+                                            parsed["resume_text"], jd_tag)
+                fingerprint = compute_text_fingerprint(parsed["resume_text"])
+                owner = text_owners.setdefault(fingerprint, resume_key) if fingerprint else resume_key
+                if owner != resume_key:
+                    logger.info(f"Skipping {file_name}: same resume text as another file in this run")
+                    duplicates_skipped += 1
+                    skipped_copies.setdefault(owner, []).append((file_name, file_bytes, resume_key))
+                    return None
+                if near_duplicates is not None:
+                    signature = await asyncio.to_thread(near_duplicates.signature, parsed["resume_text"])
+                    match = near_duplicates.find_or_add(resume_key, signature) if signature is not None else None
+                    if match:
+                        representative, similarity = match
+                        logger.info(f"Skipping {file_name}: near-duplicate ({similarity:.0%}) of an evaluated resume")
+                        near_duplicate_links[resume_key] = {
+                            "resume_file": parsed["resume_file"], "representative": representative,
+                            "similarity": round(similarity, 3)
+                        }
+                        skipped_copies.setdefault(representative, []).append((file_name, file_bytes, resume_key))
+                        return None
+                prepared = await asyncio.to_thread(embed_resume, parsed, jd_profile["embedding"])
+                result = await evaluate(prepared)
+                if result.get("analysis_failed"):
+                    # A fallback is not an evaluation: its copies are screened on their own
+                    release(resume_key, fingerprint)
+                # Keyword skills from the resume itself, for cross-run search in the warehouse
+                result["resume_skills"] = extract_skills_from_text(prepared["resume_text"])
+            except Exception as e:
+                logger.error(f"Error processing {file_name}: {str(e)}")
+                release(resume_key, fingerprint)
+                return None
+            finally:
+                done_count += 1
+                report(done_count, f"Processed {file_name}")
+
+        # Stable id: content hash of the resume file, used as the DataFrame index
+        result["candidate_id"] = resume_key
+
+        if journal is not None:
+            # Commit each result as soon as it finishes so a restart can skip it. Fallback
+            # results (outage, deadline, open circuit) are flagged so a resume retries them.
+            try:
+                journal.record_result(run_id, resume_key, file_name, result, retry=bool(result.get("analysis_failed")))
+            except Exception as e:
+                logger.error(f"Could not journal result for {file_name}: {str(e)}")
+        return result
+
+    tasks = []
+    queued_keys = set()
+    for file_name, file_bytes in resume_files:
+        resume_key = compute_content_hash(file_bytes)
+        if resume_key in completed_keys:
+            continue
+        if resume_key in queued_keys:
+            duplicates_skipped += 1  # Identical file under another name
+            continue
+        queued_keys.add(resume_key)
+        tasks.append(screen_one(file_name, file_bytes, resume_key))
+
+    report(done_count, "Running AI analysis...")
+    new_results = await asyncio.gather(*tasks)
+    while rescreen:
+        # Copies of resumes that failed; the first of each group now becomes its owner
+        retry = list(rescreen)
+        rescreen.clear()
+        logger.info(f"Screening {len(retry)} copies of resumes whose evaluation failed")
+        new_results += await asyncio.gather(*(screen_one(*copy) for copy in retry))
+    processing_time = time.time() - processing_start
+
+    linked_files: Dict[str, List[str]] = {}
+    for link in near_duplicate_links.values():
+        linked_files.setdefault(link["representative"], []).append(link["resume_file"])
+
+    results = []
+    for result in journaled_results + list(new_results):
+        if isinstance(result, dict):
+            result.setdefault("recruiter_notes", "")
+            if result.get("candidate_id") in linked_files:
+                # Other versions of this CV that were not evaluated separately
+                result["linked_resumes"] = ", ".join(linked_files[result["candidate_id"]])
+            results.append(result)
+
+    if journal is not None:
+        failed_analyses = sum(1 for result in results if result.get("analysis_failed"))
+        if failed_analyses:
+            # Offered for resume, which retries only the failed resumes
+            logger.warning(f"Run {run_id}: {failed_analyses} analyses failed and can be retried by resuming the run")
+            journal.finish_run(run_id, status="completed_with_failures")
+        else:
+            journal.finish_run(run_id, status="completed" if results else "failed")
+
+    return {
+        "run_id": run_id,
+        "role": role,
+        "jd_hash": jd_profile["jd_hash"],
+        "results": results,
+        "metrics": {
+            "processing_time": processing_time,
+            "jd_preprocessing_time": jd_profile["preprocessing_time"],
+            "jd_token_count": jd_profile["token_count"],
+            "resumes_processed": len(results),
+            "resumes_resumed": len(journaled_results),
+            "duplicates_skipped": duplicates_skipped,
+            "near_duplicates_linked": len(near_duplicate_links),
+            "near_duplicate_links": near_duplicate_links,
+            "avg_time_per_resume": processing_time / len(results) if results else 0,
+            "model_routing": routing_stats.summary(),
+            "request_scheduler": request_scheduler.summary(),
+            "dependency_health": get_resilience_status()
+        }
+    }
+
+def screen_resumes(jd: str, resume_files: List[Tuple[str, bytes]], **kwargs) -> Dict[str, Any]:
+    """Synchronous wrapper running the pipeline on a fresh event loop"""
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(screen_resumes_async(jd, resume_files, **kwargs))
+    finally:
+        loop.close()
+
+# ==========================
+# ⚖️ Verdicts
+# ==========================
+
+def build_results_frame(results: List[Dict[str, Any]], thresholds: Optional[Dict[str, float]] = None,
+                        top_n: int = 0, include_text: bool = True) -> pd.DataFrame:
+    """
+    Create the candidate DataFrame, indexed by candidate_id, and apply verdict and Top-N logic.
+    Without include_text, rows leave out the parsed resume text (the run journal keeps it).
+    """
+    rows = []
+    for result in results:
+        row = dict(result)
+        if not row.get("candidate_id"):
+            row["candidate_id"] = legacy_candidate_id(row)
+        if not include_text:
+            row.pop("resume_text", None)
+        rows.append(row)
+
+    df = pd.DataFrame(rows).fillna("N/A")
+    df.replace("n/a", "N/A", regex=True, inplace=True)
+
+    # A unique index makes single-candidate updates O(1) lookups instead of column scans
+    df = df.set_index("candidate_id")
+    if df.index.has_duplicates:
+        logger.info(f"Dropping {int(df.index.duplicated().sum())} duplicate resumes (identical files)")
+        df = df[~df.index.duplicated(keep="first")]
+    # Typed score columns (integer GPT scores, categorical verdicts) let scores and verdicts
+    # be recomputed any time without GPT
+    ensure_score_columns(df)
+    return apply_verdicts(df, thresholds, top_n)
+
+def update_candidate(df: pd.DataFrame, candidate_id: str, **fields: Any) -> None:
+    """Update one candidate in place by id, e.g. recruiter_notes or verdict_override"""
+    for column, value in fields.items():
+        df.at[candidate_id, column] = value
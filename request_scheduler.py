@@ -0,0 +1,225 @@
+# request_scheduler.py — Per-run deadline budgets and hedged requests for GPT tail latency
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from constants import REQUEST_SCHEDULER_CONFIG
+from resilience import TIMEOUT_CANCEL_MESSAGE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a call cannot finish inside the remaining run budget"""
+
+class LatencyTracker:
+    """Rolling window of call latencies used to derive hedge delays"""
+
+    def __init__(self, window: int = None, min_samples: Optional[int] = None):
+        self.samples = deque(maxlen=window or REQUEST_SCHEDULER_CONFIG["latency_window"])
+        self.min_samples = min_samples or REQUEST_SCHEDULER_CONFIG["min_latency_samples"]
+
+    def record(self, latency: float):
+        self.samples.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        return float(np.percentile(np.fromiter(self.samples, dtype=float), pct))
+
+class DeadlineBudget:
+    """Wall-clock budget shared by every call in one analysis run"""
+
+    def __init__(self, total_seconds: Optional[float] = None):
+        self.total_seconds = total_seconds
+        self.started_at = time.monotonic()
+
+    def remaining(self) -> float:
+        if self.total_seconds is None:
+            return float("inf")
+        return max(0.0, self.total_seconds - (time.monotonic() - self.started_at))
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def call_timeout(self, per_call_timeout: float) -> float:
+        return min(per_call_timeout, self.remaining())
+
+def _new_stats() -> Dict[str, int]:
+    return {
+        "requests": 0,
+        "hedges": 0,
+        "hedge_wins": 0,
+        "deadline_exceeded": 0,
+        "failures": 0,
+    }
+
+class HedgedRequestScheduler:
+    """
+    Runs async requests under a per-run deadline and sends one hedged duplicate when
+    the primary call outlives the p95 latency; the first successful response wins and
+    the loser is cancelled. Hedges are capped at a fraction of total requests.
+
+    Latency history is shared, but the budget and stats belong to the run started in
+    the current context (asyncio task), so concurrent jobs do not reset each other.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**REQUEST_SCHEDULER_CONFIG, **(config or {})}
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self._attempt_starts: Dict[asyncio.Task, float] = {}
+        # Calls made outside any run share this state
+        self._default_run = {"budget": DeadlineBudget(None), "stats": _new_stats()}
+        self._current_run: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+            f"scheduler_run_{id(self)}", default=None
+        )
+
+    @property
+    def _run_state(self) -> Dict[str, Any]:
+        return self._current_run.get() or self._default_run
+
+    @property
+    def budget(self) -> DeadlineBudget:
+        return self._run_state["budget"]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self._run_state["stats"]
+
+    def reset_stats(self):
+        self._run_state["stats"] = _new_stats()
+
+    def run_deadline(self, batch_size: Optional[int] = None, concurrency: Optional[int] = None) -> Optional[float]:
+        """
+        Run budget from the config: a fixed run_deadline, or per_resume_deadline scaled by
+        how many waves of `concurrency` resumes the batch needs. None means no run budget.
+        """
+        if self.config["run_deadline"] is not None:
+            return self.config["run_deadline"]
+        if self.config["per_resume_deadline"] is None or not batch_size:
+            return None
+        waves = -(-batch_size // max(1, concurrency or 1))
+        return self.config["per_resume_deadline"] * waves
+
+    def start_run(self, deadline_seconds: Optional[float] = None, batch_size: Optional[int] = None,
+                  concurrency: Optional[int] = None):
+        """
+        Begin a new run with a fresh deadline budget and stats for the current context
+        (the calling task and tasks it creates afterwards); latency history is kept
+        """
+        if deadline_seconds is None:
+            deadline_seconds = self.run_deadline(batch_size, concurrency)
+        self._current_run.set({"budget": DeadlineBudget(deadline_seconds), "stats": _new_stats()})
+
+    def _tracker(self, key: str) -> LatencyTracker:
+        if key not in self.trackers:
+            self.trackers[key] = LatencyTracker(self.config["latency_window"], self.config["min_latency_samples"])
+        return self.trackers[key]
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Delay before hedging a call for this key, or None if hedging is not allowed"""
+        if not self.config["enable_hedging"]:
+            return None
+        if self.stats["hedges"] >= self.stats["requests"] * self.config["max_hedge_ratio"]:
+            return None
+        threshold = self._tracker(key).percentile(self.config["hedge_percentile"])
+        if threshold is None:
+            return None
+        return max(threshold, self.config["min_hedge_delay"])
+
+    def mark_attempt_started(self):
+        """
+        Called from inside a request once it really starts (e.g. after waiting for a
+        bulkhead slot); its latency is then measured from here
+        """
+        task = asyncio.current_task()
+        if task is not None:
+            self._attempt_starts[task] = time.monotonic()
+
+    async def run(self, request_fn: Callable[[float], Awaitable[Any]], key: str = "default") -> Any:
+        """
+        Execute request_fn(timeout) under the run budget, hedging once if it is slow.
+        request_fn must be a coroutine factory so the hedge is an independent request.
+        """
+        timeout = self.budget.call_timeout(self.config["per_call_timeout"])
+        if timeout <= 0:
+            self.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("Run deadline exhausted before request started")
+
+        self.stats["requests"] += 1
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+        primary = asyncio.ensure_future(request_fn(timeout))
+        pending = {primary}
+        hedge = None
+        hedge_started = None
+        timed_out = False
+
+        try:
+            hedge_delay = self.hedge_delay(key)
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                if not done:
+                    self.stats["hedges"] += 1
+                    hedge_timeout = max(0.0, deadline - time.monotonic())
+                    logger.info(f"Hedging slow request for {key} after {hedge_delay:.2f}s")
+                    hedge_started = time.monotonic()
+                    hedge = asyncio.ensure_future(request_fn(hedge_timeout))
+                    pending.add(hedge)
+
+            last_error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.stats["deadline_exceeded"] += 1
+                    timed_out = True
+                    raise DeadlineExceeded(f"Request for {key} exceeded {timeout:.1f}s budget")
+
+                for task in done:
+                    if task.exception() is None:
+                        # Latency of the winning request itself, measured from its own start
+                        started = self._attempt_starts.get(task) or (hedge_started if task is hedge else start_time)
+                        self._tracker(key).record(time.monotonic() - started)
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+
+            self.stats["failures"] += 1
+            raise last_error
+
+        finally:
+            await self._cancel(primary, hedge, message=TIMEOUT_CANCEL_MESSAGE if timed_out else None)
+            self._attempt_starts.pop(primary, None)
+            if hedge is not None:
+                self._attempt_starts.pop(hedge, None)
+
+    @staticmethod
+    async def _cancel(*tasks, message: Optional[str] = None):
+        """Cancel unfinished tasks and wait for them so no request outlives the call"""
+        outstanding = [task for task in tasks if task is not None and not task.done()]
+        for task in outstanding:
+            task.cancel(message)
+        if outstanding:
+            await asyncio.gather(*outstanding, return_exceptions=True)
+
+    def summary(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "hedge_rate": (self.stats["hedges"] / requests) * 100 if requests else 0.0,
+            "p95_latency": {
+                key: tracker.percentile(95) for key, tracker in self.trackers.items()
+            },
+            "budget_remaining": self.budget.remaining() if self.budget.total_seconds else None,
+        }
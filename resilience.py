@@ -0,0 +1,250 @@
+# resilience.py — Circuit breakers and concurrency bulkheads for Azure OpenAI and Blob Storage
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from constants import RESILIENCE_CONFIG
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Dependency names used across the app
+OPENAI_CHAT = "azure_openai_chat"
+OPENAI_EMBEDDINGS = "azure_openai_embeddings"
+AZURE_BLOB = "azure_blob"
+
+# Message callers cancel a call with when it ran out of time (task.cancel(TIMEOUT_CANCEL_MESSAGE)),
+# so the guard can tell a timed-out call from a cancelled hedge
+TIMEOUT_CANCEL_MESSAGE = "call deadline exceeded"
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the dependency's circuit is open"""
+
+class BulkheadFullError(Exception):
+    """Raised when no concurrency slot frees up within the bulkhead's max wait"""
+
+def is_dependency_failure(exc: BaseException) -> bool:
+    """
+    Decide whether an exception means the dependency is unhealthy. Client-side errors
+    (bad request, not found, content filter) do not count; throttling and timeouts do.
+    """
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int) and 400 <= status_code < 500 and status_code not in (408, 429):
+        return False
+    return True
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probes after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "times_opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info(f"Circuit '{self.name}' half-open, probing dependency")
+
+    def before_call(self):
+        """Reserve permission to call; raises CircuitOpenError when the call must fail fast"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.OPEN:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(f"Circuit '{self.name}' is open")
+            if self._state == self.HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_max_calls:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(f"Circuit '{self.name}' is half-open, probe in progress")
+                self._half_open_in_flight += 1
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state == self.HALF_OPEN:
+                logger.info(f"Circuit '{self.name}' closed after successful probe")
+            self._state = self.CLOSED
+            self._half_open_in_flight = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats["times_opened"] += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self._consecutive_failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_in_flight = 0
+
+    def release_probe(self):
+        """Return a half-open probe slot without recording an outcome (e.g. cancelled call)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+class Bulkhead:
+    """Caps concurrent calls to one dependency; shared by threads and coroutines"""
+
+    def __init__(self, name: str, max_concurrent: int = 10, max_wait: float = 30.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _mark_acquired(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def acquire(self):
+        if not self._semaphore.acquire(timeout=self.max_wait):
+            raise BulkheadFullError(f"Bulkhead '{self.name}' full ({self.max_concurrent} in flight)")
+        self._mark_acquired()
+
+    async def acquire_async(self):
+        # Poll instead of blocking so the event loop stays free and the slot is shared with threads
+        deadline = time.monotonic() + self.max_wait
+        delay = 0.005
+        while not self._semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                raise BulkheadFullError(f"Bulkhead '{self.name}' full ({self.max_concurrent} in flight)")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        self._mark_acquired()
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._semaphore.release()
+
+class DependencyGuard:
+    """Circuit breaker + bulkhead wrapper for calls to one external dependency"""
+
+    def __init__(self, name: str, config: Optional[Dict[str, Any]] = None):
+        config = config or RESILIENCE_CONFIG.get(name, {})
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=config.get("failure_threshold", 5),
+            recovery_timeout=config.get("recovery_timeout", 30.0),
+            half_open_max_calls=config.get("half_open_max_calls", 1)
+        )
+        self.bulkhead = Bulkhead(
+            name,
+            max_concurrent=config.get("max_concurrent", 10),
+            max_wait=config.get("max_wait", 30.0)
+        )
+
+    def _record(self, exc: Optional[BaseException]):
+        if exc is None:
+            self.breaker.record_success()
+        elif is_dependency_failure(exc):
+            self.breaker.record_failure()
+        else:
+            # The dependency answered; the request itself was bad
+            self.breaker.record_success()
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call under the breaker and bulkhead"""
+        self.breaker.before_call()
+        try:
+            self.bulkhead.acquire()
+        except BulkheadFullError:
+            self.breaker.release_probe()
+            raise
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record(e)
+            raise
+        finally:
+            self.bulkhead.release()
+        self._record(None)
+        return result
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args,
+                    on_start: Optional[Callable[[], None]] = None, **kwargs) -> Any:
+        """
+        Await a coroutine function under the breaker and bulkhead. on_start is called once
+        a bulkhead slot is held, so callers can time the call without the queueing.
+        """
+        self.breaker.before_call()
+        try:
+            await self.bulkhead.acquire_async()
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        try:
+            if on_start is not None:
+                on_start()
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError as e:
+            if e.args and e.args[0] == TIMEOUT_CANCEL_MESSAGE:
+                # Cut off by the caller's deadline: a dependency that hangs is failing
+                self._record(asyncio.TimeoutError())
+            else:
+                # Cancelled hedges or shutdowns say nothing about dependency health
+                self.breaker.release_probe()
+            raise
+        except Exception as e:
+            self._record(e)
+            raise
+        finally:
+            self.bulkhead.release()
+        self._record(None)
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "in_flight": self.bulkhead.in_flight,
+            "max_concurrent": self.bulkhead.max_concurrent,
+            **self.breaker.stats,
+        }
+
+_guards: Dict[str, DependencyGuard] = {}
+_guards_lock = threading.Lock()
+
+def get_dependency_guard(name: str) -> DependencyGuard:
+    """Get the process-wide guard for a dependency"""
+    with _guards_lock:
+        if name not in _guards:
+            _guards[name] = DependencyGuard(name)
+        return _guards[name]
+
+def get_resilience_status() -> Dict[str, Dict[str, Any]]:
+    """Status of every guarded dependency for dashboards"""
+    with _guards_lock:
+        names = list(_guards)
+    return {name: get_dependency_guard(name).status() for name in names}
@@ -0,0 +1,138 @@
+# results_io.py — Typed persistence of screening results: Parquet/Arrow with native list columns
+# alongside CSV, streamed to and from the csvdata container
+
+import io
+import logging
+import os
+import tempfile
+from typing import IO, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from azure.storage.blob import BlobServiceClient
+
+from constants import AZURE_CONFIG, PERFORMANCE_CONFIG
+from resilience import get_dependency_guard, AZURE_BLOB
+from scoring import VERDICTS, ensure_score_columns
+from utils import prepare_export_data, upload_stream_to_blob, download_blob_to_stream
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Result fields that hold lists of strings
+LIST_COLUMNS = ["red_flags", "missing_gaps", "highlights", "reasons_if_rejected", "resume_skills"]
+
+RESULT_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv"
+}
+
+PARQUET_COMPRESSION = "zstd"
+
+def _require_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow) - or use CSV")
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(item) for item in value]
+    return []
+
+def to_arrow_table(df: pd.DataFrame, include_text: bool = False) -> "pa.Table":
+    """Arrow table of the results; list columns stay list<string>, categoricals stay dictionary-encoded"""
+    _require_pyarrow()
+    export_df = df.drop(columns=[] if include_text else ["resume_text"], errors="ignore")
+    export_df = export_df.reset_index() if export_df.index.name else export_df.reset_index(drop=True)
+    for col in export_df.columns:
+        if col in LIST_COLUMNS:
+            # fillna("N/A") leaves strings where GPT returned no list; Arrow needs one type per column
+            export_df[col] = export_df[col].map(_as_list)
+        elif export_df[col].dtype == object:
+            export_df[col] = export_df[col].map(lambda x: x if isinstance(x, str) else str(x))
+    return pa.Table.from_pandas(export_df, preserve_index=False)
+
+def write_results(df: pd.DataFrame, sink: Union[str, IO[bytes]], fmt: str = "parquet",
+                  include_text: bool = False) -> None:
+    """Write results to a path or binary stream; CSV joins list columns, Parquet keeps them"""
+    if fmt == "csv":
+        export_df = prepare_export_data(df, include_sensitive=True)
+        if include_text and "resume_text" in df.columns:
+            export_df["resume_text"] = df["resume_text"].to_numpy()
+        export_df.to_csv(sink, index=False, encoding="utf-8")
+        return
+    if fmt != "parquet":
+        raise ValueError(f"Unknown results format: {fmt}")
+    pq.write_table(to_arrow_table(df, include_text), sink, compression=PARQUET_COMPRESSION)
+
+def results_to_bytes(df: pd.DataFrame, fmt: str = "parquet") -> bytes:
+    """Serialized results for a download button"""
+    buffer = io.BytesIO()
+    write_results(df, buffer, fmt)
+    return buffer.getvalue()
+
+def read_results(source: Union[str, IO[bytes]]) -> pd.DataFrame:
+    """Load saved Parquet results back into the in-app schema (typed scores, lists, candidate_id index)"""
+    _require_pyarrow()
+    df = pq.read_table(source).to_pandas()
+    for col in LIST_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].map(_as_list)
+    for col in ("verdict", "auto_verdict"):
+        if col in df.columns:
+            df[col] = pd.Categorical(df[col].astype(str), categories=VERDICTS)
+    if "candidate_id" in df.columns:
+        df = df.set_index("candidate_id")
+    return ensure_score_columns(df)
+
+def save_results_to_blob(df: pd.DataFrame, base_name: str, container: Optional[str] = None,
+                         formats: Iterable[str] = ("parquet", "csv")) -> Dict[str, bool]:
+    """
+    Save results as '<base_name>.<format>' for each format. Each file is spooled
+    (to disk once it gets large) and streamed to the container in blocks.
+    """
+    container = container or AZURE_CONFIG["csv_container"]
+    saved = {}
+    for fmt in formats:
+        file_name = f"{base_name}.{fmt}"
+        with tempfile.SpooledTemporaryFile(max_size=PERFORMANCE_CONFIG["spool_max_bytes"]) as spool:
+            try:
+                write_results(df, spool, fmt)
+            except Exception as e:
+                logger.error(f"Failed to serialize {file_name}: {str(e)}")
+                saved[file_name] = False
+                continue
+            saved[file_name] = upload_stream_to_blob(spool, file_name, container, content_type=RESULT_FORMATS[fmt])
+    return saved
+
+def load_results_from_blob(file_name: str, container: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Download saved Parquet results (streamed into a spool file) and load them typed"""
+    container = container or AZURE_CONFIG["csv_container"]
+    with tempfile.SpooledTemporaryFile(max_size=PERFORMANCE_CONFIG["spool_max_bytes"]) as spool:
+        if not download_blob_to_stream(file_name, container, spool):
+            return None
+        try:
+            return read_results(spool)
+        except Exception as e:
+            logger.error(f"Could not read results {file_name}: {str(e)}")
+            return None
+
+def list_saved_results(container: Optional[str] = None, prefix: str = "") -> List[str]:
+    """Names of Parquet result files in the container, newest first"""
+    container = container or AZURE_CONFIG["csv_container"]
+    try:
+        client = BlobServiceClient.from_connection_string(AZURE_CONFIG["connection_string"])
+        blobs = get_dependency_guard(AZURE_BLOB).call(
+            lambda: list(client.get_container_client(container).list_blobs(name_starts_with=prefix or None))
+        )
+    except Exception as e:
+        logger.error(f"Failed to list saved results in {container}: {str(e)}")
+        return []
+    parquet = [blob for blob in blobs if os.path.splitext(blob.name)[1].lower() == ".parquet"]
+    return [blob.name for blob in sorted(parquet, key=lambda blob: blob.last_modified, reverse=True)]
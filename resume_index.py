@@ -0,0 +1,267 @@
+# resume_index.py — Dedupe index for incoming resumes with content-addressed blob names
+#
+# Every resume that reaches the resumes container is recorded by the SHA-256 of its bytes
+# and the hash of its normalized text. A file whose bytes were seen before (same CV sent
+# twice), or whose text matches an earlier file (same CV re-exported or renamed), is never
+# uploaded again, so it is never parsed, embedded or sent to GPT again either.
+#
+# Stored resumes are partitioned as <source>/<YYYY>/<MM>/<DD>/<name> and carry their hashes
+# as blob metadata (and index tags when enabled), so loaders list only the prefixes of the
+# window they need. A CV sent again after refresh_after_days is stored again under today's
+# partition, so it shows up in recent windows.
+
+import logging
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from constants import RESUME_BLOB_CONFIG, STORAGE_CONFIG
+from utils import compute_content_hash, compute_text_fingerprint, parse_resume
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    sha256 TEXT PRIMARY KEY,
+    text_hash TEXT,
+    blob_name TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    duplicate_of TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    times_seen INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_resumes_text ON resumes (text_hash);
+"""
+
+# Blob names start with this much of the SHA-256, so different files never share a name
+HASH_PREFIX_LENGTH = 16
+_CONTENT_NAME = re.compile(rf"^[0-9a-f]{{{HASH_PREFIX_LENGTH}}}_(.+)$")
+_PARTITION = re.compile(r"^[^/]+/(\d{4})/(\d{2})/(\d{2})/")
+
+def partition_prefix(source: str, day: date) -> str:
+    return f"{source}/{day:%Y/%m/%d}/"
+
+def content_blob_name(sha256: str, file_name: str, source: Optional[str] = None,
+                      received: Optional[date] = None) -> str:
+    """
+    Content-addressed blob name that keeps the sender's file name readable, under the
+    source and day partition when a source is given
+    """
+    base = os.path.basename(file_name.replace("\\", "/")).strip() or "resume"
+    safe = re.sub(r"[^\w.\- ]", "_", base)
+    name = f"{sha256[:HASH_PREFIX_LENGTH]}_{safe}"
+    if source:
+        name = partition_prefix(source, received or datetime.now(timezone.utc).date()) + name
+    return name
+
+def blob_partition_date(blob_name: str) -> Optional[date]:
+    """The day partition of a blob name, or None for blobs stored before partitioning"""
+    match = _PARTITION.match(blob_name)
+    if not match:
+        return None
+    try:
+        return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+
+def is_stale(blob_name: str, today: Optional[date] = None) -> bool:
+    """Whether a stored copy is too old to stand in for a resume received today"""
+    refresh_after = RESUME_BLOB_CONFIG["refresh_after_days"]
+    if refresh_after <= 0:
+        return False
+    stored = blob_partition_date(blob_name)
+    today = today or datetime.now(timezone.utc).date()
+    # Blobs stored before partitioning are outside every window
+    return stored is None or (today - stored).days >= refresh_after
+
+def partition_prefixes(since: date, until: Optional[date] = None,
+                       sources: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Blob name prefixes covering [since, until] for each source: one per day for short
+    windows, one per month otherwise (callers filter those by blob_partition_date)
+    """
+    until = until or datetime.now(timezone.utc).date()
+    sources = sources or RESUME_BLOB_CONFIG["sources"]
+    if (until - since).days + 1 <= RESUME_BLOB_CONFIG["max_day_prefixes"]:
+        days = [since + timedelta(days=offset) for offset in range((until - since).days + 1)]
+        return [partition_prefix(source, day) for source in sources for day in days]
+
+    months = []
+    year, month = since.year, since.month
+    while (year, month) <= (until.year, until.month):
+        months.append(f"{year:04d}/{month:02d}/")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return [f"{source}/{month}" for source in sources for month in months]
+
+def tag_query(since: Optional[date] = None, until: Optional[date] = None,
+              sources: Optional[Sequence[str]] = None, jd_tag: Optional[str] = None) -> str:
+    """Blob index tag filter expression for find_blobs_by_tags"""
+    clauses = []
+    if jd_tag:
+        clauses.append(f"\"jd\" = '{jd_tag}'")
+    if since:
+        clauses.append(f"\"ingested\" >= '{since.isoformat()}'")
+    if until:
+        clauses.append(f"\"ingested\" <= '{until.isoformat()}'")
+    if sources and len(sources) == 1:
+        clauses.append(f"\"source\" = '{sources[0]}'")
+    # A clause every tagged resume satisfies, when no other filter is given
+    return " AND ".join(clauses) or "\"ingested\" >= '0'"
+
+def blob_attributes(sha256: str, text_hash: Optional[str], file_name: str, source: str,
+                    received: datetime, jd_tag: Optional[str] = None) -> Tuple[Dict[str, str], Optional[Dict[str, str]]]:
+    """Metadata (and index tags, when enabled) stored with a resume blob"""
+    metadata = {
+        "content_sha256": sha256,
+        "text_hash": text_hash or "",
+        "source": source,
+        "original_name": quote(file_name),  # Metadata values must be ASCII
+        "ingested_at": received.isoformat(timespec="seconds"),
+        "parsed_at": received.isoformat(timespec="seconds")
+    }
+    if jd_tag:
+        metadata["jd"] = jd_tag
+    if not RESUME_BLOB_CONFIG["index_tags"]:
+        return metadata, None
+    tags = {"source": source, "ingested": received.date().isoformat(), "sha256": sha256}
+    if jd_tag:
+        tags["jd"] = jd_tag
+    return metadata, tags
+
+def resume_file_name(blob_name: str) -> str:
+    """The original file name behind a content-addressed blob name (others unchanged)"""
+    match = _CONTENT_NAME.match(os.path.basename(blob_name))
+    return match.group(1) if match else blob_name
+
+class ResumeIndex:
+    """Resumes accepted into storage, keyed by content, with duplicates linked to their original"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or STORAGE_CONFIG["resume_index_path"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation; safe across threads
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def lookup(self, sha256: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM resumes WHERE sha256 = ?", (sha256,)).fetchone()
+        return dict(row) if row else None
+
+    def find_text(self, text_hash: str) -> Optional[Dict[str, Any]]:
+        """The latest stored resume (not itself a duplicate) with this normalized text"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM resumes WHERE text_hash = ? AND duplicate_of IS NULL ORDER BY first_seen DESC LIMIT 1",
+                (text_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record(self, sha256: str, text_hash: Optional[str], blob_name: str, original_name: str,
+               source: str, duplicate_of: Optional[str] = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO resumes (sha256, text_hash, blob_name, original_name, source, duplicate_of,
+                       first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(sha256) DO UPDATE SET last_seen = excluded.last_seen,
+                       times_seen = times_seen + 1""",
+                (sha256, text_hash, blob_name, original_name, source, duplicate_of, now, now)
+            )
+
+    def restore(self, sha256: str, blob_name: str) -> None:
+        """Point a resume at its copy in a newer partition"""
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE resumes SET blob_name = ?, duplicate_of = NULL, last_seen = ?, times_seen = times_seen + 1
+                   WHERE sha256 = ?""",
+                (blob_name, time.time(), sha256)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            row = conn.execute(
+                """SELECT COUNT(*) AS files,
+                          SUM(duplicate_of IS NULL) AS stored,
+                          SUM(duplicate_of IS NOT NULL) AS near_duplicates,
+                          SUM(times_seen - 1) AS repeats
+                   FROM resumes"""
+            ).fetchone()
+        return {key: int(row[key] or 0) for key in row.keys()}
+
+def ingest_resume(file_bytes: bytes, file_name: str,
+                  upload: Callable[[str, bytes, Dict[str, str], Optional[Dict[str, str]]], Any],
+                  source: str, text: Optional[str] = None, index: Optional["ResumeIndex"] = None,
+                  jd_tag: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Store one incoming resume under its content-addressed name unless it is a duplicate.
+    Returns {"blob_name", "sha256", "duplicate"} where duplicate is None, "exact" (same
+    bytes) or "text" (same normalized text). The index is written only after the upload
+    succeeds, so a failed upload is retried in full next time. Pass the parsed text when
+    it is already at hand to skip parsing here. upload(blob_name, bytes, metadata, tags)
+    stores the blob; jd_tag marks resumes uploaded for a particular job description.
+    Duplicates of a copy stored refresh_after_days ago or more are stored again under
+    today's partition instead of being skipped.
+    """
+    index = index or get_resume_index()
+    sha256 = compute_content_hash(file_bytes)
+
+    existing = index.lookup(sha256)
+    if existing and not is_stale(existing["blob_name"]):
+        index.record(sha256, existing["text_hash"], existing["blob_name"], file_name, source)
+        logger.info(f"Skipping {file_name}: same file as {existing['blob_name']}")
+        return {"blob_name": existing["blob_name"], "sha256": sha256, "duplicate": "exact"}
+
+    if existing:
+        text_hash = existing["text_hash"]
+    else:
+        text_hash = compute_text_fingerprint(text if text is not None else parse_resume(file_bytes, file_name))
+    original = index.find_text(text_hash) if text_hash and not existing else None
+    if original and not is_stale(original["blob_name"]):
+        index.record(sha256, text_hash, original["blob_name"], file_name, source, duplicate_of=original["sha256"])
+        logger.info(f"Skipping {file_name}: same resume text as {original['blob_name']}")
+        return {"blob_name": original["blob_name"], "sha256": sha256, "duplicate": "text"}
+
+    received = datetime.now(timezone.utc)
+    blob_name = content_blob_name(sha256, file_name, source, received.date())
+    metadata, tags = blob_attributes(sha256, text_hash, file_name, source, received, jd_tag)
+    if upload(blob_name, file_bytes, metadata, tags) is False:
+        raise IOError(f"Upload of {blob_name} failed")
+    if existing:
+        index.restore(sha256, blob_name)
+        logger.info(f"Stored {file_name} again under {blob_name}; its copy {existing['blob_name']} is outside recent windows")
+    else:
+        index.record(sha256, text_hash, blob_name, file_name, source)
+    return {"blob_name": blob_name, "sha256": sha256, "duplicate": None}
+
+_resume_index: Optional[ResumeIndex] = None
+
+def get_resume_index() -> ResumeIndex:
+    """Process-wide resume index at the configured path"""
+    global _resume_index
+    if _resume_index is None:
+        _resume_index = ResumeIndex()
+    return _resume_index
@@ -0,0 +1,172 @@
+# run_journal.py — Durable, append-only journal of analysis results so interrupted runs can resume
+
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from constants import STORAGE_CONFIG
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    jd_hash TEXT,
+    params TEXT,
+    total_resumes INTEGER DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_results (
+    run_id TEXT NOT NULL,
+    resume_key TEXT NOT NULL,
+    resume_file TEXT,
+    result TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    retry INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, resume_key)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, updated_at);
+"""
+
+# Runs the app offers to resume: interrupted, or finished with fallback results to retry
+RESUMABLE_STATUSES = ("running", "completed_with_failures")
+
+class RunJournal:
+    """
+    SQLite-backed run journal. Every finished resume is committed as soon as it
+    completes, keyed by the resume's content hash, so a restarted run can skip it.
+    Fallback results (analysis failed) are kept with a retry flag: readers of the run
+    see them, but a resumed run analyzes those resumes again.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or STORAGE_CONFIG["run_journal_path"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Journals created before fallback results were kept get the column added in place
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(run_results)")}
+            if "retry" not in columns:
+                conn.execute("ALTER TABLE run_results ADD COLUMN retry INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the journal safe across threads
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def start_run(self, jd_hash: str, params: Dict[str, Any], total_resumes: int,
+                  run_id: Optional[str] = None) -> str:
+        """Create a run, or reopen an existing one for resumption"""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO runs (run_id, status, jd_hash, params, total_resumes, created_at, updated_at)
+                   VALUES (?, 'running', ?, ?, ?, ?, ?)
+                   ON CONFLICT(run_id) DO UPDATE SET
+                       status = 'running', total_resumes = excluded.total_resumes,
+                       updated_at = excluded.updated_at""",
+                (run_id, jd_hash, json.dumps(params, default=str), total_resumes, now, now)
+            )
+        logger.info(f"Run {run_id} started ({total_resumes} resumes)")
+        return run_id
+
+    def record_result(self, run_id: str, resume_key: str, resume_file: str, result: Dict[str, Any],
+                      retry: bool = False) -> None:
+        """Append one analysis result; retry marks a fallback that a resumed run analyzes again"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO run_results (run_id, resume_key, resume_file, result, completed_at, retry)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (run_id, resume_key, resume_file, json.dumps(result, default=str), now, int(retry))
+            )
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+
+    def completed_keys(self, run_id: str) -> Set[str]:
+        """Resumes a resumed run can skip (fallback results are retried)"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT resume_key FROM run_results WHERE run_id = ? AND retry = 0", (run_id,))
+            return {row["resume_key"] for row in rows}
+
+    def load_results(self, run_id: str, include_retry: bool = False) -> List[Dict[str, Any]]:
+        """Journaled results; fallback results only with include_retry"""
+        query = "SELECT result FROM run_results WHERE run_id = ?"
+        if not include_retry:
+            query += " AND retry = 0"
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY completed_at", (run_id,))
+            return [json.loads(row["result"]) for row in rows]
+
+    def load_results_after(self, run_id: str, position: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Results journaled after `position` (0 = all), fallbacks included, and the position
+        to pass next time, so a growing run can be read incrementally. A re-recorded resume
+        comes back again.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT rowid, result FROM run_results WHERE run_id = ? AND rowid > ? ORDER BY rowid",
+                (run_id, position)
+            ).fetchall()
+        if not rows:
+            return [], position
+        return [json.loads(row["result"]) for row in rows], rows[-1]["rowid"]
+
+    def finish_run(self, run_id: str, status: str = "completed") -> None:
+        """Mark a run completed, completed_with_failures (fallbacks to retry) or failed"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                (status, time.time(), run_id)
+            )
+        logger.info(f"Run {run_id} marked {status}")
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                """SELECT r.*, (SELECT COUNT(*) FROM run_results rr WHERE rr.run_id = r.run_id AND rr.retry = 0)
+                       AS completed
+                   FROM runs r WHERE r.run_id = ?""",
+                (run_id,)
+            ).fetchone()
+        return self._row_to_run(row) if row else None
+
+    def list_runs(self, status: Optional[Union[str, Sequence[str]]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Latest runs, optionally only those with the given status (or any of several)"""
+        query = """SELECT r.*, (SELECT COUNT(*) FROM run_results rr WHERE rr.run_id = r.run_id AND rr.retry = 0)
+                       AS completed
+                   FROM runs r"""
+        args: list = []
+        if status:
+            statuses = [status] if isinstance(status, str) else list(status)
+            query += f" WHERE r.status IN ({', '.join('?' * len(statuses))})"
+            args.extend(statuses)
+        query += " ORDER BY r.updated_at DESC LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return [self._row_to_run(row) for row in conn.execute(query, args)]
+
+    @staticmethod
+    def _row_to_run(row: sqlite3.Row) -> Dict[str, Any]:
+        run = dict(row)
+        run["params"] = json.loads(run["params"]) if run.get("params") else {}
+        return run
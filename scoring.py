@@ -0,0 +1,126 @@
+# scoring.py — Vectorized scoring and verdict engine over the candidate DataFrame
+
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from constants import DEFAULT_THRESHOLDS, WEIGHTS
+
+VERDICTS = ["shortlist", "review", "reject"]
+_VERDICT_ARRAY = np.array(VERDICTS, dtype=object)
+_VERDICT_CODES = {verdict: code for code, verdict in enumerate(VERDICTS)}
+
+# Score column -> minimum-threshold key that rejects a candidate below it
+MIN_THRESHOLDS = {
+    "jd_similarity": "jd_similarity_min",
+    "skills_match": "skills_match_min",
+    "domain_match": "domain_match_min",
+    "experience_match": "experience_match_min"
+}
+
+# Weighted components of the final score, in WEIGHTS order
+SCORE_COMPONENTS = list(WEIGHTS)
+
+# GPT component scores are whole numbers in 0-100, so they are stored as uint8
+INTEGER_COMPONENTS = ["skills_match", "domain_match", "experience_match"]
+
+# Candidates whose GPT analysis failed are scored from JD similarity alone
+FALLBACK_SIMILARITY_FACTOR = 0.6
+
+def normalize_weights(weights: Optional[Mapping[str, float]] = None) -> Dict[str, float]:
+    """Weights scaled to sum to 1 so scores stay on the 0-100 scale; all-zero falls back to WEIGHTS"""
+    weights = {component: float((weights or WEIGHTS).get(component, 0.0)) for component in SCORE_COMPONENTS}
+    total = sum(weights.values())
+    if total <= 0:
+        return dict(WEIGHTS)
+    return {component: weight / total for component, weight in weights.items()}
+
+def weighted_score(components: Mapping[str, float], weights: Optional[Mapping[str, float]] = None) -> float:
+    """Final score for a single candidate (same formula as compute_scores)"""
+    weights = normalize_weights(weights)
+    return round(sum(float(components[c]) * weights[c] for c in SCORE_COMPONENTS), 2)
+
+def numeric_column(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Score column as float64; missing or "N/A" values count as 0"""
+    if column not in df.columns:
+        return np.zeros(len(df))
+    values = df[column]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values, errors="coerce")
+    return values.fillna(0.0).to_numpy(dtype=float)
+
+def ensure_score_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Store GPT component scores as uint8 and JD similarity and the final score as float64 (in place)"""
+    for column in SCORE_COMPONENTS + ["score"]:
+        if column not in df.columns:
+            continue
+        if column in INTEGER_COMPONENTS:
+            if df[column].dtype != np.uint8:
+                df[column] = np.clip(np.rint(numeric_column(df, column)), 0, 100).astype(np.uint8)
+        elif df[column].dtype != np.float64:
+            df[column] = numeric_column(df, column)
+    if "analysis_failed" not in df.columns:
+        df["analysis_failed"] = False
+    elif df["analysis_failed"].dtype != bool:
+        df["analysis_failed"] = df["analysis_failed"].map(lambda value: value is True).astype(bool)
+    return df
+
+def compute_scores(df: pd.DataFrame, weights: Optional[Mapping[str, float]] = None) -> np.ndarray:
+    """Final scores for every row under the given weights, as one matrix-vector product"""
+    weights = normalize_weights(weights)
+    components = np.column_stack([numeric_column(df, column) for column in SCORE_COMPONENTS])
+    scores = components @ np.array([weights[column] for column in SCORE_COMPONENTS])
+
+    if "analysis_failed" in df.columns:
+        failed = df["analysis_failed"].to_numpy(dtype=bool)
+        scores = np.where(failed, np.maximum(0.0, numeric_column(df, "jd_similarity") * FALLBACK_SIMILARITY_FACTOR),
+                          scores)
+    return np.round(scores, 2)
+
+def apply_weights(df: pd.DataFrame, weights: Optional[Mapping[str, float]] = None) -> pd.DataFrame:
+    """Recompute the 'score' column in place under new weights; no GPT calls involved"""
+    df["score"] = compute_scores(df, weights)
+    return df
+
+def compute_verdict_codes(df: pd.DataFrame, thresholds: Optional[Dict[str, float]] = None,
+                          top_n: int = 0) -> np.ndarray:
+    """Three-tier verdicts for every row from the stored score columns, as codes into VERDICTS"""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    score = numeric_column(df, "score")
+
+    reject = score < thresholds["reject_threshold"]
+    for column, key in MIN_THRESHOLDS.items():
+        reject |= numeric_column(df, column) < thresholds[key]
+
+    # Integer codes into VERDICTS keep the masks cheap and map straight onto a categorical column
+    codes = np.where(reject, 2, np.where(score >= thresholds["shortlist_threshold"], 0, 1)).astype(np.int8)
+
+    # Top-N candidates by score are shortlisted regardless of thresholds
+    if top_n > 0:
+        codes[np.argsort(-score, kind="stable")[:top_n]] = 0
+    return codes
+
+def compute_verdicts(df: pd.DataFrame, thresholds: Optional[Dict[str, float]] = None, top_n: int = 0) -> np.ndarray:
+    """Three-tier verdicts for every row from the stored score columns, using boolean masks"""
+    return _VERDICT_ARRAY[compute_verdict_codes(df, thresholds, top_n)]
+
+def apply_verdicts(df: pd.DataFrame, thresholds: Optional[Dict[str, float]] = None, top_n: int = 0) -> pd.DataFrame:
+    """
+    Recompute verdicts in place as categorical columns. The computed verdict is kept in
+    'auto_verdict'; 'verdict' takes a recruiter's manual override from 'verdict_override' when set.
+    """
+    if "verdict_override" not in df.columns:
+        df["verdict_override"] = ""
+    auto = compute_verdict_codes(df, thresholds, top_n)
+    df["auto_verdict"] = pd.Categorical.from_codes(auto, categories=VERDICTS)
+
+    # Overrides are rare, so only the overridden rows are mapped to codes
+    overrides = df["verdict_override"].to_numpy(dtype=object)
+    overridden = np.flatnonzero(pd.notna(overrides) & (overrides != ""))
+    codes = auto
+    if overridden.size:
+        codes = auto.copy()
+        codes[overridden] = [_VERDICT_CODES.get(overrides[i], auto[i]) for i in overridden]
+    df["verdict"] = pd.Categorical.from_codes(codes, categories=VERDICTS)
+    return df
@@ -0,0 +1,219 @@
+# screener.py — Headless batch screening CLI (no Streamlit), e.g. for cron or CI
+#
+#   python -m screener run --jd jd.txt --source dir --dir ./resumes --out results.parquet
+#   python -m screener run --jd jd.txt --source blob --format csv --concurrency 20
+#   python -m screener distribute --jd jd.txt --shard-size 50   (then 'worker' on each node, 'merge <job>')
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import List, Optional
+
+from constants import AZURE_CONFIG, DEFAULT_THRESHOLDS, PERFORMANCE_CONFIG, DISTRIBUTED_CONFIG, RESUME_BLOB_CONFIG
+from distributed import Coordinator, run_worker_node
+from pipeline import screen_resumes, load_resumes_from_blob, load_resumes_from_dir, build_results_frame, window_start
+from results_io import write_results
+from utils import compute_content_hash
+from run_journal import RunJournal
+from warehouse import get_warehouse
+
+logger = logging.getLogger("screener")
+
+def add_screening_args(parser: argparse.ArgumentParser) -> None:
+    """JD, job parameters and thresholds shared by 'run' and 'distribute'"""
+    parser.add_argument("--jd", required=True, help="Path to the job description text file")
+    parser.add_argument("--role", help="Role title (extracted from the JD when omitted)")
+    parser.add_argument("--domain", default="", help="Preferred domain")
+    parser.add_argument("--skills", default="", help="Required skills, comma separated")
+    parser.add_argument("--experience", default="", help="Required experience, e.g. '1–3 yrs'")
+
+    for key, default in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=float, default=default)
+    parser.add_argument("--top-n", type=int, default=0, help="Force-shortlist the top N candidates (0 = off)")
+    parser.add_argument("--days", type=int, default=RESUME_BLOB_CONFIG["window_days"],
+                        help="Only blob resumes received in the last N days (0 = the whole container)")
+
+def add_output_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--out", help="Output file (default: screening_<timestamp>.<format>)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet", help="Output format")
+    parser.add_argument("--include-text", action="store_true", help="Keep the parsed resume text in the output")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="screener", description="EazyAI headless resume screening")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Screen a batch of resumes against a job description")
+    add_screening_args(run)
+    add_output_args(run)
+    run.add_argument("--source", choices=["blob", "dir"], default="blob", help="Where to load resumes from")
+    run.add_argument("--dir", help="Resume directory (required with --source dir)")
+    run.add_argument("--recursive", action="store_true", help="Also read resumes in sub-directories")
+    run.add_argument("--upload", action="store_true",
+                     help="Upload directory resumes to the resumes container while screening")
+    run.add_argument("--concurrency", type=int, default=PERFORMANCE_CONFIG["pipeline_concurrency"],
+                     help="Resumes processed at once")
+    run.add_argument("--run-id", help="Resume an interrupted run from the journal")
+    run.add_argument("--no-journal", action="store_true", help="Do not journal results")
+
+    distribute = subparsers.add_parser("distribute", help="Shard blob resumes across worker nodes")
+    add_screening_args(distribute)
+    add_output_args(distribute)
+    distribute.add_argument("--shard-size", type=int, default=DISTRIBUTED_CONFIG["shard_size"],
+                            help="Resumes per shard")
+    distribute.add_argument("--wait", action="store_true", help="Wait for all shards, then write merged results")
+    distribute.add_argument("--timeout", type=float, help="Give up waiting after this many seconds")
+
+    worker = subparsers.add_parser("worker", help="Run shard workers on this node until interrupted")
+    worker.add_argument("--workers", type=int, default=DISTRIBUTED_CONFIG["workers"],
+                        help="Shards processed concurrently")
+
+    status = subparsers.add_parser("status", help="Show progress of a distributed job")
+    status.add_argument("job_id")
+
+    merge = subparsers.add_parser("merge", help="Merge finished shards of a distributed job")
+    merge.add_argument("job_id")
+    add_output_args(merge)
+    return parser
+
+def read_jd(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            jd = f.read()
+    except OSError as e:
+        logger.error(f"Cannot read job description: {str(e)}")
+        return None
+    if not jd.strip():
+        logger.error("Job description is empty")
+        return None
+    return jd
+
+def default_out_path(fmt: str) -> str:
+    return f"screening_{time.strftime('%Y%m%d_%H%M%S')}.{fmt}"
+
+def run_command(args: argparse.Namespace) -> int:
+    jd = read_jd(args.jd)
+    if jd is None:
+        return 2
+
+    if args.source == "dir":
+        if not args.dir or not os.path.isdir(args.dir):
+            logger.error("--source dir needs an existing --dir")
+            return 2
+        resume_files = load_resumes_from_dir(args.dir, recursive=args.recursive)
+    else:
+        resume_files = load_resumes_from_blob(since=window_start(args.days))
+
+    if not resume_files:
+        logger.error("No resume files found")
+        return 1
+
+    out_path = args.out or default_out_path(args.format)
+    thresholds = {key: getattr(args, key) for key in DEFAULT_THRESHOLDS}
+    journal = None if args.no_journal else RunJournal()
+
+    def log_progress(done: int, total: int, message: str):
+        if done == total or done % 10 == 0:
+            logger.info(f"[{done}/{total}] {message}")
+
+    start_time = time.time()
+    run = screen_resumes(
+        jd, resume_files,
+        role=args.role, domain=args.domain, skills=args.skills, experience_range=args.experience,
+        thresholds=thresholds,
+        concurrency=args.concurrency,
+        journal=journal,
+        run_id=args.run_id,
+        upload_container=AZURE_CONFIG["resumes_container"] if args.upload and args.source == "dir" else None,
+        progress_callback=log_progress,
+        run_params={"source": args.source, "cli": True}
+    )
+
+    if not run["results"]:
+        logger.error("No resumes were successfully processed")
+        return 1
+
+    df = build_results_frame(run["results"], thresholds, args.top_n)
+    write_results(df, out_path, args.format, include_text=args.include_text)
+    if run["run_id"]:
+        get_warehouse().record_run(run["run_id"], df, role=run["role"], jd_hash=run["jd_hash"],
+                                   metrics=run["metrics"], source=args.source)
+
+    verdicts = df["verdict"].value_counts().to_dict()
+    metrics = run["metrics"]
+    logger.info(
+        f"Screened {len(df)} resumes in {time.time() - start_time:.2f}s "
+        f"(shortlist {verdicts.get('shortlist', 0)}, review {verdicts.get('review', 0)}, "
+        f"reject {verdicts.get('reject', 0)}; escalation rate {metrics['model_routing']['escalation_rate']:.1f}%)"
+    )
+    if run["run_id"]:
+        logger.info(f"Run id: {run['run_id']}")
+    logger.info(f"Results written to {out_path}")
+    return 0
+
+def distribute_command(args: argparse.Namespace) -> int:
+    jd = read_jd(args.jd)
+    if jd is None:
+        return 2
+
+    coordinator = Coordinator()
+    try:
+        job_id = coordinator.submit(
+            jd, shard_size=args.shard_size,
+            role=args.role, domain=args.domain, skills=args.skills, experience_range=args.experience,
+            thresholds={key: getattr(args, key) for key in DEFAULT_THRESHOLDS}, top_n=args.top_n,
+            since=window_start(args.days)
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    print(job_id)
+    if not args.wait:
+        logger.info(f"Start workers with 'python -m screener worker', then 'python -m screener merge {job_id}'")
+        return 0
+
+    status = coordinator.wait(job_id, timeout=args.timeout)
+    logger.info(f"Job {job_id}: {status['shards']}")
+    return merge_and_write(coordinator, job_id, args)
+
+def merge_and_write(coordinator: Coordinator, job_id: str, args: argparse.Namespace) -> int:
+    df = coordinator.merge_results(job_id)
+    if df is None:
+        logger.error(f"No finished shards for job {job_id}")
+        return 1
+    out_path = args.out or default_out_path(args.format)
+    write_results(df, out_path, args.format, include_text=args.include_text)
+    payload = coordinator.job_payload(job_id)
+    role = payload.get("role") or (df["jd_role"].iloc[0] if "jd_role" in df.columns else None)
+    get_warehouse().record_run(job_id, df, role=role, jd_hash=compute_content_hash(payload.get("jd", "")),
+                               source="distributed")
+    logger.info(f"Merged {len(df)} candidates from job {job_id} into {out_path}")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "run":
+        return run_command(args)
+    if args.command == "distribute":
+        return distribute_command(args)
+    if args.command == "worker":
+        try:
+            asyncio.run(run_worker_node(workers=args.workers))
+        except KeyboardInterrupt:
+            logger.info("Worker node stopped")
+        return 0
+    if args.command == "status":
+        print(json.dumps(Coordinator().status(args.job_id), indent=2))
+        return 0
+    if args.command == "merge":
+        return merge_and_write(Coordinator(), args.job_id, args)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
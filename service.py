@@ -0,0 +1,255 @@
+# service.py — ASGI screening service: persistent job queue, worker pool and paginated results
+#
+#   uvicorn service:app --host 0.0.0.0 --port 8000
+#
+# POST /jobs                    submit a screening job (JD + blob or inline resumes)
+# GET  /jobs                    list jobs
+# GET  /jobs/{job_id}           job status and progress
+# GET  /jobs/{job_id}/results   paginated candidates (partial while the job runs)
+# GET  /health                  queue depth, workers and dependency health
+
+import asyncio
+import base64
+import binascii
+import contextlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from constants import DEFAULT_THRESHOLDS, SERVICE_CONFIG
+from pipeline import build_results_frame
+from scoring import apply_verdicts, ensure_score_columns
+from resilience import get_resilience_status
+from run_journal import RunJournal
+from task_queue import TaskQueue, DONE, FAILED
+from utils import BoundedCache, is_supported_resume_format
+from workers import ScreeningWorkerPool, SCREENING_QUEUE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+JOB_FIELDS = ("role", "domain", "skills", "experience_range")
+
+# ==========================
+# 🌐 HTTP API
+# ==========================
+
+job_queue = TaskQueue(SCREENING_QUEUE)
+run_journal = RunJournal()
+worker_pool = ScreeningWorkerPool(job_queue, run_journal)
+
+# Finished jobs never change, so their result frames are cached for paging
+_results_cache = BoundedCache(maxsize=32)
+# Running jobs: the frame built so far and the journal position it reflects; each page
+# request only builds the results journaled since
+_partial_frames = BoundedCache(maxsize=32)
+
+def error_response(message: str, status_code: int = 400) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status_code)
+
+def validate_job_request(body: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Normalize a job submission; returns (payload, error)"""
+    jd = body.get("jd")
+    if not isinstance(jd, str) or not jd.strip():
+        return None, "'jd' (job description text) is required"
+
+    payload = {"jd": jd, "source": body.get("source", "blob")}
+    for field in JOB_FIELDS:
+        if body.get(field) is not None:
+            payload[field] = str(body[field])
+
+    thresholds = body.get("thresholds") or {}
+    unknown = set(thresholds) - set(DEFAULT_THRESHOLDS)
+    if unknown:
+        return None, f"Unknown thresholds: {', '.join(sorted(unknown))}"
+    try:
+        payload["thresholds"] = {key: float(value) for key, value in thresholds.items()}
+        payload["top_n"] = int(body.get("top_n", 0))
+        if body.get("concurrency") is not None:
+            payload["concurrency"] = max(1, int(body["concurrency"]))
+    except (TypeError, ValueError):
+        return None, "thresholds, top_n and concurrency must be numeric"
+
+    if payload["source"] == "inline":
+        resumes = body.get("resumes") or []
+        if not resumes:
+            return None, "'resumes' is required for inline jobs"
+        for item in resumes:
+            if not isinstance(item, dict) or not is_supported_resume_format(str(item.get("file_name", ""))):
+                return None, "Each resume needs a PDF/DOCX/DOC 'file_name' and 'content_base64'"
+            try:
+                base64.b64decode(item.get("content_base64", ""), validate=True)
+            except (binascii.Error, ValueError):
+                return None, f"Invalid base64 content for {item['file_name']}"
+        payload["resumes"] = [{"file_name": r["file_name"], "content_base64": r["content_base64"]} for r in resumes]
+    elif payload["source"] == "blob":
+        if body.get("blob_names") is not None:
+            payload["blob_names"] = [str(name) for name in body["blob_names"]]
+    else:
+        return None, "'source' must be 'blob' or 'inline'"
+
+    return payload, None
+
+def job_view(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Public job representation (never echoes resume content)"""
+    payload = task["payload"] or {}
+    return {
+        "job_id": task["task_id"],
+        "status": task["status"],
+        "attempts": task["attempts"],
+        "progress": task["progress"],
+        "summary": task["result"],
+        "error": task["error"],
+        "request": {k: v for k, v in payload.items() if k not in ("jd", "resumes")},
+        "created_at": task["created_at"],
+        "updated_at": task["updated_at"]
+    }
+
+def parse_int(value: Optional[str], default: int, minimum: int, maximum: Optional[int] = None) -> int:
+    try:
+        number = int(value) if value is not None else default
+    except ValueError:
+        number = default
+    number = max(minimum, number)
+    return min(number, maximum) if maximum is not None else number
+
+async def submit_job(request: Request) -> JSONResponse:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, ValueError):
+        return error_response("Request body must be JSON")
+    if not isinstance(body, dict):
+        return error_response("Request body must be a JSON object")
+
+    payload, error = validate_job_request(body)
+    if error:
+        return error_response(error)
+
+    job_id = await asyncio.to_thread(job_queue.enqueue, payload, None, SERVICE_CONFIG["max_attempts"])
+    logger.info(f"Job {job_id} queued ({payload['source']})")
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+async def list_jobs(request: Request) -> JSONResponse:
+    limit = parse_int(request.query_params.get("limit"), SERVICE_CONFIG["default_page_size"], 1,
+                      SERVICE_CONFIG["max_page_size"])
+    offset = parse_int(request.query_params.get("offset"), 0, 0)
+    tasks = await asyncio.to_thread(job_queue.list_tasks, request.query_params.get("status"), limit, offset)
+    return JSONResponse({"jobs": [job_view(task) for task in tasks], "limit": limit, "offset": offset})
+
+async def get_job(request: Request) -> JSONResponse:
+    task = await asyncio.to_thread(job_queue.get, request.path_params["job_id"])
+    if task is None or task["queue"] != SCREENING_QUEUE:
+        return error_response("Job not found", 404)
+    return JSONResponse(job_view(task))
+
+def load_results_frame(task: Dict[str, Any]):
+    job_id = task["task_id"]
+    payload = task["payload"]
+    thresholds, top_n = payload.get("thresholds"), payload.get("top_n", 0)
+
+    if task["status"] == DONE:
+        cached = _results_cache.get(job_id)
+        if cached is None:
+            # Built once from the whole journal, fallback (analysis_failed) rows included, so
+            # the frame lists every resume counted in the job's resumes_processed
+            results = run_journal.load_results(job_id, include_retry=True)
+            if not results:
+                return None
+            frame = build_results_frame(results, thresholds, top_n, include_text=False)
+            cached = frame.sort_values("score", ascending=False).reset_index()
+            _results_cache.set(job_id, cached)
+        return cached
+
+    frame, position = _partial_frames.get(job_id) or (None, 0)
+    results, position = run_journal.load_results_after(job_id, position)
+    if results:
+        # Only new results are parsed; Top-N is a ranking over all rows, so verdicts
+        # are reapplied to the combined frame
+        new_rows = build_results_frame(results, thresholds, include_text=False)
+        if frame is not None:
+            new_rows = pd.concat([frame[~frame.index.isin(new_rows.index)], new_rows])
+            text_columns = new_rows.select_dtypes(include="object").columns
+            new_rows[text_columns] = new_rows[text_columns].fillna("N/A")
+            ensure_score_columns(new_rows)
+        frame = apply_verdicts(new_rows, thresholds, top_n)
+        _partial_frames.set(job_id, (frame, position))
+    if frame is None:
+        return None
+    return frame.sort_values("score", ascending=False).reset_index()
+
+async def get_job_results(request: Request) -> JSONResponse:
+    task = await asyncio.to_thread(job_queue.get, request.path_params["job_id"])
+    if task is None or task["queue"] != SCREENING_QUEUE:
+        return error_response("Job not found", 404)
+
+    page = parse_int(request.query_params.get("page"), 1, 1)
+    page_size = parse_int(request.query_params.get("page_size"), SERVICE_CONFIG["default_page_size"], 1,
+                          SERVICE_CONFIG["max_page_size"])
+    verdict = request.query_params.get("verdict")
+
+    df = await asyncio.to_thread(load_results_frame, task)
+    if df is None:
+        return JSONResponse({"job_id": task["task_id"], "status": task["status"], "page": page,
+                             "page_size": page_size, "total": 0, "results": []})
+
+    if verdict:
+        df = df[df["verdict"] == verdict]
+    start = (page - 1) * page_size
+    page_df = df.iloc[start:start + page_size]
+
+    return JSONResponse({
+        "job_id": task["task_id"],
+        "status": task["status"],
+        "partial": task["status"] not in (DONE, FAILED),
+        "page": page,
+        "page_size": page_size,
+        "total": len(df),
+        "results": json.loads(page_df.to_json(orient="records"))
+    })
+
+async def health(request: Request) -> JSONResponse:
+    counts = await asyncio.to_thread(job_queue.counts)
+    return JSONResponse({
+        "status": "ok",
+        "queue": counts,
+        "workers": worker_pool.workers,
+        "active_jobs": list(worker_pool.active_jobs.values()),
+        "dependencies": get_resilience_status()
+    })
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    worker_pool.start()
+    try:
+        yield
+    finally:
+        await worker_pool.stop()
+
+app = Starlette(
+    routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/jobs", submit_job, methods=["POST"]),
+        Route("/jobs", list_jobs, methods=["GET"]),
+        Route("/jobs/{job_id}", get_job, methods=["GET"]),
+        Route("/jobs/{job_id}/results", get_job_results, methods=["GET"]),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=SERVICE_CONFIG["cors_origins"],
+                   allow_methods=["GET", "POST"], allow_headers=["*"])
+    ],
+    lifespan=lifespan
+)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")))
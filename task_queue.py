@@ -0,0 +1,221 @@
+# task_queue.py — Persistent SQLite task queue with leases, heartbeats and retry
+
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from constants import STORAGE_CONFIG
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    group_id TEXT,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_queue_status ON tasks (queue, status, created_at);
+"""
+
+_GROUP_INDEX = "CREATE INDEX IF NOT EXISTS idx_tasks_group ON tasks (group_id, status)"
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+class LeaseLostError(Exception):
+    """Raised when a worker updates a task whose lease it no longer holds"""
+
+class TaskQueue:
+    """
+    Durable FIFO queue on SQLite. A worker leases a task for a limited time and must
+    heartbeat to keep it; tasks whose lease expires are handed to the next worker
+    until max_attempts is reached.
+    """
+
+    def __init__(self, queue: str = "default", db_path: Optional[str] = None):
+        self.queue = queue
+        self.db_path = db_path or STORAGE_CONFIG["task_queue_path"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Queues created before task groups existed get the column added in place
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+            if "group_id" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN group_id TEXT")
+            conn.execute(_GROUP_INDEX)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation; safe across threads and processes
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, payload: Dict[str, Any], task_id: Optional[str] = None, max_attempts: int = 3,
+                group_id: Optional[str] = None) -> str:
+        task_id = task_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO tasks (task_id, queue, group_id, status, payload, max_attempts, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (task_id, self.queue, group_id, QUEUED, json.dumps(payload, default=str), max_attempts, now, now)
+            )
+        return task_id
+
+    def enqueue_many(self, payloads: List[Dict[str, Any]], max_attempts: int = 3,
+                     group_id: Optional[str] = None) -> List[str]:
+        """Enqueue several tasks atomically, optionally as one group (e.g. shards of a job)"""
+        now = time.time()
+        rows = [(uuid.uuid4().hex[:12], self.queue, group_id, QUEUED, json.dumps(p, default=str),
+                 max_attempts, now, now)
+                for p in payloads]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                """INSERT INTO tasks (task_id, queue, group_id, status, payload, max_attempts, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            conn.execute("COMMIT")
+        return [row[0] for row in rows]
+
+    def lease(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Claim the oldest available task (queued, or leased with an expired lease)"""
+        now = time.time()
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock so two workers never claim the same task
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    """UPDATE tasks SET status = ?, error = 'lease expired after max attempts', updated_at = ?
+                       WHERE queue = ? AND status = ? AND lease_expires < ? AND attempts >= max_attempts""",
+                    (FAILED, now, self.queue, LEASED, now)
+                )
+                row = conn.execute(
+                    """SELECT task_id FROM tasks
+                       WHERE queue = ? AND (status = ? OR (status = ? AND lease_expires < ?))
+                       ORDER BY created_at LIMIT 1""",
+                    (self.queue, QUEUED, LEASED, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    """UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?,
+                           attempts = attempts + 1, updated_at = ?
+                       WHERE task_id = ?""",
+                    (LEASED, owner, now + lease_seconds, now, row["task_id"])
+                )
+                task = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (row["task_id"],)).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if task["attempts"] > 1:
+            logger.info(f"Task {task['task_id']} re-leased by {owner} (attempt {task['attempts']})")
+        return self._row_to_task(task)
+
+    def _update_owned(self, task_id: str, owner: str, sql: str, args: tuple) -> None:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                sql + " WHERE task_id = ? AND lease_owner = ? AND status = ?",
+                args + (task_id, owner, LEASED)
+            )
+            if cursor.rowcount == 0:
+                raise LeaseLostError(f"Worker {owner} no longer holds task {task_id}")
+
+    def heartbeat(self, task_id: str, owner: str, lease_seconds: float,
+                  progress: Optional[Dict[str, Any]] = None) -> None:
+        """Extend the lease (and optionally record progress); raises LeaseLostError if it was lost"""
+        now = time.time()
+        if progress is None:
+            self._update_owned(task_id, owner, "UPDATE tasks SET lease_expires = ?, updated_at = ?",
+                               (now + lease_seconds, now))
+        else:
+            self._update_owned(task_id, owner, "UPDATE tasks SET lease_expires = ?, progress = ?, updated_at = ?",
+                               (now + lease_seconds, json.dumps(progress, default=str), now))
+
+    def complete(self, task_id: str, owner: str, result: Optional[Dict[str, Any]] = None) -> None:
+        self._update_owned(
+            task_id, owner,
+            "UPDATE tasks SET status = ?, result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?",
+            (DONE, json.dumps(result, default=str) if result is not None else None, time.time())
+        )
+
+    def fail(self, task_id: str, owner: str, error: str, retry: bool = True) -> str:
+        """Release a failed task back to the queue, or mark it failed when out of attempts"""
+        task = self.get(task_id)
+        status = QUEUED if retry and task and task["attempts"] < task["max_attempts"] else FAILED
+        self._update_owned(
+            task_id, owner,
+            "UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?",
+            (status, error, time.time())
+        )
+        logger.warning(f"Task {task_id} {'requeued' if status == QUEUED else 'failed'}: {error}")
+        return status
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def list_tasks(self, status: Optional[str] = None, limit: int = 50, offset: int = 0,
+                   group_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM tasks WHERE queue = ?"
+        args: list = [self.queue]
+        if group_id:
+            query += " AND group_id = ?"
+            args.append(group_id)
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC, task_id LIMIT ? OFFSET ?"
+        args.extend([limit, offset])
+        with self._connect() as conn:
+            return [self._row_to_task(row) for row in conn.execute(query, args)]
+
+    def counts(self, group_id: Optional[str] = None) -> Dict[str, int]:
+        query = "SELECT status, COUNT(*) AS n FROM tasks WHERE queue = ?"
+        args: list = [self.queue]
+        if group_id:
+            query += " AND group_id = ?"
+            args.append(group_id)
+        with self._connect() as conn:
+            rows = conn.execute(query + " GROUP BY status", args)
+            counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+            counts.update({row["status"]: row["n"] for row in rows})
+            return counts
+
+    @staticmethod
+    def _row_to_task(row: sqlite3.Row) -> Dict[str, Any]:
+        task = dict(row)
+        for field in ("payload", "progress", "result"):
+            task[field] = json.loads(task[field]) if task.get(field) else None
+        return task
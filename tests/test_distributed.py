@@ -0,0 +1,31 @@
+# test_distributed.py — Shard results merged from the shared run journal
+
+from distributed import Coordinator
+from run_journal import RunJournal
+from task_queue import TaskQueue
+
+def analysis(candidate_id, score, failed=False):
+    return {
+        "candidate_id": candidate_id, "name": candidate_id, "resume_file": f"{candidate_id}.pdf",
+        "score": score, "jd_similarity": 80.0, "skills_match": 70, "domain_match": 70,
+        "experience_match": 70, "analysis_failed": failed
+    }
+
+def test_merge_reads_shard_rows_from_the_journal(tmp_path):
+    broker = TaskQueue("distributed", db_path=str(tmp_path / "broker.sqlite3"))
+    journal = RunJournal(str(tmp_path / "journal.sqlite3"))
+    coordinator = Coordinator(broker, journal=journal)
+    job_id = coordinator.submit("jd", blob_names=["a.pdf", "b.pdf", "c.pdf"], shard_size=2)
+
+    shards = [broker.lease("node", 60) for _ in range(2)]
+    for shard, rows in zip(shards, ([analysis("a", 82.0), analysis("b", 0.0, failed=True)], [analysis("c", 64.0)])):
+        run_id = journal.start_run("jd", {}, len(rows), run_id=shard["task_id"])
+        for row in rows:
+            journal.record_result(run_id, row["candidate_id"], row["resume_file"], row, retry=row["analysis_failed"])
+        broker.complete(shard["task_id"], "node", {"run_id": run_id, "resumes_processed": len(rows)})
+
+    # Task results carry only the summary; the candidates come from the journal
+    assert all("results" not in shard["result"] for shard in broker.list_tasks(group_id=job_id))
+    assert coordinator.status(job_id)["finished"]
+    df = coordinator.merge_results(job_id)
+    assert sorted(df.index) == ["a", "b", "c"]
@@ -0,0 +1,127 @@
+# test_email_outbox.py — Outbox idempotency, claims, lease expiry and retries
+
+import asyncio
+import smtplib
+
+import pytest
+
+import email_outbox
+from email_outbox import FAILED, PENDING, SENDING, SENT, EmailOutbox, OutboxDispatcher
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(email_outbox.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def outbox(tmp_path, clock):
+    return EmailOutbox(str(tmp_path / "outbox.sqlite3"),
+                       config={"max_attempts": 3, "backoff_base": 10.0, "backoff_max": 25.0})
+
+def emails(*candidate_ids):
+    return [{"candidate_id": candidate_id, "to": f"{candidate_id}@example.com", "subject": "Update", "body": "Hello"}
+            for candidate_id in candidate_ids]
+
+def test_enqueue_is_idempotent_per_candidate_template_and_jd(outbox):
+    assert outbox.enqueue_many(emails("a", "b"), "reject", jd_hash="jd1")["queued"] == 2
+    batch = outbox.enqueue_many(emails("a", "b", "c"), "reject", jd_hash="jd1")
+    assert (batch["queued"], batch["duplicates"]) == (1, 2)
+    assert outbox.enqueue_many(emails("a"), "shortlist", jd_hash="jd1")["queued"] == 1
+    assert outbox.enqueue_many(emails("a"), "reject", jd_hash="jd2")["queued"] == 1
+    assert outbox.counts()[PENDING] == 5
+
+def test_key_without_jd_matches_the_unscoped_key():
+    assert email_outbox.idempotency_key("a", "reject") == email_outbox.idempotency_key("a", "reject", None)
+    assert email_outbox.idempotency_key("a", "reject") != email_outbox.idempotency_key("a", "reject", "jd1")
+
+def test_claims_do_not_overlap_and_respect_send_after(outbox, clock):
+    outbox.enqueue_many(emails("a", "b", "c"), "reject")
+    outbox.enqueue_many(emails("later"), "reject", delay_seconds=60)
+
+    first = outbox.claim_due(2, lease_seconds=30)
+    second = outbox.claim_due(10, lease_seconds=30)
+    assert len(first) == 2 and len(second) == 1
+    assert not {m["message_id"] for m in first} & {m["message_id"] for m in second}
+    assert all(m["attempts"] == 1 for m in first + second)
+    assert outbox.claim_due(10, lease_seconds=30) == []
+
+    outbox.mark_sent([m["message_id"] for m in first + second])
+    clock.now += 61
+    claimed = outbox.claim_due(10, lease_seconds=30)
+    assert [m["candidate_id"] for m in claimed] == ["later"]
+
+def test_expired_lease_is_claimed_again(outbox, clock):
+    outbox.enqueue_many(emails("a"), "reject")
+    (message,) = outbox.claim_due(10, lease_seconds=30)
+    assert outbox.counts()[SENDING] == 1
+
+    clock.now += 29
+    assert outbox.claim_due(10, lease_seconds=30) == []
+    clock.now += 2
+    (reclaimed,) = outbox.claim_due(10, lease_seconds=30)
+    assert reclaimed["message_id"] == message["message_id"]
+    assert reclaimed["attempts"] == 2
+
+    outbox.mark_sent([reclaimed["message_id"]])
+    clock.now += 100
+    assert outbox.claim_due(10, lease_seconds=30) == []
+    assert outbox.counts()[SENT] == 1
+
+def test_retry_backoff_then_failure(outbox, clock):
+    outbox.enqueue_many(emails("a"), "reject")
+    (message,) = outbox.claim_due(10, lease_seconds=30)
+    assert outbox.mark_failed(message, "timeout") == PENDING
+
+    clock.now += 9
+    assert outbox.claim_due(10, lease_seconds=30) == []
+    clock.now += 1
+    (message,) = outbox.claim_due(10, lease_seconds=30)
+    assert outbox.mark_failed(message, "timeout") == PENDING
+
+    # Backoff doubles to 20 s (capped at 25 s)
+    clock.now += 19
+    assert outbox.claim_due(10, lease_seconds=30) == []
+    clock.now += 1
+    (message,) = outbox.claim_due(10, lease_seconds=30)
+    assert message["attempts"] == 3
+    assert outbox.mark_failed(message, "timeout") == FAILED
+
+    clock.now += 1000
+    assert outbox.claim_due(10, lease_seconds=30) == []
+    (failed,) = outbox.list_messages(status=FAILED)
+    assert failed["last_error"] == "timeout"
+
+def test_permanent_failure_is_not_retried(outbox):
+    outbox.enqueue_many(emails("a"), "reject")
+    (message,) = outbox.claim_due(10, lease_seconds=30)
+    error = smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no such user")})
+    assert email_outbox.is_permanent_failure(error)
+    assert outbox.mark_failed(message, str(error), permanent=True) == FAILED
+    assert not email_outbox.is_permanent_failure(smtplib.SMTPAuthenticationError(535, b"bad credentials"))
+
+def test_dispatcher_sends_and_schedules_retries(outbox, clock):
+    outbox.enqueue_many(emails("ok", "flaky"), "reject")
+    delivered = []
+
+    def deliver(message):
+        if message["candidate_id"] == "flaky" and message["attempts"] == 1:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        delivered.append(message["candidate_id"])
+
+    dispatcher = OutboxDispatcher(outbox, deliver, concurrency=2)
+    assert asyncio.run(dispatcher.drain_once()) == 2
+    assert delivered == ["ok"]
+    assert dispatcher.stats == {"sent": 1, "retried": 1, "failed": 0}
+
+    clock.now += 10
+    assert asyncio.run(dispatcher.drain_once()) == 1
+    assert sorted(delivered) == ["flaky", "ok"]
+    assert outbox.counts()[SENT] == 2
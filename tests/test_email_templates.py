@@ -0,0 +1,68 @@
+# test_email_templates.py — Compiled batch rendering against plain str.format
+
+import html
+from string import Formatter
+
+import pandas as pd
+import pytest
+
+from constants import EMAIL_TEMPLATES, INTERVIEW_DETAIL_DEFAULTS
+from email_templates import CompiledTemplate, format_highlights, get_email_template, html_document
+
+CONTEXT = {
+    "role": "Data Engineer <Azure & Spark>",
+    "company_name": "Acme & Sons",
+    "feedback_section": "Feedback:\n• Add more {detail} on projects",
+    "days_since_application": 7,
+    "missing_list": "• Phone number\n• Notice period",
+    **INTERVIEW_DETAIL_DEFAULTS
+}
+
+CANDIDATES = [
+    {"name": "Asha Rao", "highlights": ["Led <b>5</b> engineers", "SQL & Python"]},
+    {"name": "", "highlights": []},
+    {"name": None, "highlights": None},
+    {"name": float("nan"), "highlights": ["   ", "Spark {streaming}"]},
+    {"name": "O'Brien \"Jr\"", "highlights": ["a", "b", "c", "d", "e", "f"]}
+]
+
+def expected(template, candidate):
+    name = candidate["name"]
+    values = {
+        **{field: str(value) for field, value in CONTEXT.items()},
+        "name": name if isinstance(name, str) and name else "Candidate",
+        "highlights": format_highlights(candidate["highlights"])
+    }
+    body = template["body"].format(**values)
+    return {"subject": template["subject"].format(**values), "body": body, "html": html_document(body)}
+
+@pytest.mark.parametrize("name", sorted(EMAIL_TEMPLATES))
+def test_render_batch_matches_str_format(name):
+    rendered = get_email_template(name).render_batch(CANDIDATES, **CONTEXT)
+    assert rendered == [expected(EMAIL_TEMPLATES[name], candidate) for candidate in CANDIDATES]
+
+@pytest.mark.parametrize("name", ["shortlist", "rejection_notice"])
+def test_dataframe_and_single_render_match_the_batch(name):
+    template = get_email_template(name)
+    batch = template.render_batch(CANDIDATES, **CONTEXT)
+    assert template.render_batch(pd.DataFrame(CANDIDATES), **CONTEXT) == batch
+    assert [template.render(candidate, **CONTEXT) for candidate in CANDIDATES] == batch
+    assert template.render_batch([], **CONTEXT) == []
+
+def test_html_escapes_values_once():
+    (email,) = get_email_template("shortlist").render_batch(CANDIDATES[:1], **CONTEXT)
+    assert html.escape(CONTEXT["role"], quote=False) in email["html"]
+    assert "&lt;b&gt;5&lt;/b&gt;" in email["html"] and "&amp;amp;" not in email["html"]
+    assert "<br>" in email["html"] and CONTEXT["role"] in email["subject"]
+
+def test_missing_context_field_renders_empty():
+    (email,) = get_email_template("reject").render_batch(CANDIDATES[:1], role="Analyst")
+    assert email["body"] == EMAIL_TEMPLATES["reject"]["body"].format(name="Asha Rao", role="Analyst", company_name="")
+
+def test_compile_round_trips_literals_and_rejects_format_specs():
+    template = "Hi {name}, {{braces}} stay; score {score}"
+    compiled = CompiledTemplate.compile(template)
+    assert compiled.fields == [field for _, field, _, _ in Formatter().parse(template) if field]
+    assert compiled.render_columns({"name": ["A"], "score": ["9"]}, 1) == [template.format(name="A", score="9")]
+    with pytest.raises(ValueError):
+        CompiledTemplate.compile("{score:.1f}")
@@ -0,0 +1,155 @@
+# test_imap_ingest.py — IMAP response parsing and attachment discovery on server BODYSTRUCTUREs
+
+import pytest
+
+from imap_ingest import (
+    SUBJECT_FIELD, attachment_parts, decode_part, decode_subject, ingest_unseen, join_fetch_response,
+    parse_fetch_items, parse_response, uid_set, wanted_parts
+)
+
+# Gmail: text and HTML alternative, then a PDF resume and a signature image
+GMAIL_APPLICATION = (
+    b'* 12 FETCH (UID 4821 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 74 2 NIL NIL NIL)'
+    b'("TEXT" "HTML" ("CHARSET" "UTF-8") NIL NIL "QUOTED-PRINTABLE" 412 9 NIL NIL NIL) "ALTERNATIVE" '
+    b'("BOUNDARY" "000000000000a1b2c3") NIL NIL)'
+    b'("APPLICATION" "PDF" ("NAME" "Asha_Rao_Resume.pdf") "<f_lx1>" NIL "BASE64" 183412 NIL '
+    b'("ATTACHMENT" ("FILENAME" "Asha_Rao_Resume.pdf")) NIL)'
+    b'("IMAGE" "PNG" ("NAME" "image001.png") "<ii_lx2>" NIL "BASE64" 9120 NIL ("INLINE" ("FILENAME" "image001.png")) NIL)'
+    b' "MIXED" ("BOUNDARY" "000000000000d4e5f6") NIL NIL))'
+)
+
+# Outlook through Dovecot: RFC 2231 and encoded-word file names, name only in Content-Type
+OUTLOOK_APPLICATION = (
+    b'* 3 FETCH (UID 77 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "iso-8859-1") NIL NIL "QUOTED-PRINTABLE" 310 11 '
+    b'NIL NIL NIL NIL)'
+    b'("APPLICATION" "VND.OPENXMLFORMATS-OFFICEDOCUMENT.WORDPROCESSINGML.DOCUMENT" '
+    b'("NAME" "=?utf-8?B?UsOpc3Vtw6kgSm9zw6kuZG9jeA==?=") NIL "CV" "BASE64" 52210 NIL '
+    b'("ATTACHMENT" ("FILENAME*" "utf-8\'\'R%C3%A9sum%C3%A9%20Jos%C3%A9.docx" "SIZE" "38150")) NIL NIL)'
+    b'("APPLICATION" "MSWORD" ("NAME" "cover letter.doc") NIL NIL "BASE64" 24000 NIL NIL NIL NIL)'
+    b' "MIXED" ("BOUNDARY" "_004_AM0PR") NIL "en-US"))'
+)
+
+# Forwarded application: the resume sits inside an attached message (sections 2.1, 2.2)
+FORWARDED_APPLICATION = (
+    b'* 9 FETCH (UID 310 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 40 1 NIL NIL NIL NIL)'
+    b'("MESSAGE" "RFC822" ("NAME" "Application.eml") NIL NIL "7BIT" 90210 '
+    b'("Mon, 12 Oct 2026 09:14:00 +0000" "Application" (("Ravi K" NIL "ravi" "example.com")) '
+    b'(("Ravi K" NIL "ravi" "example.com")) (("Ravi K" NIL "ravi" "example.com")) '
+    b'((NIL NIL "jobs" "example.com")) NIL NIL NIL "<abc@example.com>") '
+    b'(("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 120 4 NIL NIL NIL NIL)'
+    b'("APPLICATION" "PDF" ("NAME" "ravi_cv.pdf") NIL NIL "BASE64" 88000 NIL ("ATTACHMENT" ("FILENAME" "ravi_cv.pdf")) '
+    b'NIL NIL) "MIXED" ("BOUNDARY" "inner") NIL NIL) 1200 NIL ("ATTACHMENT" ("FILENAME" "Application.eml")) NIL NIL)'
+    b' "MIXED" ("BOUNDARY" "outer") NIL NIL))'
+)
+
+# A message that is nothing but the resume
+SINGLE_PART = (
+    b'* 1 FETCH (UID 5 BODYSTRUCTURE ("APPLICATION" "PDF" ("NAME" "cv.pdf") NIL NIL "BASE64" 1000 NIL '
+    b'("ATTACHMENT" ("FILENAME" "cv.pdf")) NIL NIL))'
+)
+
+def structure_of(response: bytes):
+    (fields,) = parse_fetch_items(response).values()
+    return fields["BODYSTRUCTURE"]
+
+def test_parse_response_tokens():
+    assert parse_response(b'(UID 7 FLAGS (\\Seen $Label) X NIL "a \\"q\\" b" {3}\r\nabc)') == [
+        ["UID", "7", "FLAGS", ["\\Seen", "$Label"], "X", None, 'a "q" b', b"abc"]
+    ]
+    with pytest.raises(ValueError):
+        parse_response(b"(UID 7")
+    with pytest.raises(ValueError):
+        parse_response(b"UID 7)")
+
+def test_gmail_application_parts():
+    parts = attachment_parts(structure_of(GMAIL_APPLICATION))
+    assert parts == [
+        {"section": "2", "filename": "Asha_Rao_Resume.pdf", "content_type": "application/pdf",
+         "encoding": "base64", "size": 183412},
+        {"section": "3", "filename": "image001.png", "content_type": "image/png", "encoding": "base64", "size": 9120}
+    ]
+    message = {"subject": "Application", "structure": structure_of(GMAIL_APPLICATION)}
+    assert [part["filename"] for part in wanted_parts(message)] == ["Asha_Rao_Resume.pdf"]
+
+def test_outlook_encoded_file_names():
+    parts = attachment_parts(structure_of(OUTLOOK_APPLICATION))
+    assert [(part["section"], part["filename"]) for part in parts] == [
+        ("2", "Résumé José.docx"),
+        ("3", "cover letter.doc")
+    ]
+    assert parts[0]["content_type"] == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+def test_attached_message_parts_are_walked():
+    parts = attachment_parts(structure_of(FORWARDED_APPLICATION))
+    assert [(part["section"], part["filename"]) for part in parts] == [("2.2", "ravi_cv.pdf")]
+
+def test_single_part_message_is_section_one():
+    (part,) = attachment_parts(structure_of(SINGLE_PART))
+    assert (part["section"], part["filename"], part["size"]) == ("1", "cv.pdf", 1000)
+
+def test_literals_split_by_imaplib_are_joined():
+    # imaplib returns literals as (prefix, literal) tuples, as for a file name holding quotes
+    data = [
+        (b'1 (UID 7 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 10 1 NIL NIL NIL NIL)'
+         b'("APPLICATION" "PDF" NIL NIL NIL "BASE64" 500 NIL ("ATTACHMENT" ("FILENAME" {19}', b'John "JJ" Smith.pdf'),
+        (b')) NIL NIL) "MIXED" ("BOUNDARY" "b") NIL NIL) BODY[HEADER.FIELDS (SUBJECT)] {41}',
+         b'Subject: =?UTF-8?Q?R=C3=A9sum=C3=A9?=\r\n\r\n'),
+        b')'
+    ]
+    fields = parse_fetch_items(join_fetch_response(data))["7"]
+    assert attachment_parts(fields["BODYSTRUCTURE"])[0]["filename"] == 'John "JJ" Smith.pdf'
+    assert decode_subject(fields[SUBJECT_FIELD]) == "Résumé"
+
+def test_decode_part_and_uid_set():
+    assert decode_part(b"JVBERi0xLjQK\r\n", "base64") == b"%PDF-1.4\n"
+    assert decode_part(b"JVBERi0xLjQK", "base64") == b"%PDF-1.4\n"
+    assert decode_part(b"caf=C3=A9", "quoted-printable") == "café".encode("utf-8")
+    assert uid_set(["9", "3", "4", "5", "12", "13", "7"]) == "3:5,7,9,12:13"
+
+class FakeMailbox:
+    """The IMAPMailbox calls ingest_unseen makes, over BODYSTRUCTURE samples"""
+
+    uid_validity = "1"
+
+    def __init__(self, structures):
+        self.structures = structures
+        self.seen, self.set_aside_uids = set(), set()
+
+    def unseen_uids(self):
+        return [uid for uid in self.structures if uid not in self.seen]
+
+    def fetch_structures(self, uids):
+        return {uid: {"structure": self.structures[uid], "subject": "Application"} for uid in uids}
+
+    def fetch_sections(self, uids, sections):
+        return {uid: {section: b"JVBERi0xLjQK" for section in sections} for uid in uids}
+
+    def mark_seen(self, uids):
+        self.seen.update(uids)
+
+    def set_aside(self, uids):
+        self.seen.update(uids)
+        self.set_aside_uids.update(uids)
+
+def test_failing_messages_are_set_aside_after_max_attempts():
+    mailbox = FakeMailbox({"5": structure_of(SINGLE_PART), "4821": structure_of(GMAIL_APPLICATION),
+                           "13": ["garbage"]})
+    uploads = []
+
+    def upload(filename, payload):
+        if filename == "cv.pdf":
+            raise IOError("storage unavailable")
+        uploads.append(filename)
+
+    attempts = {}
+    config = {"max_message_attempts": 3}
+    first = ingest_unseen(mailbox, upload, config=config, attempts=attempts)
+    assert (first["emails_processed"], first["deferred"], first["set_aside"]) == (1, 1, 1)
+    assert uploads == ["Asha_Rao_Resume.pdf"] and mailbox.set_aside_uids == {"13"}
+
+    ingest_unseen(mailbox, upload, config=config, attempts=attempts)
+    assert attempts == {("1", "5"): 2}
+    third = ingest_unseen(mailbox, upload, config=config, attempts=attempts)
+    assert (third["deferred"], third["set_aside"]) == (0, 1)
+    assert mailbox.set_aside_uids == {"13", "5"} and attempts == {}
+    assert mailbox.unseen_uids() == []
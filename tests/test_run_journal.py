@@ -0,0 +1,37 @@
+# test_run_journal.py — Fallback results are kept for readers and retried on resume
+
+import sqlite3
+
+from run_journal import RESUMABLE_STATUSES, RunJournal
+
+def test_fallback_results_are_read_but_retried(tmp_path):
+    journal = RunJournal(str(tmp_path / "journal.sqlite3"))
+    run_id = journal.start_run("jd", {}, 2)
+    journal.record_result(run_id, "a", "a.pdf", {"candidate_id": "a", "analysis_failed": False})
+    journal.record_result(run_id, "b", "b.pdf", {"candidate_id": "b", "analysis_failed": True}, retry=True)
+    journal.finish_run(run_id, status="completed_with_failures")
+
+    assert journal.completed_keys(run_id) == {"a"}
+    assert [r["candidate_id"] for r in journal.load_results(run_id)] == ["a"]
+    assert len(journal.load_results(run_id, include_retry=True)) == 2
+    results, position = journal.load_results_after(run_id)
+    assert [r["candidate_id"] for r in results] == ["a", "b"] and position > 0
+    (run,) = journal.list_runs(status=RESUMABLE_STATUSES)
+    assert (run["run_id"], run["completed"]) == (run_id, 1)
+
+    # The retried analysis replaces the fallback
+    journal.start_run("jd", {}, 2, run_id=run_id)
+    journal.record_result(run_id, "b", "b.pdf", {"candidate_id": "b", "analysis_failed": False})
+    journal.finish_run(run_id)
+    assert journal.completed_keys(run_id) == {"a", "b"}
+    assert journal.list_runs(status=RESUMABLE_STATUSES) == []
+    assert journal.list_runs(status="completed")[0]["completed"] == 2
+
+def test_journal_without_retry_column_is_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE run_results (run_id TEXT NOT NULL, resume_key TEXT NOT NULL, resume_file TEXT, "
+                     "result TEXT NOT NULL, completed_at REAL NOT NULL, PRIMARY KEY (run_id, resume_key))")
+        conn.execute("INSERT INTO run_results VALUES ('r', 'a', 'a.pdf', '{}', 1.0)")
+    journal = RunJournal(path)
+    assert journal.completed_keys("r") == {"a"}
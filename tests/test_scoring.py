@@ -0,0 +1,88 @@
+# test_scoring.py — Vectorized verdicts against the row-by-row rules they replaced
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from constants import DEFAULT_THRESHOLDS
+from scoring import apply_verdicts, compute_verdicts, ensure_score_columns
+
+def reference_verdict(row, thresholds):
+    """The per-row determine_verdict the engine replaced"""
+    score = row["score"]
+    if (
+        row["jd_similarity"] < thresholds["jd_similarity_min"] or
+        row["skills_match"] < thresholds["skills_match_min"] or
+        row["domain_match"] < thresholds["domain_match_min"] or
+        row["experience_match"] < thresholds["experience_match_min"] or
+        score < thresholds["reject_threshold"]
+    ):
+        return "reject"
+    elif score >= thresholds["shortlist_threshold"]:
+        return "shortlist"
+    return "review"
+
+def reference_verdicts(df, thresholds, top_n=0):
+    """Per-row verdicts, then Top-N by score shortlisted, as the old build_results_frame did"""
+    verdicts = df.apply(reference_verdict, axis=1, thresholds=thresholds)
+    if top_n > 0:
+        verdicts[df["score"].sort_values(ascending=False).index[:top_n]] = "shortlist"
+    return verdicts.to_numpy()
+
+def random_frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "jd_similarity": rng.uniform(30, 100, rows).round(2),
+        "skills_match": rng.integers(0, 101, rows),
+        "domain_match": rng.integers(0, 101, rows),
+        "experience_match": rng.integers(0, 101, rows),
+        # Distinct scores, so Top-N does not depend on how ties are ordered
+        "score": rng.permutation(rows) * (100.0 / rows)
+    })
+    return ensure_score_columns(df)
+
+@pytest.mark.parametrize("thresholds", [
+    {},
+    {"shortlist_threshold": 60, "reject_threshold": 30},
+    {"jd_similarity_min": 0, "skills_match_min": 0, "domain_match_min": 0, "experience_match_min": 0},
+    {"shortlist_threshold": 90, "reject_threshold": 70, "skills_match_min": 80}
+])
+@pytest.mark.parametrize("top_n", [0, 1, 25])
+def test_verdicts_match_row_logic(thresholds, top_n):
+    thresholds = {**DEFAULT_THRESHOLDS, **thresholds}
+    df = random_frame(500, seed=top_n)
+    assert (compute_verdicts(df, thresholds, top_n) == reference_verdicts(df, thresholds, top_n)).all()
+
+def test_boundaries_match_row_logic():
+    thresholds = DEFAULT_THRESHOLDS
+    df = ensure_score_columns(pd.DataFrame({
+        "jd_similarity": [60.0, 59.99, 80.0, 80.0, 80.0],
+        "skills_match": [65, 65, 64, 90, 90],
+        "domain_match": [50, 50, 50, 90, 90],
+        "experience_match": [55, 55, 55, 90, 90],
+        "score": [75.0, 80.0, 80.0, 40.0, 39.99]
+    }))
+    expected = reference_verdicts(df, thresholds)
+    assert list(expected) == ["shortlist", "reject", "reject", "review", "reject"]
+    assert (compute_verdicts(df, thresholds) == expected).all()
+
+def test_missing_scores_count_as_zero():
+    df = pd.DataFrame({"jd_similarity": ["N/A", 90.0], "skills_match": [90, 90], "domain_match": [90, 90],
+                       "experience_match": [90, 90], "score": [95.0, "N/A"]})
+    assert list(compute_verdicts(ensure_score_columns(df))) == ["reject", "reject"]
+
+def test_override_wins_until_cleared():
+    df = random_frame(50, seed=1)
+    apply_verdicts(df)
+    auto = df["auto_verdict"].to_numpy()
+    flipped = "reject" if auto[3] != "reject" else "shortlist"
+    df.loc[df.index[3], "verdict_override"] = flipped
+
+    apply_verdicts(df, {"shortlist_threshold": 50})
+    assert df["verdict"].iloc[3] == flipped
+    assert (df["verdict"].drop(df.index[3]) == df["auto_verdict"].drop(df.index[3])).all()
+
+    df.loc[df.index[3], "verdict_override"] = ""
+    apply_verdicts(df)
+    assert (df["verdict"] == df["auto_verdict"]).all()
+    assert list(df["verdict"].cat.categories) == ["shortlist", "review", "reject"]
@@ -0,0 +1,33 @@
+# test_service.py — Job results served from the run journal
+
+import service
+from run_journal import RunJournal
+from task_queue import DONE, LEASED
+
+def analysis(candidate_id, score, failed=False):
+    return {
+        "candidate_id": candidate_id, "name": candidate_id, "resume_file": f"{candidate_id}.pdf",
+        "resume_text": f"Resume of {candidate_id}", "score": score, "jd_similarity": 80.0,
+        "skills_match": 70, "domain_match": 70, "experience_match": 70, "analysis_failed": failed
+    }
+
+def test_done_job_results_include_failed_analyses(tmp_path, monkeypatch):
+    journal = RunJournal(str(tmp_path / "journal.sqlite3"))
+    monkeypatch.setattr(service, "run_journal", journal)
+    monkeypatch.setattr(service, "_results_cache", service.BoundedCache(maxsize=4))
+    monkeypatch.setattr(service, "_partial_frames", service.BoundedCache(maxsize=4))
+
+    job_id = journal.start_run("jd", {}, 2)
+    journal.record_result(job_id, "a", "a.pdf", analysis("a", 82.0))
+    task = {"task_id": job_id, "status": LEASED, "payload": {}}
+    assert list(service.load_results_frame(task)["candidate_id"]) == ["a"]
+
+    # The GPT fallback for the second resume is journaled for a later retry
+    journal.record_result(job_id, "b", "b.pdf", analysis("b", 0.0, failed=True), retry=True)
+    journal.finish_run(job_id, status="completed_with_failures")
+
+    task["status"] = DONE
+    df = service.load_results_frame(task)
+    assert list(df["candidate_id"]) == ["a", "b"]
+    assert df.set_index("candidate_id").at["b", "analysis_failed"]
+    assert service.load_results_frame(task) is df
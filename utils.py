@@ -2,19 +2,25 @@
 # Fixed for Streamlit Cloud compatibility
 
 import re
+import hashlib
+import threading
 import numpy as np
 import tiktoken
 import functools
 import asyncio
 import logging
 import time
-from typing import List, Dict, Any, Optional, Tuple
-from azure.storage.blob import BlobClient, BlobServiceClient
+from typing import IO, List, Dict, Any, Optional, Tuple, Union
+from collections import OrderedDict
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob import BlobClient, BlobServiceClient, ContentSettings
 from sklearn.metrics.pairwise import cosine_similarity
 from constants import AZURE_CONFIG, MODEL_CONFIG, PERFORMANCE_CONFIG
 from openai import AzureOpenAI
+from resilience import get_dependency_guard, CircuitOpenError, OPENAI_EMBEDDINGS, AZURE_BLOB
 import pandas as pd
 import io
+import tempfile
 import zipfile
 
 # Import with fallback handling for cloud deployment
@@ -405,11 +411,30 @@ def get_text_chunks(text: str, max_tokens: int = 800, overlap: int = 100) -> Lis
     """Wrapper for backward compatibility"""
     return chunk_text(text, max_tokens, overlap)
 
+def count_tokens(text: str) -> int:
+    """Count GPT tokens in text, estimating if the tokenizer is unavailable"""
+    if not text:
+        return 0
+    try:
+        return len(get_tokenizer().encode(text))
+    except Exception as e:
+        logger.warning(f"Token counting failed, estimating: {str(e)}")
+        return len(text) // 4
+
 # ==========================
 # 🧠 Enhanced Embedding & Similarity
 # ==========================
 
 @functools.lru_cache(maxsize=100)  # Increased cache size
+def _fetch_embedding(text: str) -> Tuple[float, ...]:
+    """Fetch an embedding from Azure OpenAI; failures raise so they are never cached"""
+    response = get_dependency_guard(OPENAI_EMBEDDINGS).call(
+        client.embeddings.create,
+        input=[text],
+        model=MODEL_CONFIG["embedding_model"]
+    )
+    return tuple(response.data[0].embedding)  # Convert to tuple for caching
+
 def get_embedding_cached(text: str) -> Tuple[float, ...]:
     """
     Cached embedding generation with error handling and performance optimization
@@ -421,17 +446,12 @@ def get_embedding_cached(text: str) -> Tuple[float, ...]:
         
         start_time = time.time()
         
-        response = client.embeddings.create(
-            input=[text],
-            model=MODEL_CONFIG["embedding_model"]
-        )
-        
-        embedding = response.data[0].embedding
+        embedding = _fetch_embedding(text)
         processing_time = time.time() - start_time
         
         logger.debug(f"Generated embedding in {processing_time:.2f}s")
         
-        return tuple(embedding)  # Convert to tuple for caching
+        return embedding
         
     except Exception as e:
         logger.error(f"Embedding generation failed: {str(e)}")
@@ -576,9 +596,11 @@ def extract_candidate_name(text: str) -> str:
 # ==========================
 
 def upload_to_blob(file_bytes: bytes, file_name: str, container: str, 
-                  overwrite: bool = True, max_retries: int = 3) -> bool:
+                  overwrite: bool = True, max_retries: int = 3,
+                  metadata: Optional[Dict[str, str]] = None, tags: Optional[Dict[str, str]] = None) -> bool:
     """
-    Enhanced blob upload with retry logic and error handling
+    Enhanced blob upload with retry logic and error handling, optionally with blob
+    metadata and index tags
     """
     if not file_bytes or not file_name:
         logger.error("Invalid file data for blob upload")
@@ -592,10 +614,19 @@ def upload_to_blob(file_bytes: bytes, file_name: str, container: str,
                 blob_name=file_name
             )
             
-            blob.upload_blob(file_bytes, overwrite=overwrite)
+            get_dependency_guard(AZURE_BLOB).call(blob.upload_blob, file_bytes, overwrite=overwrite,
+                                                  metadata=metadata, tags=tags)
             logger.debug(f"Successfully uploaded {file_name} to {container}")
             return True
             
+        except CircuitOpenError as e:
+            # Storage is known to be down - skip the retry ladder
+            logger.error(f"Skipping upload of {file_name}: {str(e)}")
+            return False
+        except ResourceExistsError:
+            # Content-addressed names: an existing blob already holds these bytes
+            logger.debug(f"{file_name} already in {container}")
+            return True
         except Exception as e:
             logger.warning(f"Blob upload attempt {attempt + 1} failed: {str(e)}")
             if attempt < max_retries - 1:
@@ -606,18 +637,54 @@ def upload_to_blob(file_bytes: bytes, file_name: str, container: str,
     
     return False
 
+def upload_stream_to_blob(stream: IO[bytes], file_name: str, container: str, content_type: Optional[str] = None,
+                          overwrite: bool = True, max_retries: int = 3) -> bool:
+    """
+    Upload a seekable binary stream; the SDK sends it in blocks so the payload
+    is never held in memory as one bytes object
+    """
+    for attempt in range(max_retries):
+        try:
+            blob = BlobClient.from_connection_string(
+                conn_str=AZURE_CONFIG["connection_string"],
+                container_name=container,
+                blob_name=file_name
+            )
+            stream.seek(0)
+            settings = ContentSettings(content_type=content_type) if content_type else None
+            get_dependency_guard(AZURE_BLOB).call(
+                blob.upload_blob, stream, overwrite=overwrite, content_settings=settings,
+                max_concurrency=PERFORMANCE_CONFIG["blob_transfer_concurrency"]
+            )
+            logger.debug(f"Successfully streamed {file_name} to {container}")
+            return True
+
+        except CircuitOpenError as e:
+            logger.error(f"Skipping upload of {file_name}: {str(e)}")
+            return False
+        except Exception as e:
+            logger.warning(f"Blob stream upload attempt {attempt + 1} failed: {str(e)}")
+            if attempt < max_retries - 1:
+                time.sleep(1.0 * (attempt + 1))
+            else:
+                logger.error(f"Failed to upload {file_name} after {max_retries} attempts")
+                return False
+
+    return False
+
 def save_summary_to_blob(pdf_bytes: bytes, file_name: str, container: str) -> bool:
     """Save PDF summary to blob storage"""
     return upload_to_blob(pdf_bytes, file_name, container)
 
 def save_csv_to_blob(df: pd.DataFrame, file_name: str, container: str) -> bool:
-    """Save CSV data to blob storage"""
-    try:
-        csv_data = df.to_csv(index=False).encode('utf-8')
-        return upload_to_blob(csv_data, file_name, container)
-    except Exception as e:
-        logger.error(f"Failed to convert DataFrame to CSV: {str(e)}")
-        return False
+    """Save CSV data to blob storage, spooled to disk when large and streamed up"""
+    with tempfile.SpooledTemporaryFile(max_size=PERFORMANCE_CONFIG["spool_max_bytes"]) as spool:
+        try:
+            df.to_csv(spool, index=False, encoding='utf-8')
+        except Exception as e:
+            logger.error(f"Failed to convert DataFrame to CSV: {str(e)}")
+            return False
+        return upload_stream_to_blob(spool, file_name, container, content_type="text/csv")
 
 def download_from_blob(file_name: str, container: str) -> Optional[bytes]:
     """Download file from blob storage"""
@@ -628,12 +695,100 @@ def download_from_blob(file_name: str, container: str) -> Optional[bytes]:
             blob_name=file_name
         )
         
-        return blob.download_blob().readall()
+        return get_dependency_guard(AZURE_BLOB).call(lambda: blob.download_blob().readall())
         
     except Exception as e:
         logger.error(f"Failed to download {file_name} from {container}: {str(e)}")
         return None
 
+def download_blob_to_stream(file_name: str, container: str, stream: IO[bytes]) -> bool:
+    """Download a blob into a binary stream in parallel chunks"""
+    try:
+        blob = BlobClient.from_connection_string(
+            conn_str=AZURE_CONFIG["connection_string"],
+            container_name=container,
+            blob_name=file_name
+        )
+        get_dependency_guard(AZURE_BLOB).call(
+            lambda: blob.download_blob(max_concurrency=PERFORMANCE_CONFIG["blob_transfer_concurrency"]).readinto(stream)
+        )
+        stream.seek(0)
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to download {file_name} from {container}: {str(e)}")
+        return False
+
+# ==========================
+# 🗃️ Content Hashing & Bounded Caches
+# ==========================
+
+def compute_content_hash(content: Union[str, bytes]) -> str:
+    """SHA-256 hex digest of the full content (text is UTF-8 encoded)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+def legacy_candidate_id(result: Dict[str, Any]) -> str:
+    """Id for results journaled before candidate ids existed"""
+    return compute_content_hash(f"{result.get('resume_file', '')}\n{result.get('resume_text', '')}")
+
+# Shorter normalized texts are parse failures or near-empty files, not worth matching on
+MIN_FINGERPRINT_CHARS = 200
+
+def normalize_resume_text(text: str) -> str:
+    """Lowercased words only, so re-exports and re-saves of one CV normalize to the same text"""
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+def comparable_resume_text(text: str) -> Optional[str]:
+    """
+    Normalized resume text, or None when there is too little text (or a parse
+    error message) to tell resumes apart
+    """
+    if not text or text.startswith(("Error reading resume", "Error detecting file format", "Unknown file format")):
+        return None
+    normalized = normalize_resume_text(text)
+    return normalized if len(normalized) >= MIN_FINGERPRINT_CHARS else None
+
+def compute_text_fingerprint(text: str) -> Optional[str]:
+    """SHA-256 of the normalized resume text, or None for texts too short to compare"""
+    normalized = comparable_resume_text(text)
+    return compute_content_hash(normalized) if normalized else None
+
+class BoundedCache:
+    """Thread-safe LRU cache with a fixed maximum size"""
+    
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+    
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._data
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
 # ==========================
 # 🔧 Utility Functions
 # ==========================
@@ -996,7 +1151,8 @@ def detect_resume_anomalies(text: str, contact: Dict[str, str], file_format: str
 
 def prepare_export_data(df: pd.DataFrame, include_sensitive: bool = False) -> pd.DataFrame:
     """Prepare dataframe for export with optional sensitive data filtering"""
-    export_df = df.copy()
+    # Keep a named index (candidate_id) as a regular column in the export
+    export_df = df.reset_index() if df.index.name else df.copy()
     
     # Remove large text fields to reduce file size
     columns_to_remove = ["resume_text", "embedding"]
@@ -1006,7 +1162,7 @@ def prepare_export_data(df: pd.DataFrame, include_sensitive: bool = False) -> pd
     export_df = export_df.drop(columns=columns_to_remove, errors='ignore')
     
     # Clean up list fields for CSV export
-    list_columns = ["red_flags", "missing_gaps", "highlights", "reasons_if_rejected"]
+    list_columns = ["red_flags", "missing_gaps", "highlights", "reasons_if_rejected", "resume_skills"]
     for col in list_columns:
         if col in export_df.columns:
             export_df[col] = export_df[col].apply(
@@ -0,0 +1,447 @@
+# warehouse.py — Historical results warehouse: every run's candidates, scores, JD fingerprint and
+# timings in indexed SQLite, with daily per-role rollups for cross-run analytics
+
+import calendar
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from constants import STORAGE_CONFIG
+from scoring import VERDICTS, ensure_score_columns
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    role TEXT COLLATE NOCASE,
+    jd_hash TEXT,
+    source TEXT,
+    candidates INTEGER NOT NULL DEFAULT 0,
+    processing_time REAL,
+    avg_time_per_resume REAL,
+    escalation_rate REAL,
+    metrics TEXT,
+    screened_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS candidates (
+    run_id TEXT NOT NULL,
+    candidate_id TEXT NOT NULL,
+    role TEXT COLLATE NOCASE,
+    jd_hash TEXT,
+    name TEXT,
+    email TEXT,
+    resume_file TEXT,
+    verdict TEXT NOT NULL,
+    auto_verdict TEXT,
+    score REAL,
+    jd_similarity REAL,
+    skills_match INTEGER,
+    domain_match INTEGER,
+    experience_match INTEGER,
+    fraud_detected INTEGER,
+    analysis_failed INTEGER,
+    red_flags TEXT,
+    missing_gaps TEXT,
+    processing_time REAL,
+    screened_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (run_id, candidate_id)
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_run_score ON candidates (run_id, score);
+CREATE INDEX IF NOT EXISTS idx_candidates_verdict_time ON candidates (verdict, screened_at);
+CREATE INDEX IF NOT EXISTS idx_candidates_role_time ON candidates (role, screened_at);
+CREATE INDEX IF NOT EXISTS idx_candidates_candidate ON candidates (candidate_id, screened_at);
+CREATE TABLE IF NOT EXISTS candidate_skills (
+    skill TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    screened_at REAL NOT NULL,
+    run_id TEXT NOT NULL,
+    candidate_id TEXT NOT NULL,
+    PRIMARY KEY (skill, verdict, screened_at, run_id, candidate_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_skills_candidate ON candidate_skills (run_id, candidate_id);
+CREATE TABLE IF NOT EXISTS role_daily (
+    role TEXT NOT NULL COLLATE NOCASE,
+    day TEXT NOT NULL,
+    candidates INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    score_sq_sum REAL NOT NULL,
+    shortlisted INTEGER NOT NULL,
+    reviewed INTEGER NOT NULL,
+    rejected INTEGER NOT NULL,
+    PRIMARY KEY (role, day)
+) WITHOUT ROWID;
+"""
+
+_CANDIDATE_COLUMNS = (
+    "run_id", "candidate_id", "role", "jd_hash", "name", "email", "resume_file", "verdict", "auto_verdict",
+    "score", "jd_similarity", "skills_match", "domain_match", "experience_match", "fraud_detected",
+    "analysis_failed", "red_flags", "missing_gaps", "processing_time", "screened_at", "day"
+)
+
+# Columns returned by candidate queries (everything but the internal day bucket)
+_RESULT_COLUMNS = ", ".join(f"c.{column}" for column in _CANDIDATE_COLUMNS if column != "day")
+
+# Rollup periods for score drift, as SQLite expressions over the YYYY-MM-DD day column
+DRIFT_PERIODS = {
+    "day": "day",
+    "week": "strftime('%Y-W%W', day)",
+    "month": "substr(day, 1, 7)"
+}
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return str(value)
+
+def _joined(value: Any) -> str:
+    return "; ".join(str(item) for item in value) if isinstance(value, (list, tuple, np.ndarray)) else ""
+
+def _truthy(value: Any) -> int:
+    return int(value is True or value == 1 or (isinstance(value, str) and value.lower() == "true"))
+
+class ResultsWarehouse:
+    """
+    Append-mostly analytical store for screening results across runs. Candidate rows are
+    indexed for the common cross-run filters (verdict, role, skill, time window) and a
+    per-role daily rollup answers score drift questions without scanning candidates.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or STORAGE_CONFIG["warehouse_path"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation; safe across threads and processes
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ==========================
+    # ✍️ Writes
+    # ==========================
+
+    def record_run(self, run_id: str, df: pd.DataFrame, role: Optional[str] = None, jd_hash: Optional[str] = None,
+                   metrics: Optional[Dict[str, Any]] = None, source: Optional[str] = None,
+                   screened_at: Optional[float] = None) -> None:
+        """
+        Store (or replace) a run's candidates. 'df' is a results frame from build_results_frame.
+        Re-recording a run, e.g. after it was resumed, keeps its original timestamp unless
+        'screened_at' is given (backfilling older saved results).
+        """
+        metrics = metrics or {}
+        role = role or "N/A"
+        now = time.time()
+        frame = df.reset_index() if df.index.name else df
+
+        with self._transaction() as conn:
+            existing = conn.execute("SELECT screened_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if screened_at is None:
+                screened_at = existing["screened_at"] if existing else now
+            day = time.strftime("%Y-%m-%d", time.gmtime(screened_at))
+            affected = self._run_rollup_keys(conn, run_id) | {(role, day)}
+
+            conn.execute("DELETE FROM candidate_skills WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM candidates WHERE run_id = ?", (run_id,))
+            conn.execute(
+                """INSERT OR REPLACE INTO runs (run_id, role, jd_hash, source, candidates, processing_time,
+                       avg_time_per_resume, escalation_rate, metrics, screened_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (run_id, role, jd_hash, source, len(frame), metrics.get("processing_time"),
+                 metrics.get("avg_time_per_resume"), (metrics.get("model_routing") or {}).get("escalation_rate"),
+                 json.dumps(metrics, default=str), screened_at, now)
+            )
+            rows = list(self._candidate_rows(frame, run_id, role, jd_hash, screened_at, day))
+            conn.executemany(
+                f"INSERT INTO candidates ({', '.join(_CANDIDATE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_CANDIDATE_COLUMNS))})",
+                rows
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO candidate_skills (skill, verdict, screened_at, run_id, candidate_id) "
+                "VALUES (?, ?, ?, ?, ?)",
+                self._skill_rows(frame, run_id, screened_at)
+            )
+            self._refresh_rollups(conn, affected)
+        logger.info(f"Warehouse: recorded run {run_id} ({len(rows)} candidates)")
+
+    @staticmethod
+    def _candidate_rows(frame: pd.DataFrame, run_id: str, role: str, jd_hash: Optional[str],
+                        screened_at: float, day: str) -> Iterable[Tuple]:
+        def column(name: str, default: Any = None) -> Sequence:
+            return frame[name].tolist() if name in frame.columns else [default] * len(frame)
+
+        def numbers(name: str) -> List[float]:
+            if name not in frame.columns:
+                return [0.0] * len(frame)
+            return pd.to_numeric(frame[name], errors="coerce").fillna(0.0).tolist()
+
+        return zip(
+            [run_id] * len(frame), column("candidate_id"), [role] * len(frame), [jd_hash] * len(frame),
+            map(_text, column("name")), map(_text, column("email")), map(_text, column("resume_file")),
+            map(str, column("verdict", "review")), map(_text, column("auto_verdict")),
+            numbers("score"), numbers("jd_similarity"),
+            map(int, numbers("skills_match")), map(int, numbers("domain_match")), map(int, numbers("experience_match")),
+            map(_truthy, column("fraud_detected", False)), map(_truthy, column("analysis_failed", False)),
+            map(_joined, column("red_flags")), map(_joined, column("missing_gaps")),
+            numbers("processing_time"), [screened_at] * len(frame), [day] * len(frame)
+        )
+
+    @staticmethod
+    def _skill_rows(frame: pd.DataFrame, run_id: str, screened_at: float) -> List[Tuple]:
+        if "resume_skills" not in frame.columns:
+            return []
+        rows = []
+        for candidate_id, verdict, skills in zip(frame["candidate_id"], frame["verdict"].astype(str),
+                                                 frame["resume_skills"]):
+            if isinstance(skills, (list, tuple, np.ndarray)):
+                for skill in {str(s).strip().lower() for s in skills if str(s).strip()}:
+                    rows.append((skill, verdict, screened_at, run_id, candidate_id))
+        return rows
+
+    def update_candidates(self, run_id: str, candidate_ids: Sequence[str], verdicts: Sequence[str],
+                          scores: Sequence[float]) -> int:
+        """Apply changed verdicts and scores (recruiter overrides, new weights or thresholds) to a recorded run"""
+        rows = [(str(v), float(s), run_id, cid) for cid, v, s in zip(candidate_ids, verdicts, scores)]
+        if not rows:
+            return 0
+        with self._transaction() as conn:
+            updated = conn.executemany(
+                "UPDATE candidates SET verdict = ?, score = ? WHERE run_id = ? AND candidate_id = ?", rows
+            ).rowcount
+            conn.executemany(
+                "UPDATE candidate_skills SET verdict = ? WHERE run_id = ? AND candidate_id = ?",
+                [(verdict, rid, cid) for verdict, _, rid, cid in rows]
+            )
+            self._refresh_rollups(conn, self._run_rollup_keys(conn, run_id))
+        return updated
+
+    @staticmethod
+    def _run_rollup_keys(conn: sqlite3.Connection, run_id: str) -> set:
+        rows = conn.execute("SELECT DISTINCT role, day FROM candidates WHERE run_id = ?", (run_id,))
+        return {(row["role"], row["day"]) for row in rows}
+
+    @staticmethod
+    def _refresh_rollups(conn: sqlite3.Connection, keys: Iterable[Tuple[str, str]]) -> None:
+        # Recompute only the touched (role, day) buckets; each is a range scan on idx_candidates_role_time
+        for role, day in keys:
+            day_start = calendar.timegm(time.strptime(day, "%Y-%m-%d"))
+            conn.execute("DELETE FROM role_daily WHERE role = ? AND day = ?", (role, day))
+            conn.execute(
+                """INSERT INTO role_daily (role, day, candidates, score_sum, score_sq_sum,
+                       shortlisted, reviewed, rejected)
+                   SELECT role, day, COUNT(*), TOTAL(score), TOTAL(score * score),
+                          SUM(verdict = 'shortlist'), SUM(verdict = 'review'), SUM(verdict = 'reject')
+                   FROM candidates WHERE role = ? AND screened_at >= ? AND screened_at < ?
+                   GROUP BY role, day""",
+                (role, day_start, day_start + 86400)
+            )
+
+    # ==========================
+    # 🔎 Cross-run Queries
+    # ==========================
+
+    def _query(self, sql: str, args: Sequence[Any] = ()) -> pd.DataFrame:
+        with self._connect() as conn:
+            return pd.read_sql_query(sql, conn, params=list(args))
+
+    def find_candidates(self, verdict: Optional[str] = None, skill: Optional[str] = None,
+                        role: Optional[str] = None, since_days: Optional[float] = None,
+                        min_score: Optional[float] = None, limit: int = 500) -> pd.DataFrame:
+        """e.g. find_candidates(verdict="shortlist", skill="python", since_days=90)"""
+        where, args = [], []
+        if skill:
+            source = ("candidate_skills s JOIN candidates c "
+                      "ON c.run_id = s.run_id AND c.candidate_id = s.candidate_id")
+            where.append("s.skill = ?")
+            args.append(skill.strip().lower())
+            prefix = "s"
+        else:
+            source, prefix = "candidates c", "c"
+        if verdict:
+            where.append(f"{prefix}.verdict = ?")
+            args.append(verdict)
+        if since_days:
+            where.append(f"{prefix}.screened_at >= ?")
+            args.append(time.time() - since_days * 86400)
+        if role:
+            where.append("c.role = ?")
+            args.append(role)
+        if min_score is not None:
+            where.append("c.score >= ?")
+            args.append(min_score)
+
+        sql = f"SELECT {_RESULT_COLUMNS} FROM {source}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {prefix}.screened_at DESC, c.score DESC LIMIT ?"
+        return self._query(sql, args + [limit])
+
+    def score_drift(self, role: Optional[str] = None, since_days: Optional[float] = None,
+                    period: str = "week") -> pd.DataFrame:
+        """Average score, spread and shortlist rate per role and period, from the daily rollup"""
+        bucket = DRIFT_PERIODS[period]
+        where, args = [], []
+        if role:
+            where.append("role = ?")
+            args.append(role)
+        if since_days:
+            where.append("day >= ?")
+            args.append(time.strftime("%Y-%m-%d", time.gmtime(time.time() - since_days * 86400)))
+        sql = (f"SELECT role, {bucket} AS period, SUM(candidates) AS candidates, SUM(score_sum) AS score_sum, "
+               f"SUM(score_sq_sum) AS score_sq_sum, SUM(shortlisted) AS shortlisted FROM role_daily")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " GROUP BY role, period ORDER BY period, role"
+
+        drift = self._query(sql, args)
+        n = drift["candidates"].clip(lower=1)
+        drift["avg_score"] = (drift["score_sum"] / n).round(2)
+        drift["score_std"] = np.sqrt((drift["score_sq_sum"] / n - (drift["score_sum"] / n) ** 2).clip(lower=0)).round(2)
+        drift["shortlist_rate"] = (drift["shortlisted"] / n * 100).round(1)
+        return drift.drop(columns=["score_sum", "score_sq_sum"])
+
+    def list_runs(self, limit: int = 50) -> pd.DataFrame:
+        return self._query(
+            """SELECT run_id, role, jd_hash, source, candidates, processing_time, avg_time_per_resume,
+                      escalation_rate, screened_at
+               FROM runs ORDER BY screened_at DESC LIMIT ?""",
+            (limit,)
+        )
+
+    def candidate_history(self, candidate_id: str) -> pd.DataFrame:
+        """Every run a resume was screened in"""
+        return self._query(
+            f"SELECT {_RESULT_COLUMNS} FROM candidates c WHERE c.candidate_id = ? ORDER BY c.screened_at DESC",
+            (candidate_id,)
+        )
+
+    # ==========================
+    # 📊 Single-run Analytics
+    # ==========================
+
+    def run_overview(self, run_id: str, shortlist_threshold: float, reject_threshold: float) -> Dict[str, Any]:
+        """Aggregates for one run's analytics dashboard, computed in SQLite"""
+        with self._connect() as conn:
+            row = conn.execute(
+                """SELECT COUNT(*) AS total, AVG(score) AS avg_score, MIN(score) AS min_score,
+                          MAX(score) AS max_score, AVG(score * score) AS avg_sq,
+                          AVG(jd_similarity) AS jd_similarity, AVG(skills_match) AS skills_match,
+                          AVG(domain_match) AS domain_match, AVG(experience_match) AS experience_match,
+                          SUM(score >= ?) AS above_shortlist,
+                          SUM(score >= ? AND score < ?) AS in_review_range,
+                          SUM(score < ?) AS below_reject,
+                          SUM(fraud_detected) AS flagged
+                   FROM candidates WHERE run_id = ?""",
+                (shortlist_threshold, reject_threshold, shortlist_threshold, reject_threshold, run_id)
+            ).fetchone()
+            total = row["total"]
+            if not total:
+                return {"total": 0}
+            median = conn.execute(
+                "SELECT score FROM candidates WHERE run_id = ? ORDER BY score LIMIT 1 OFFSET ?",
+                (run_id, (total - 1) // 2)
+            ).fetchone()["score"]
+            verdicts = dict(conn.execute(
+                "SELECT verdict, COUNT(*) FROM candidates WHERE run_id = ? GROUP BY verdict", (run_id,)
+            ).fetchall())
+            histogram = dict(conn.execute(
+                """SELECT CASE WHEN score <= 20 THEN '0-20' WHEN score <= 40 THEN '21-40'
+                               WHEN score <= 60 THEN '41-60' WHEN score <= 80 THEN '61-80' ELSE '81-100' END AS bucket,
+                          COUNT(*)
+                   FROM candidates WHERE run_id = ? GROUP BY bucket""",
+                (run_id,)
+            ).fetchall())
+            skills = conn.execute(
+                """SELECT AVG(skills_match) AS avg, SUM(skills_match > 80) AS high, SUM(skills_match < 40) AS low,
+                          AVG(skills_match * skills_match) AS avg_sq, COUNT(*) AS n
+                   FROM candidates WHERE run_id = ? AND skills_match > 0""",
+                (run_id,)
+            ).fetchone()
+
+        def std(mean: Optional[float], mean_sq: Optional[float]) -> float:
+            return float(np.sqrt(max(0.0, (mean_sq or 0.0) - (mean or 0.0) ** 2)))
+
+        return {
+            "total": total,
+            "verdicts": {verdict: verdicts.get(verdict, 0) for verdict in VERDICTS},
+            "score": {"mean": row["avg_score"], "median": median, "max": row["max_score"],
+                      "min": row["min_score"], "std": std(row["avg_score"], row["avg_sq"])},
+            "component_averages": {column: row[column] for column in
+                                   ("jd_similarity", "skills_match", "domain_match", "experience_match")},
+            "thresholds": {"above_shortlist": row["above_shortlist"], "in_review_range": row["in_review_range"],
+                           "below_reject": row["below_reject"]},
+            "histogram": {bucket: histogram.get(bucket, 0) for bucket in ("0-20", "21-40", "41-60", "61-80", "81-100")},
+            "flagged": row["flagged"],
+            "skills": {"count": skills["n"], "mean": skills["avg"], "high": skills["high"], "low": skills["low"],
+                       "std": std(skills["avg"], skills["avg_sq"])}
+        }
+
+    def run_candidates(self, run_id: str, verdicts: Optional[Sequence[str]] = None,
+                       min_score: Optional[float] = None, max_score: Optional[float] = None,
+                       flagged_only: bool = False, order_by_score: bool = True,
+                       limit: Optional[int] = None) -> pd.DataFrame:
+        """One run's candidates, filtered in SQL, indexed by candidate_id"""
+        where, args = ["c.run_id = ?"], [run_id]
+        if verdicts is not None:
+            where.append(f"c.verdict IN ({','.join('?' * len(verdicts))})" if verdicts else "0")
+            args.extend(verdicts)
+        if min_score is not None:
+            where.append("c.score >= ?")
+            args.append(min_score)
+        if max_score is not None:
+            where.append("c.score <= ?")
+            args.append(max_score)
+        if flagged_only:
+            where.append("c.fraud_detected = 1")
+        sql = f"SELECT {_RESULT_COLUMNS} FROM candidates c WHERE {' AND '.join(where)}"
+        if order_by_score:
+            sql += " ORDER BY c.score DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        frame = self._query(sql, args).set_index("candidate_id")
+        frame["verdict"] = pd.Categorical(frame["verdict"], categories=VERDICTS)
+        for column in ("fraud_detected", "analysis_failed"):
+            frame[column] = frame[column].astype(bool)
+        return ensure_score_columns(frame)
+
+_warehouse: Optional[ResultsWarehouse] = None
+
+def get_warehouse() -> ResultsWarehouse:
+    """Process-wide warehouse at the configured path"""
+    global _warehouse
+    if _warehouse is None:
+        _warehouse = ResultsWarehouse()
+    return _warehouse
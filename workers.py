@@ -0,0 +1,165 @@
+# workers.py — Async worker pool that leases screening jobs from a TaskQueue and runs the pipeline
+
+import asyncio
+import base64
+import contextlib
+import logging
+import os
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+
+from constants import SERVICE_CONFIG
+from pipeline import screen_resumes_async, load_resumes_from_blob, build_results_frame
+from run_journal import RunJournal
+from task_queue import TaskQueue, LeaseLostError
+from warehouse import ResultsWarehouse, get_warehouse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCREENING_QUEUE = "screening"
+
+class ScreeningWorkerPool:
+    """
+    Async workers that lease screening jobs from the persistent queue and run them
+    through the shared pipeline. Each job is journaled under its job id, so a job
+    re-leased after a crash or lost lease skips resumes that already finished.
+    Model routing stats and the scheduler's budget and stats are scoped to each job's task.
+    """
+
+    def __init__(self, queue: TaskQueue, journal: RunJournal, workers: Optional[int] = None,
+                 config: Optional[Dict[str, Any]] = None, warehouse: Optional[ResultsWarehouse] = None):
+        self.queue = queue
+        self.journal = journal
+        self.warehouse = warehouse
+        self.config = {**SERVICE_CONFIG, **(config or {})}
+        self.workers = workers or self.config["workers"]
+        self.owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self.active_jobs: Dict[str, str] = {}
+
+    def start(self):
+        for worker_id in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker_loop(f"{self.owner_prefix}:{worker_id}")))
+        logger.info(f"Started {self.workers} screening workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _worker_loop(self, owner: str):
+        while True:
+            try:
+                task = await asyncio.to_thread(self.queue.lease, owner, self.config["lease_seconds"])
+            except Exception as e:
+                logger.error(f"Worker {owner} could not poll the queue: {str(e)}")
+                task = None
+            if task is None:
+                await asyncio.sleep(self.config["poll_interval"])
+                continue
+            self.active_jobs[owner] = task["task_id"]
+            try:
+                await self._run_job(task, owner)
+            finally:
+                self.active_jobs.pop(owner, None)
+
+    async def _run_job(self, task: Dict[str, Any], owner: str):
+        job_id = task["task_id"]
+        payload = task["payload"]
+        progress = {"done": 0, "total": 0, "message": "Starting"}
+
+        def on_progress(done: int, total: int, message: str):
+            progress.update(done=done, total=total, message=message)
+
+        job = asyncio.create_task(self._screen(job_id, payload, on_progress))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, owner, progress, job))
+        try:
+            summary = await job
+        except asyncio.CancelledError:
+            if heartbeat.done() and isinstance(heartbeat.exception(), LeaseLostError):
+                logger.warning(f"Job {job_id} abandoned by {owner}: lease lost")
+                return
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            with contextlib.suppress(LeaseLostError):
+                await asyncio.to_thread(self.queue.fail, job_id, owner, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError, LeaseLostError):
+                await heartbeat
+
+        with contextlib.suppress(LeaseLostError):
+            await asyncio.to_thread(self.queue.heartbeat, job_id, owner, self.config["lease_seconds"],
+                                    {**progress, "message": "Completed"})
+            await asyncio.to_thread(self.queue.complete, job_id, owner, summary)
+        logger.info(f"Job {job_id} completed: {summary['resumes_processed']} resumes")
+
+    async def _heartbeat(self, job_id: str, owner: str, progress: Dict[str, Any], job: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.config["heartbeat_interval"])
+            try:
+                await asyncio.to_thread(self.queue.heartbeat, job_id, owner,
+                                        self.config["lease_seconds"], dict(progress))
+            except LeaseLostError:
+                # Another worker owns the job now; stop doing duplicate work
+                job.cancel()
+                raise
+
+    async def _screen(self, job_id: str, payload: Dict[str, Any], on_progress) -> Dict[str, Any]:
+        resume_files = await asyncio.to_thread(load_job_resumes, payload)
+        if not resume_files:
+            raise ValueError("No resume files found for job")
+
+        run = await screen_resumes_async(
+            payload["jd"], resume_files,
+            role=payload.get("role"),
+            domain=payload.get("domain", ""),
+            skills=payload.get("skills", ""),
+            experience_range=payload.get("experience_range", ""),
+            thresholds=payload.get("thresholds"),
+            concurrency=payload.get("concurrency"),
+            journal=self.journal,
+            run_id=job_id,
+            progress_callback=on_progress,
+            run_params={"source": payload.get("source"), "job_id": job_id}
+        )
+        if not run["results"]:
+            raise ValueError("No resumes were successfully processed")
+
+        await asyncio.to_thread(self.record, run, payload)
+        return self.summarize(run)
+
+    def record(self, run: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        """Store the finished job in the results warehouse"""
+        try:
+            df = build_results_frame(run["results"], payload.get("thresholds"), payload.get("top_n", 0))
+            (self.warehouse or get_warehouse()).record_run(
+                run["run_id"], df, role=run["role"], jd_hash=run["jd_hash"], metrics=run["metrics"],
+                source=payload.get("source")
+            )
+        except Exception as e:
+            logger.error(f"Could not record job {run['run_id']} in the warehouse: {str(e)}")
+
+    def summarize(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        """Task result stored in the queue when a job completes"""
+        metrics = run["metrics"]
+        return {
+            "run_id": run["run_id"],
+            "role": run["role"],
+            "resumes_processed": metrics["resumes_processed"],
+            "processing_time": metrics["processing_time"],
+            "avg_time_per_resume": metrics["avg_time_per_resume"],
+            "escalation_rate": metrics["model_routing"]["escalation_rate"]
+        }
+
+def load_job_resumes(payload: Dict[str, Any]) -> List[Tuple[str, bytes]]:
+    """Resolve a job's resume source to (file_name, bytes) pairs"""
+    if payload.get("source") == "inline":
+        return [(item["file_name"], base64.b64decode(item["content_base64"])) for item in payload["resumes"]]
+
+    # Shards and targeted jobs name their blobs, so only those are downloaded
+    return load_resumes_from_blob(blob_names=payload.get("blob_names"))